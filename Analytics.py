@@ -0,0 +1,107 @@
+import pandas as pd
+
+
+# Колонки с повторяющимися строками - храним как pandas category
+CATEGORICAL_COLUMNS = ['type', 'category_name', 'category_type', 'subcategory_name', 'month']
+
+
+def month_key(df: pd.DataFrame) -> pd.Series:
+    """Месяц операции ('ГГГГ-ММ'): готовая колонка month или префикс даты"""
+    if 'month' in df.columns:
+        return df['month']
+    # Даты хранятся строками ГГГГ-ММ-ДД: месяц - префикс строки, без to_datetime и strftime
+    if pd.api.types.is_datetime64_any_dtype(df['date']):
+        return df['date'].dt.to_period('M').astype(str).rename('month')
+    return df['date'].astype(str).str[:7].rename('month')
+
+
+def prepare_operations(df: pd.DataFrame) -> pd.DataFrame:
+    """Колонка month и категориальные типы для повторяющихся строк.
+
+    Изменяет df на месте - вызывается только загрузчиком (OperationDataset) для нового набора.
+    """
+    if 'month' not in df.columns:
+        df['month'] = month_key(df)
+    for name in CATEGORICAL_COLUMNS:
+        if name in df.columns and not isinstance(df[name].dtype, pd.CategoricalDtype):
+            df[name] = df[name].astype('category')
+    return df
+
+
+def for_display(df: pd.DataFrame) -> pd.DataFrame:
+    """Копия для вывода: категориальные колонки снова строки, пропуски - None (как до категорий), а не NaN"""
+    df = df.copy()
+    for name in CATEGORICAL_COLUMNS:
+        if name in df.columns and isinstance(df[name].dtype, pd.CategoricalDtype):
+            column = df[name].astype(object)
+            df[name] = column.where(column.notna(), None)
+    return df
+
+
+def _sums_by_type(df: pd.DataFrame, keys) -> pd.DataFrame:
+    """Суммы в копейках по ключам (имена колонок или Series) с колонками income / expense"""
+    keys = keys if isinstance(keys, list) else [keys]
+    sums = df.groupby(keys + ['type'], observed=True)['amount_cents'].sum().unstack('type', fill_value=0)
+    return sums.reindex(columns=['income', 'expense'], fill_value=0)
+
+
+def totals(df: pd.DataFrame) -> dict:
+    """Количество операций и суммы доходов/расходов в рублях"""
+    counts = df['type'].value_counts()
+    sums = df.groupby('type', observed=True)['amount_cents'].sum()
+    income_cents = int(sums.get('income', 0))
+    expense_cents = int(sums.get('expense', 0))
+    return {
+        'total_count': len(df),
+        'income_count': int(counts.get('income', 0)),
+        'expense_count': int(counts.get('expense', 0)),
+        'income': income_cents / 100,
+        'expense': expense_cents / 100,
+        'balance': (income_cents - expense_cents) / 100
+    }
+
+
+def monthly_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """Операций, доходы, расходы и баланс по месяцам (по возрастанию месяца)"""
+    # Месяц передается ключом группировки, колонки df не меняются
+    month = month_key(df)
+    stats = _sums_by_type(df, month) / 100
+    stats.insert(0, 'operations_count', month.groupby(month, observed=True).size())
+    stats['balance'] = stats['income'] - stats['expense']
+    stats = stats.reset_index()
+    stats['month'] = stats['month'].astype(str)
+    stats.columns.name = None
+    return stats[['month', 'operations_count', 'income', 'expense', 'balance']]
+
+
+def category_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """Количество и сумма операций по категориям (по возрастанию имени)"""
+    stats = df.groupby(['category_name', 'category_type'], observed=True).agg(
+        operations_count=('amount_cents', 'size'),
+        total_amount=('amount_cents', 'sum')
+    ).reset_index()
+    stats['total_amount'] = stats['total_amount'] / 100
+    return stats
+
+
+def subcategory_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """Количество, доходы и расходы по подкатегориям внутри категорий"""
+    keys = ['category_name', 'subcategory_name']
+    stats = _sums_by_type(df.dropna(subset=['subcategory_name']), keys) / 100
+    stats.insert(0, 'operations_count', df.groupby(keys, observed=True).size())
+    stats = stats.reset_index()
+    stats.columns.name = None
+    return stats
+
+
+def top_operations(df: pd.DataFrame, n: int = 10, type_: str = None) -> pd.DataFrame:
+    """N самых крупных операций (опционально одного типа)"""
+    if type_:
+        df = df[df['type'] == type_]
+    return df.nlargest(n, 'amount_cents')
+
+
+def top_categories(df: pd.DataFrame, n: int = 10, type_: str = 'expense') -> pd.DataFrame:
+    """N категорий с наибольшей суммой операций типа type_"""
+    stats = category_stats(df[df['type'] == type_])
+    return stats.nlargest(n, 'total_amount').reset_index(drop=True)
@@ -0,0 +1,373 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+from unittest import mock
+from typing import Callable, Optional, List, Dict, Any
+from Budget import Budget
+from ConsoleFormatter import ConsoleFormatter
+from DatabaseManager import DatabaseManager
+from Exporter import OperationExporter, openpyxl_available
+from Importer import OperationImporter
+from Operation import Operation
+from ReportEngine import ReportEngine
+from main import create_tables, create_default_categories
+
+# pandas нужен только для замеров загрузки DataFrame
+try:
+    import pandas
+    from Dataset import OperationDataset
+    from Snapshot import OperationSnapshot, pyarrow_available
+except ImportError:
+    pandas = None
+
+
+# Фиксированный конец периода: база не зависит от дня запуска, результаты разных версий сравнимы
+END_DATE = date(2025, 12, 31)
+
+BENCHMARKS = ['filters', 'reports', 'pandas', 'excel', 'inserts', 'deletes']
+
+# Описание операций, вставленных замерами записи: по нему они удаляются после прогона (--reuse)
+BENCHMARK_DESCRIPTION = "benchmark"
+
+DESCRIPTIONS = {
+    'income': ["Зарплата за месяц", "Аванс", "Премия", "Проценты по вкладу", "Кэшбэк", "Возврат",
+               "Перевод от друга", "Продажа вещей", "Дивиденды", "Подработка"],
+    'expense': ["Супермаркет", "Кафе", "Аптека", "Такси", "Заправка", "Коммунальные платежи", "Подписка",
+                "Магазин у дома", "Маркетплейс", "Обед", "Кино", "Метро", "Интернет", "Мобильная связь",
+                "Ремонт", "Подарок", "Одежда", "Доставка еды", "Спортзал", "Книги"]
+}
+
+
+class SyntheticData:
+    """Детерминированный генератор операций: одинаковый seed - одинаковая база"""
+
+    def __init__(self, db_manager: DatabaseManager, seed: int = 42, years: int = 5, end_date: date = END_DATE):
+        self.db = db_manager
+        self.rng = random.Random(seed)
+        self.years = years
+        self.end_date = end_date
+
+    def _uuid(self) -> str:
+        """UUID4 из генератора случайных чисел (воспроизводимый)"""
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def _amount_cents(self, type_: str) -> int:
+        """Сумма операции: логнормальное распределение, доходы крупнее расходов"""
+        if type_ == 'income':
+            return int(self.rng.lognormvariate(10.3, 0.6) * 100)
+        return max(100, int(self.rng.lognormvariate(6.5, 1.1) * 100))
+
+    def generate(self, operations: int, batch_size: int = 50000) -> Dict[str, Any]:
+        """Вставка operations операций за years лет до end_date (по возрастанию даты, как при вводе)"""
+        started = time.perf_counter()
+        categories = {'income': [], 'expense': []}
+        for row in self.db.fetch_all("SELECT id, type FROM categories ORDER BY id"):
+            categories[row['type']].append(row['id'])
+        subcategories = {}
+        for row in self.db.fetch_all("SELECT id, category_id FROM subcategories ORDER BY id"):
+            subcategories.setdefault(row['category_id'], []).append(row['id'])
+
+        days = self.years * 365
+        first_day = self.end_date - timedelta(days=days - 1)
+        day_offsets = sorted(self.rng.randrange(days) for _ in range(operations))
+
+        batch = []
+        inserted = 0
+        for offset in day_offsets:
+            # Примерно каждая восьмая операция - доход
+            type_ = 'income' if self.rng.random() < 0.12 else 'expense'
+            category_id = self.rng.choice(categories[type_])
+            children = subcategories.get(category_id)
+            subcategory_id = self.rng.choice(children) if children and self.rng.random() < 0.8 else None
+            description = self.rng.choice(DESCRIPTIONS[type_]) if self.rng.random() < 0.9 else None
+            batch.append((self._uuid(), type_, category_id, subcategory_id, self._amount_cents(type_),
+                          (first_day + timedelta(days=offset)).isoformat(), description))
+
+            if len(batch) >= batch_size:
+                self.db.execute_many(OperationImporter.INSERT_QUERY, batch)
+                inserted += len(batch)
+                batch = []
+                print(f"   ... {inserted} операций")
+        if batch:
+            self.db.execute_many(OperationImporter.INSERT_QUERY, batch)
+            inserted += len(batch)
+
+        self.db.execute_query("ANALYZE")
+        return {'operations': inserted, 'seconds': time.perf_counter() - started}
+
+
+class Benchmark:
+    """Замеры ключевых сценариев на синтетической базе с результатами в JSON"""
+
+    def __init__(self, db_path: str, repeat: int = 3):
+        self.db_path = db_path
+        self.repeat = repeat
+        self.results = {}
+        self.formatter = ConsoleFormatter()
+
+    def measure(self, name: str, func: Callable[[], Any], repeat: Optional[int] = None):
+        """Запуск func repeat раз (вывод подавляется); в результат - медиана, минимум и все прогоны"""
+        runs = []
+        rows = None
+        for _ in range(repeat or self.repeat):
+            with contextlib.redirect_stdout(io.StringIO()):
+                started = time.perf_counter()
+                result = func()
+                runs.append(time.perf_counter() - started)
+            if isinstance(result, (list, tuple)) or (pandas is not None and isinstance(result, pandas.DataFrame)):
+                rows = len(result)
+            elif isinstance(result, int):
+                rows = result
+
+        self.results[name] = {
+            'seconds': statistics.median(runs),
+            'min_seconds': min(runs),
+            'runs': runs,
+            'rows': rows
+        }
+        suffix = f"  ({rows} строк)" if rows is not None else ""
+        print(f"   {name:<40} {statistics.median(runs) * 1000:10.1f} мс{suffix}")
+
+    def bench_filters(self, db: DatabaseManager):
+        """get_all_operations и страницы с фильтрами по дате и типу"""
+        operations = Operation(db)
+        last_date = db.fetch_one("SELECT MAX(date) FROM operations")[0]
+        month = last_date[:7]
+        year = last_date[:4]
+
+        self.measure("get_all_operations_month",
+                     lambda: operations.get_all_operations(f"{month}-01", f"{month}-31"))
+        self.measure("get_all_operations_month_expense",
+                     lambda: operations.get_all_operations(f"{month}-01", f"{month}-31", 'expense'))
+        self.measure("get_all_operations_year_income",
+                     lambda: operations.get_all_operations(f"{year}-01-01", f"{year}-12-31", 'income'))
+        self.measure("get_operations_page_first", lambda: operations.get_operations_page(page_size=20))
+        middle = db.fetch_one("SELECT date, id FROM operations ORDER BY id LIMIT 1 OFFSET "
+                              "(SELECT COUNT(*) / 2 FROM operations)")
+        if middle:
+            self.measure("get_operations_page_middle",
+                         lambda: operations.get_operations_page(page_size=20, after=(middle['date'], middle['id'])))
+        self.measure("search_operations", lambda: operations.search_operations("супермаркет", None, None, None))
+
+    def bench_reports(self, db: DatabaseManager):
+        """Запросы экрана отчетов (show_reports)"""
+        reports = ReportEngine(db)
+        budgets = Budget(db)
+        month = db.fetch_one("SELECT MAX(date) FROM operations")[0][:7]
+
+        def show_reports():
+            reports.get_totals()
+            reports.get_totals_by_category('expense')
+            reports.get_totals_by_category('income')
+            reports.get_monthly_stats()
+            budgets.get_budget_status(month)
+
+        self.measure("reports_totals", reports.get_totals)
+        self.measure("reports_monthly_stats", reports.get_monthly_stats)
+        self.measure("show_reports", show_reports)
+
+    def bench_pandas(self, db: DatabaseManager, snapshot_path: str):
+        """Загрузка DataFrame: из SQL, из снимка Parquet, дозагрузка изменений"""
+        if pandas is None:
+            self.formatter.print_warning("pandas не установлен - замеры загрузки DataFrame пропущены")
+            return
+
+        self.measure("dataset_load_sql", lambda: OperationDataset(db, None).load(), repeat=1)
+        month = db.fetch_one("SELECT MAX(date) FROM operations")[0][:7]
+        self.measure("dataset_read_period_month", lambda: OperationDataset(db, None).read_period(month=month))
+        if pyarrow_available():
+            snapshot = OperationSnapshot(db, snapshot_path)
+            self.measure("snapshot_refresh_full", lambda: snapshot.refresh(full=True)['rows'], repeat=1)
+            self.measure("snapshot_load", snapshot.load)
+
+        dataset = OperationDataset(db, snapshot_path if pyarrow_available() else None)
+        dataset.load()
+        self.measure("dataset_refresh_unchanged", lambda: dataset.refresh()['rows'])
+
+    def bench_excel(self, db: DatabaseManager, path: str):
+        """Потоковая выгрузка в Excel"""
+        if not openpyxl_available():
+            self.formatter.print_warning("openpyxl не установлен - замер выгрузки в Excel пропущен")
+            return
+        try:
+            self.measure("excel_export_streaming", lambda: OperationExporter(db).export(path)['rows'], repeat=1)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def bench_inserts(self, db: DatabaseManager, count: int = 1000):
+        """Создание операций по одной (как из меню) и пакетом"""
+        operations = Operation(db)
+        category = db.fetch_one("SELECT uuid FROM categories WHERE type = 'expense' ORDER BY id LIMIT 1")['uuid']
+        day = END_DATE.isoformat()
+
+        def insert_one_by_one():
+            for i in range(count):
+                operations.create_operation('expense', category, None, 100 + i, day, BENCHMARK_DESCRIPTION)
+            return count
+
+        self.measure("create_operation_x1000", insert_one_by_one, repeat=1)
+
+        category_key = db.fetch_one("SELECT id FROM categories WHERE uuid = ?", (category,))['id']
+        rows = [(str(uuid.uuid4()), 'expense', category_key, None,
+                 100, day, BENCHMARK_DESCRIPTION) for _ in range(count * 10)]
+
+        def insert_batch():
+            db.execute_many(OperationImporter.INSERT_QUERY, rows)
+            return len(rows)
+
+        self.measure("insert_batch_x10000", insert_batch, repeat=1)
+
+    def bench_deletes(self, db: DatabaseManager, count: int = 1000):
+        """Удаление операций по одной через Operation.delete_operation (подтверждение - 'y')"""
+        # Удаляются только строки замеров; если замер вставки не запускался, они добавляются без замера
+        existing = db.fetch_one("SELECT COUNT(*) FROM operations WHERE description = ?",
+                                (BENCHMARK_DESCRIPTION,))[0]
+        if existing < count:
+            category_key = db.fetch_one("SELECT id FROM categories WHERE type = 'expense' ORDER BY id LIMIT 1")['id']
+            db.execute_many(OperationImporter.INSERT_QUERY,
+                            [(str(uuid.uuid4()), 'expense', category_key, None, 100, END_DATE.isoformat(),
+                              BENCHMARK_DESCRIPTION) for _ in range(count - existing)])
+        ids = [row['uuid'] for row in db.fetch_all("SELECT uuid FROM operations WHERE description = ? "
+                                                   "ORDER BY id DESC LIMIT ?", (BENCHMARK_DESCRIPTION, count))]
+        operations = Operation(db)
+
+        def delete_one_by_one():
+            with mock.patch('builtins.input', return_value='y'):
+                return sum(1 for op_id in ids if operations.delete_operation(op_id))
+
+        self.measure("delete_operation_x1000", delete_one_by_one, repeat=1)
+
+    @staticmethod
+    def cleanup(db: DatabaseManager) -> int:
+        """Удаление всех операций, вставленных замерами записи: база остается сравнимой между прогонами"""
+        return db.execute_query("DELETE FROM operations WHERE description = ?", (BENCHMARK_DESCRIPTION,)).rowcount
+
+    def run(self, benchmarks: List[str], snapshot_path: str, excel_path: str):
+        """Замеры выбранных сценариев: чтение - профиль analytics, запись - durable"""
+        reader = DatabaseManager(self.db_path, profile='analytics')
+        writer = DatabaseManager(self.db_path, profile='durable')
+        reader.connect()
+        writer.connect()
+        try:
+            if 'filters' in benchmarks:
+                self.bench_filters(reader)
+            if 'reports' in benchmarks:
+                self.bench_reports(reader)
+            if 'pandas' in benchmarks:
+                self.bench_pandas(reader, snapshot_path)
+            if 'excel' in benchmarks:
+                self.bench_excel(reader, excel_path)
+            if 'inserts' in benchmarks:
+                self.bench_inserts(writer)
+            if 'deletes' in benchmarks:
+                self.bench_deletes(writer)
+        finally:
+            if 'inserts' in benchmarks or 'deletes' in benchmarks:
+                self.cleanup(writer)
+            reader.disconnect()
+            writer.disconnect()
+        return self.results
+
+
+def prepare_database(path: str, operations: int, seed: int, years: int, reuse: bool) -> Dict[str, Any]:
+    """Создание базы: схема, стандартный справочник и синтетические операции"""
+    if reuse and os.path.exists(path):
+        db = DatabaseManager(path, profile='analytics')
+        db.connect()
+        try:
+            return {'operations': db.fetch_one("SELECT COUNT(*) FROM operations")[0], 'seconds': 0.0,
+                    'reused': True}
+        finally:
+            db.disconnect()
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    db = DatabaseManager(path, profile='fast-ingest')
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_tables(db)
+        create_default_categories(db)
+    db.connect()
+    try:
+        stats = SyntheticData(db, seed, years).generate(operations)
+    finally:
+        db.disconnect()
+    stats['reused'] = False
+    return stats
+
+
+def compare(results: Dict[str, Any], baseline_path: str):
+    """Сравнение с прошлым запуском: отношение медиан по каждому замеру"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+
+    print(f"\nСравнение с {baseline_path}:")
+    for name, result in results.items():
+        if name not in baseline or not baseline[name]['seconds']:
+            continue
+        ratio = result['seconds'] / baseline[name]['seconds']
+        mark = "⚠️ " if ratio > 1.2 else "   "
+        print(f"{mark}{name:<40} {ratio:6.2f}x")
+
+
+def main():
+    """Точка входа: генерация синтетической базы и замеры"""
+    parser = argparse.ArgumentParser(description="Замеры производительности на синтетических данных")
+    parser.add_argument("--db", default="benchmark.db", help="Файл синтетической базы (пересоздается)")
+    parser.add_argument("--operations", type=int, default=1000000, help="Количество операций")
+    parser.add_argument("--years", type=int, default=5, help="За сколько лет генерируются операции")
+    parser.add_argument("--seed", type=int, default=42, help="Seed генератора")
+    parser.add_argument("--repeat", type=int, default=3, help="Повторов каждого замера чтения")
+    parser.add_argument("--reuse", action="store_true", help="Не пересоздавать базу, если файл уже есть")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS, help="Только эти замеры")
+    parser.add_argument("--output", default="benchmark_results.json", help="Файл результатов JSON")
+    parser.add_argument("--compare", help="JSON прошлого запуска для сравнения")
+    args = parser.parse_args()
+
+    formatter = ConsoleFormatter()
+    formatter.print_info(f"Подготовка базы {args.db}: {args.operations} операций, seed {args.seed}")
+    try:
+        generated = prepare_database(args.db, args.operations, args.seed, args.years, args.reuse)
+        if not generated['reused']:
+            formatter.print_success(f"Сгенерировано {generated['operations']} операций за "
+                                    f"{generated['seconds']:.1f} с")
+
+        print("\nЗамеры (медиана):")
+        snapshot_path = os.path.splitext(args.db)[0] + "_snapshot"
+        excel_path = os.path.splitext(args.db)[0] + "_export.xlsx"
+        results = Benchmark(args.db, args.repeat).run(args.only, snapshot_path, excel_path)
+    except (sqlite3.Error, OSError) as e:
+        formatter.print_error(f"Ошибка при замерах: {e}")
+        return
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'pandas': pandas.__version__ if pandas is not None else None,
+        'operations': generated['operations'],
+        'seed': args.seed,
+        'generate_seconds': generated['seconds'],
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    formatter.print_success(f"Результаты сохранены в {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import sqlite3
+import uuid
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Union
+from decimal import Decimal
+from ConsoleFormatter import ConsoleFormatter
+from DatabaseManager import DatabaseManager
+from Lookup import find_uuid_by_prefix
+from Money import to_cents, from_cents
+from Statements import register_statement
+
+
+# Потрачено по бюджету - из таблицы агрегатов operations_rollup: поиск по ключу (месяц, тип, категория),
+# без суммирования операций месяца
+SPENT_SQL = """
+            (SELECT COALESCE(SUM(r.total_cents), 0)
+             FROM operations_rollup r
+             WHERE r.month = b.month
+               AND r.type = c.type
+               AND r.category_id = b.category_id
+               AND (b.subcategory_id IS NULL OR r.subcategory_id = b.subcategory_id))
+            """
+
+BUDGET_STATUS_QUERY = f"""
+                      SELECT b.uuid AS id, b.month, c.name AS category_name, s.name AS subcategory_name,
+                             b.limit_cents, {SPENT_SQL} AS spent_cents
+                      FROM budgets b
+                      JOIN categories c ON b.category_id = c.id
+                      LEFT JOIN subcategories s ON b.subcategory_id = s.id
+                      """
+
+
+def validate_month(month: str) -> bool:
+    """Проверка месяца в формате ГГГГ-ММ"""
+    try:
+        datetime.strptime(month, "%Y-%m")
+        return len(month) == 7
+    except ValueError:
+        return False
+
+
+class Budget:
+    """Класс для работы с бюджетами (лимитами расходов) по категориям и подкатегориям на месяц"""
+
+    # Именованные запросы реестра DatabaseManager
+    FIND_UUID = register_statement('budgets.find_uuid', """
+        SELECT uuid
+        FROM budgets
+        WHERE month = ?
+          AND category_id = (SELECT id FROM categories WHERE uuid = ?)
+          AND subcategory_id IS (SELECT id FROM subcategories WHERE uuid = ?)
+        """)
+    UPDATE_LIMIT = register_statement('budgets.update_limit', "UPDATE budgets SET limit_cents = ? WHERE uuid = ?")
+    INSERT = register_statement('budgets.insert', """
+        INSERT INTO budgets (uuid, category_id, subcategory_id, month, limit_cents)
+        VALUES (?,
+                (SELECT id FROM categories WHERE uuid = ?),
+                (SELECT id FROM subcategories WHERE uuid = ?),
+                ?, ?)
+        """)
+    STATUS = register_statement('budgets.status', BUDGET_STATUS_QUERY + " WHERE b.month = ? ORDER BY c.name, s.name")
+    # Не больше двух строк по индексу idx_budgets_key, потраченное - из operations_rollup
+    OPERATION_BUDGETS = register_statement('budgets.for_operation', f"""
+        SELECT b.uuid AS id, b.month, c.name AS category_name, s.name AS subcategory_name,
+               b.limit_cents, {SPENT_SQL} AS spent_cents
+        FROM operations o
+        JOIN budgets b ON b.month = o.month
+                      AND b.category_id = o.category_id
+                      AND (b.subcategory_id IS NULL OR b.subcategory_id = o.subcategory_id)
+        JOIN categories c ON b.category_id = c.id
+        LEFT JOIN subcategories s ON b.subcategory_id = s.id
+        WHERE o.uuid = ?
+        """)
+    DELETE = register_statement('budgets.delete', "DELETE FROM budgets WHERE uuid = ?")
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+        self.formatter = ConsoleFormatter()
+
+    @staticmethod
+    def _row_to_dict(row) -> Dict[str, Any]:
+        """Строка статуса бюджета: лимит, потрачено и остаток в копейках"""
+        return {
+            'id': row['id'],
+            'month': row['month'],
+            'category_name': row['category_name'],
+            'subcategory_name': row['subcategory_name'],
+            'limit_cents': row['limit_cents'],
+            'spent_cents': row['spent_cents'],
+            'remaining_cents': row['limit_cents'] - row['spent_cents']
+        }
+
+    def set_budget(self, category_id: str, subcategory_id: Optional[str], month: str,
+                   amount: Union[float, Decimal]) -> Optional[str]:
+        """Установка лимита на месяц; существующий бюджет того же ключа обновляется"""
+        try:
+            category = self.db.category_cache.get_category(category_id)
+            if not category or category['type'] != 'expense':
+                self.formatter.print_error("Бюджет задается только для категории расходов!")
+                return None
+
+            # Поиск существующего бюджета и вставка - одна транзакция
+            with self.db.transaction():
+                existing = self.db.fetch_one(self.FIND_UUID, (month, category_id, subcategory_id))
+                if existing:
+                    budget_id = existing['uuid']
+                    self.db.execute_query(self.UPDATE_LIMIT, (to_cents(amount), budget_id))
+                else:
+                    budget_id = str(uuid.uuid4())
+                    self.db.execute_query(self.INSERT, (budget_id, category_id, subcategory_id, month, to_cents(amount)))
+            self.formatter.print_success(f"Бюджет на {month} установлен: {from_cents(to_cents(amount)):.2f}")
+            return budget_id
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при установке бюджета: {e}")
+            return None
+
+    def get_budget_status(self, month: str) -> List[Dict[str, Any]]:
+        """Бюджеты месяца с потраченной суммой (в копейках)"""
+        try:
+            return [self._row_to_dict(row) for row in self.db.fetch_all(self.STATUS, (month,))]
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при получении бюджетов: {e}")
+            return []
+
+    def get_operation_budgets(self, op_id: str) -> List[Dict[str, Any]]:
+        """Бюджеты, в которые попадает операция: ее категории и подкатегории за месяц операции"""
+        return [self._row_to_dict(row) for row in self.db.fetch_all(self.OPERATION_BUDGETS, (op_id,))]
+
+    def warn_operation(self, op_id: str):
+        """Предупреждение при вводе операции, если она превысила бюджет"""
+        try:
+            budgets = self.get_operation_budgets(op_id)
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при проверке бюджета: {e}")
+            return
+
+        for budget in budgets:
+            if budget['remaining_cents'] >= 0:
+                continue
+            name = budget['category_name']
+            if budget['subcategory_name']:
+                name += f" / {budget['subcategory_name']}"
+            self.formatter.print_warning(
+                f"Бюджет '{name}' на {budget['month']} превышен: потрачено {from_cents(budget['spent_cents']):.2f} "
+                f"из {from_cents(budget['limit_cents']):.2f} (перерасход {from_cents(-budget['remaining_cents']):.2f})")
+
+    def delete_budget(self, budget_id: str):
+        """Удаление бюджета по полному или сокращенному ID"""
+        try:
+            full_id = find_uuid_by_prefix(self.db, "budgets", budget_id)
+            if not full_id:
+                self.formatter.print_error(f"Бюджет '{budget_id}' не найден!")
+                return False
+
+            self.db.execute_query(self.DELETE, (full_id,))
+            self.formatter.print_success("Бюджет удален успешно!")
+            return True
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при удалении бюджета: {e}")
+            return False
+
+    def show_budgets_table(self, month: str, show_full_ids: bool = False):
+        """Отображение бюджетов месяца в виде таблицы"""
+        budgets = self.get_budget_status(month)
+
+        if not budgets:
+            self.formatter.print_info(f"Бюджеты на {month} не заданы!")
+            return
+
+        headers = ["ID", "Категория", "Подкатегория", "Лимит", "Потрачено", "Остаток", "Использовано"]
+        rows = []
+        for budget in budgets:
+            used = budget['spent_cents'] / budget['limit_cents'] * 100 if budget['limit_cents'] else 0
+            status = "⚠️ " if budget['remaining_cents'] < 0 else ""
+            rows.append([
+                budget['id'] if show_full_ids else f"{budget['id'][:8]}...",
+                budget['category_name'],
+                budget['subcategory_name'] or "-",
+                f"{from_cents(budget['limit_cents']):.2f}",
+                f"{from_cents(budget['spent_cents']):.2f}",
+                f"{from_cents(budget['remaining_cents']):.2f}",
+                f"{status}{used:.1f}%"
+            ])
+
+        self.formatter.print_table(headers, rows, f"Бюджеты на {month}", show_full_ids)
@@ -1,101 +1,98 @@
 import sqlite3
 import uuid
-from typing import Optional, List, Dict, Any
+from typing import Optional, List
 from ConsoleFormatter import ConsoleFormatter
 from DatabaseManager import DatabaseManager
+from Lookup import name_key, find_uuid_by_prefix
+from Records import CategoryRecord
+from Statements import register_statement
 
 class Category:
     """Класс для работы с категориями"""
 
+    # Именованные запросы реестра DatabaseManager
+    INSERT = register_statement('categories.insert',
+                                "INSERT INTO categories (uuid, name, type, name_key) VALUES (?, ?, ?, ?)")
+    UPDATE = register_statement('categories.update', "UPDATE categories SET name = ?, name_key = ? WHERE uuid = ?")
+    COUNT_SUBCATEGORIES = register_statement('categories.count_subcategories', """
+        SELECT COUNT(*)
+        FROM subcategories
+        WHERE category_id = (SELECT id FROM categories WHERE uuid = ?)
+        """)
+    COUNT_OPERATIONS = register_statement('categories.count_operations', """
+        SELECT COUNT(*)
+        FROM operations
+        WHERE category_id = (SELECT id FROM categories WHERE uuid = ?)
+        """)
+    DELETE_SUBCATEGORIES = register_statement('categories.delete_subcategories', """
+        DELETE FROM subcategories WHERE category_id = (SELECT id FROM categories WHERE uuid = ?)
+        """)
+    DELETE = register_statement('categories.delete', "DELETE FROM categories WHERE uuid = ?")
+
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
         self.formatter = ConsoleFormatter()
+        self.cache = db_manager.category_cache
 
     def create_category(self, name: str, type_: str):
         """Создание новой категории"""
         try:
             category_id = str(uuid.uuid4())
-            query = """
-                    INSERT INTO categories (id, name, type)
-                    VALUES (?, ?, ?) \
-                    """
-            self.db.execute_query(query, (category_id, name, type_))
+            self.db.execute_query(self.INSERT, (category_id, name, type_, name_key(name)))
+            self.cache.invalidate()
             self.formatter.print_success(f"Категория '{name}' создана успешно! ID: {category_id}")
             return category_id
         except sqlite3.Error as e:
             self.formatter.print_error(f"Ошибка при создании категории: {e}")
             return None
 
-    def get_all_categories(self, type_: Optional[str] = None) -> List[Dict[str, Any]]:
+    def get_all_categories(self, type_: Optional[str] = None) -> List[CategoryRecord]:
         """Получение всех категорий с опциональной фильтрацией по типу"""
         try:
-            if type_:
-                query = "SELECT * FROM categories WHERE type = ? ORDER BY name"
-                results = self.db.fetch_all(query, (type_,))
-            else:
-                query = "SELECT * FROM categories ORDER BY name"
-                results = self.db.fetch_all(query)
-
-            categories = []
-            for row in results:
-                categories.append({
-                    'id': row['id'],
-                    'name': row['name'],
-                    'type': row['type']
-                })
-            return categories
+            return self.cache.get_categories(type_)
         except sqlite3.Error as e:
             self.formatter.print_error(f"Ошибка при получении категорий: {e}")
             return []
 
-    def get_category_by_id(self, category_id: str) -> Optional[Dict[str, Any]]:
+    def get_category_by_id(self, category_id: str) -> Optional[CategoryRecord]:
         """Получение категории по ID"""
         try:
-            query = "SELECT * FROM categories WHERE id = ?"
-            result = self.db.fetch_one(query, (category_id,))
-
-            if result:
-                return {
-                    'id': result['id'],
-                    'name': result['name'],
-                    'type': result['type']
-                }
+            return self.cache.get_category(category_id)
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при получении категории: {e}")
             return None
+
+    def get_category_by_name(self, name: str) -> Optional[CategoryRecord]:
+        """Получение категории по имени без учета регистра"""
+        try:
+            return self.cache.find_category(name)
         except sqlite3.Error as e:
             self.formatter.print_error(f"Ошибка при получении категории: {e}")
             return None
 
-    # def get_category_by_name(self, name: str) -> Optional[Dict[str, Any]]:
-    #     """Получение категории по имени"""
-    #     try:
-    #         query = "SELECT * FROM categories WHERE name = ?"
-    #         result = self.db.fetch_one(query, (name,))
-    #
-    #         if result:
-    #             return {
-    #                 'id': result['id'],
-    #                 'name': result['name'],
-    #                 'type': result['type']
-    #             }
-    #         return None
-    #     except sqlite3.Error as e:
-    #         self.formatter.print_error(f"Ошибка при получении категории: {e}")
-    #         return None
+    def resolve_category(self, identifier: str) -> Optional[CategoryRecord]:
+        """Категория по полному или сокращенному ID либо по имени"""
+        category = self.get_category_by_id(identifier)
+        if category:
+            return category
+        try:
+            category_id = find_uuid_by_prefix(self.db, "categories", identifier)
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при получении категории: {e}")
+            return None
+        if category_id:
+            return self.get_category_by_id(category_id)
+        return self.get_category_by_name(identifier)
 
     def update_category(self, category_id: str, name: str = None):
         """Обновление категории"""
         try:
-            category = self.get_category_by_id(category_id)
+            # ID, сокращенный ID или имя категории
+            category = self.resolve_category(category_id)
             if not category:
-                # Попробуем найти по имени
-                # if category_id and not '-' in category_id:  # Если введено не UUID
-                #     category = self.get_category_by_name(category_id)
-
-                if not category:
-                    self.formatter.print_error(f"Категория '{category_id}' не найдена!")
-                    return False
-                else:
-                    category_id = category['id']
+                self.formatter.print_error(f"Категория '{category_id}' не найдена!")
+                return False
+            category_id = category['id']
 
             if name is None:
                 name = self.formatter.get_input(
@@ -106,8 +103,8 @@ class Category:
                 if name is None:
                     return False
 
-            query = "UPDATE categories SET name = ? WHERE id = ?"
-            self.db.execute_query(query, (name, category_id))
+            self.db.execute_query(self.UPDATE, (name, name_key(name), category_id))
+            self.cache.invalidate()
             self.formatter.print_success(f"Категория '{name}' обновлена успешно!")
             return True
         except sqlite3.Error as e:
@@ -117,21 +114,22 @@ class Category:
     def delete_category(self, category_id: str):
         """Удаление категории"""
         try:
-            category = self.get_category_by_id(category_id)
+            # ID, сокращенный ID или имя категории
+            category = self.resolve_category(category_id)
             if not category:
-                # # Попробуем найти по имени
-                # if category_id and not '-' in category_id:  # Если введено не UUID
-                #     category = self.get_category_by_name(category_id)
+                self.formatter.print_error(f"Категория '{category_id}' не найдена!")
+                return False
+            category_id = category['id']
 
-                if not category:
-                    self.formatter.print_error(f"Категория '{category_id}' не найдена!")
-                    return False
-                else:
-                    category_id = category['id']
+            # Операции ссылаются на категорию без ON DELETE: при foreign_keys=ON удаление отклонит база
+            result = self.db.fetch_one(self.COUNT_OPERATIONS, (category_id,))
+            if result and result[0] > 0:
+                self.formatter.print_error(f"Нельзя удалить категорию '{category['name']}': по ней есть операции "
+                                           f"({result[0]}). Сначала удалите их или перенесите в другую категорию.")
+                return False
 
             # Проверка наличия подкатегорий
-            subcat_query = "SELECT COUNT(*) FROM subcategories WHERE category_id = ?"
-            result = self.db.fetch_one(subcat_query, (category_id,))
+            result = self.db.fetch_one(self.COUNT_SUBCATEGORIES, (category_id,))
 
             if result and result[0] > 0:
                 self.formatter.print_warning("Нельзя удалить категорию, у которой есть подкатегории!")
@@ -139,12 +137,11 @@ class Category:
                 if confirm != 'y':
                     return False
 
-                # Удаляем подкатегории
-                delete_subcats = "DELETE FROM subcategories WHERE category_id = ?"
-                self.db.execute_query(delete_subcats, (category_id,))
-
-            query = "DELETE FROM categories WHERE id = ?"
-            self.db.execute_query(query, (category_id,))
+            # Подкатегории и категория удаляются одной транзакцией
+            with self.db.transaction():
+                self.db.execute_query(self.DELETE_SUBCATEGORIES, (category_id,))
+                self.db.execute_query(self.DELETE, (category_id,))
+            self.cache.invalidate()
             self.formatter.print_success(f"Категория '{category['name']}' удалена успешно!")
             return True
         except sqlite3.Error as e:
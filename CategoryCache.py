@@ -0,0 +1,112 @@
+import threading
+from typing import Optional, List
+from Lookup import name_key
+from Records import CategoryRecord, SubcategoryRecord
+from Statements import register_statement
+
+
+class CategoryCache:
+    """Кэш дерева категорий и подкатегорий в памяти процесса (read-through)"""
+
+    # Порядок по id: при одинаковых именах находится самая ранняя запись, списки сортируются по имени в Python
+    CATEGORIES = register_statement('cache.categories', """
+        SELECT c.uuid AS id, c.name, c.type FROM categories c ORDER BY c.id
+        """)
+    SUBCATEGORIES = register_statement('cache.subcategories', """
+        SELECT s.uuid AS id, c.uuid AS category_id, s.name, c.name as category_name
+        FROM subcategories s
+                 JOIN categories c ON s.category_id = c.id
+        ORDER BY s.id
+        """)
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.categories = {}
+        self.category_names = {}
+        self.subcategories = {}
+        self.subcategory_names = {}
+        self.children = {}
+
+    def invalidate(self):
+        """Сброс кэша; вызывается методами записи категорий и подкатегорий"""
+        with self.lock:
+            self.loaded = False
+            self.categories = {}
+            self.category_names = {}
+            self.subcategories = {}
+            self.subcategory_names = {}
+            self.children = {}
+
+    def _ensure_loaded(self):
+        """Загрузка дерева двумя запросами при первом обращении после сброса"""
+        if self.loaded:
+            return
+        with self.lock:
+            if self.loaded:
+                return
+
+            category_names = {}
+            rows = self.db.fetch_all(self.CATEGORIES, record=CategoryRecord)
+            for category in rows:
+                category_names.setdefault(name_key(category.name), category.id)
+            # Сортировка строк Python совпадает с ORDER BY name (BINARY)
+            rows.sort(key=lambda record: record.name)
+            categories = {category.id: category for category in rows}
+            children = {category.id: [] for category in rows}
+
+            # Ключ (None, имя) - подкатегория с таким именем в любой категории
+            subcategory_names = {}
+            rows = self.db.fetch_all(self.SUBCATEGORIES, record=SubcategoryRecord)
+            for subcategory in rows:
+                key = name_key(subcategory.name)
+                subcategory_names.setdefault((subcategory.category_id, key), subcategory.id)
+                subcategory_names.setdefault((None, key), subcategory.id)
+            rows.sort(key=lambda record: record.name)
+            subcategories = {subcategory.id: subcategory for subcategory in rows}
+            for subcategory in rows:
+                children[subcategory.category_id].append(subcategory)
+
+            self.categories = categories
+            self.category_names = category_names
+            self.subcategories = subcategories
+            self.subcategory_names = subcategory_names
+            self.children = children
+            self.loaded = True
+
+    # Записи неизменяемы, поэтому отдаются без копирования
+
+    def get_categories(self, type_: Optional[str] = None) -> List[CategoryRecord]:
+        """Категории, отсортированные по имени"""
+        self._ensure_loaded()
+        return [cat for cat in self.categories.values() if not type_ or cat.type == type_]
+
+    def get_category(self, category_id: str) -> Optional[CategoryRecord]:
+        """Категория по UUID"""
+        self._ensure_loaded()
+        return self.categories.get(category_id)
+
+    def find_category(self, name: str) -> Optional[CategoryRecord]:
+        """Категория по имени без учета регистра"""
+        self._ensure_loaded()
+        category_id = self.category_names.get(name_key(name))
+        return self.get_category(category_id) if category_id else None
+
+    def get_subcategories(self, category_id: Optional[str] = None) -> List[SubcategoryRecord]:
+        """Подкатегории категории по имени либо все, отсортированные по категории и имени"""
+        self._ensure_loaded()
+        if category_id:
+            return list(self.children.get(category_id, []))
+        return [sub for cat_id in self.categories for sub in self.children[cat_id]]
+
+    def get_subcategory(self, subcategory_id: str) -> Optional[SubcategoryRecord]:
+        """Подкатегория по UUID"""
+        self._ensure_loaded()
+        return self.subcategories.get(subcategory_id)
+
+    def find_subcategory(self, category_id: Optional[str], name: str) -> Optional[SubcategoryRecord]:
+        """Подкатегория по имени внутри категории (или в любой, если category_id=None) без учета регистра"""
+        self._ensure_loaded()
+        subcategory_id = self.subcategory_names.get((category_id, name_key(name)))
+        return self.get_subcategory(subcategory_id) if subcategory_id else None
@@ -0,0 +1,112 @@
+import hashlib
+from typing import List, Dict, Any
+from DatabaseManager import DatabaseManager
+
+
+CHANGE_TRIGGERS = ['trg_operations_changes_update', 'trg_operations_changes_delete']
+
+
+def changes_schema_sql() -> List[str]:
+    """DDL журнала изменений операций и его триггеров"""
+    # Вставки не журналируются: новые операции - это id больше последнего прочитанного
+    return [
+        """
+        CREATE TABLE IF NOT EXISTS operations_changes
+        (
+            seq          INTEGER PRIMARY KEY AUTOINCREMENT,
+            operation_id INTEGER NOT NULL,
+            month        TEXT    NOT NULL
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_operations_changes_update
+            AFTER UPDATE ON operations
+        BEGIN
+            INSERT INTO operations_changes (operation_id, month)
+            VALUES (OLD.id, substr(OLD.date, 1, 7));
+            INSERT INTO operations_changes (operation_id, month)
+            SELECT NEW.id, substr(NEW.date, 1, 7)
+            WHERE substr(NEW.date, 1, 7) <> substr(OLD.date, 1, 7);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_operations_changes_delete
+            AFTER DELETE ON operations
+        BEGIN
+            INSERT INTO operations_changes (operation_id, month)
+            VALUES (OLD.id, substr(OLD.date, 1, 7));
+        END
+        """
+    ]
+
+
+class ChangeLog:
+    """Журнал изменений операций для инкрементального обновления снимков и наборов данных"""
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+
+    def create_schema(self):
+        """Создание журнала и триггеров"""
+        with self.db.transaction():
+            for statement in changes_schema_sql():
+                self.db.execute_query(statement)
+
+    def drop_schema(self):
+        """Удаление журнала и триггеров (перед перестройкой таблицы operations)"""
+        with self.db.transaction():
+            for trigger in CHANGE_TRIGGERS:
+                self.db.execute_query(f"DROP TRIGGER IF EXISTS {trigger}")
+            self.db.execute_query("DROP TABLE IF EXISTS operations_changes")
+
+    def position(self) -> Dict[str, Any]:
+        """Текущая позиция: последний номер изменения, максимальный id операции и отпечаток справочников"""
+        # Позиция читается до данных: изменения между чтениями будут применены повторно, а не потеряны
+        row = self.db.fetch_one("""
+                                SELECT (SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence
+                                        WHERE name = 'operations_changes') AS change_seq,
+                                       (SELECT COALESCE(MAX(id), 0) FROM operations) AS max_key
+                                """)
+        return {
+            'change_seq': row['change_seq'],
+            'max_key': row['max_key'],
+            'names': self.names_fingerprint()
+        }
+
+    def names_fingerprint(self) -> str:
+        """Отпечаток названий категорий и подкатегорий (переименование меняет денормализованные данные)"""
+        digest = hashlib.sha1()
+        for table in ("categories", "subcategories"):
+            for row in self.db.fetch_all(f"SELECT id, name FROM {table} ORDER BY id"):
+                digest.update(f"{table}:{row['id']}:{row['name']}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def is_complete(self, change_seq: int) -> bool:
+        """Сохранились ли в журнале все изменения после change_seq (старые записи удаляет prune)"""
+        oldest = self.db.fetch_one("SELECT MIN(seq) FROM operations_changes")[0]
+        if oldest is None:
+            return self.position()['change_seq'] <= change_seq
+        return oldest <= change_seq + 1
+
+    def changed_operations(self, change_seq: int) -> List[int]:
+        """id операций, измененных или удаленных после change_seq"""
+        rows = self.db.fetch_all("SELECT DISTINCT operation_id FROM operations_changes WHERE seq > ?",
+                                 (change_seq,))
+        return [row[0] for row in rows]
+
+    def changed_months(self, change_seq: int, max_key: int) -> List[str]:
+        """Месяцы ('ГГГГ-ММ') с изменениями после change_seq и с операциями новее max_key"""
+        rows = self.db.fetch_all("""
+                                 SELECT month FROM operations_changes WHERE seq > ?
+                                 UNION
+                                 SELECT substr(date, 1, 7) FROM operations WHERE id > ?
+                                 """, (change_seq, max_key))
+        return sorted(row[0] for row in rows)
+
+    def prune(self, keep: int = 100000) -> int:
+        """Удаление старых записей журнала, остаются последние keep"""
+        cursor = self.db.execute_query("""
+                                       DELETE FROM operations_changes
+                                       WHERE seq <= (SELECT MAX(seq) FROM operations_changes) - ?
+                                       """, (keep,))
+        return cursor.rowcount
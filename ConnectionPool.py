@@ -0,0 +1,105 @@
+import pathlib
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import List, Tuple, Any
+
+
+class ConnectionPool:
+    """Пул соединений SQLite: N соединений только для чтения и одно для записи"""
+
+    def __init__(self, db_name: str, pragmas: List[Tuple[str, Any]], read_only: bool = False,
+                 readers: int = 4, timeout: float = 30.0, cached_statements: int = 128):
+        self.db_name = db_name
+        self.pragmas = pragmas
+        self.read_only = read_only
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        # База в памяти не разделяется между соединениями - читаем через основное
+        self.max_readers = 0 if db_name == ":memory:" else readers
+        self.writer_lock = threading.RLock()
+        self.writer_owner = None
+        self.idle_readers = queue.LifoQueue()
+        self.all_readers = []
+        self.readers_lock = threading.Lock()
+        self.writer = self._open(read_only)
+
+    def _open(self, read_only: bool) -> sqlite3.Connection:
+        """Открытие соединения с настройками профиля"""
+        if read_only:
+            # В URI символы '?', '#' и '%' пути экранируются, иначе SQLite разберет их как параметры
+            uri = pathlib.Path(self.db_name).resolve().as_uri()
+            conn = sqlite3.connect(f"{uri}?mode=ro", uri=True, isolation_level=None,
+                                   check_same_thread=False, timeout=self.timeout,
+                                   cached_statements=self.cached_statements)
+        else:
+            # Транзакциями управляет DatabaseManager: BEGIN / SAVEPOINT
+            conn = sqlite3.connect(self.db_name, isolation_level=None, check_same_thread=False,
+                                   timeout=self.timeout, cached_statements=self.cached_statements)
+        for name, value in self.pragmas:
+            if read_only and name == 'journal_mode':
+                continue
+            conn.execute(f"PRAGMA {name} = {value}")
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def write_connection(self):
+        """Единственное соединение для записи; доступ сериализован блокировкой"""
+        with self.writer_lock:
+            previous_owner = self.writer_owner
+            self.writer_owner = threading.get_ident()
+            try:
+                yield self.writer
+            finally:
+                self.writer_owner = previous_owner
+
+    def owns_writer(self) -> bool:
+        """Удерживает ли текущий поток соединение для записи"""
+        return self.writer_owner == threading.get_ident()
+
+    @contextmanager
+    def read_connection(self):
+        """Соединение только для чтения из пула"""
+        # Внутри своей транзакции читаем через писателя, чтобы видеть незафиксированные изменения
+        if self.max_readers == 0 or self.owns_writer():
+            with self.write_connection() as conn:
+                yield conn
+            return
+
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            self.idle_readers.put(conn)
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        """Свободное соединение для чтения; новое открывается, пока не достигнут лимит"""
+        try:
+            return self.idle_readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.readers_lock:
+            if len(self.all_readers) < self.max_readers:
+                conn = self._open(True)
+                self.all_readers.append(conn)
+                return conn
+
+        try:
+            return self.idle_readers.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Нет свободных соединений для чтения в пуле")
+
+    def close(self):
+        """Закрытие всех соединений пула"""
+        with self.readers_lock:
+            for conn in self.all_readers:
+                conn.close()
+            self.all_readers = []
+            self.idle_readers = queue.LifoQueue()
+        with self.writer_lock:
+            self.writer.close()
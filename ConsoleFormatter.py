@@ -1,4 +1,8 @@
-from typing import Optional, List, Dict, Any
+import sys
+from itertools import islice, chain
+from typing import Optional, List, Dict, Any, Iterable
+
+
 class ConsoleFormatter:
     """Класс для форматирования вывода в консоль"""
 
@@ -39,50 +43,59 @@ class ConsoleFormatter:
             print(f"{i:>2}. {option}")
 
     @staticmethod
-    def print_table(headers: List[str], rows: List[List[Any]], title: str = None,
-                    show_full_ids: bool = False):
-        """Вывод таблицы с данными"""
+    def print_table(headers: List[str], rows: Iterable[List[Any]], title: str = None,
+                    show_full_ids: bool = False, sample_size: int = 1000, chunk_size: int = 500):
+        """Вывод таблицы с данными (rows может быть генератором)"""
         if title:
             ConsoleFormatter.print_header(title)
 
-        if not rows:
+        # Ширина колонок считается по первым sample_size строкам, остальные выводятся потоком
+        rows = iter(rows)
+        sample = list(islice(rows, sample_size))
+
+        if not sample:
             ConsoleFormatter.print_info("Нет данных для отображения")
             return
 
-        # Определяем ширину колонок
+        # Определяем ширину колонок по выборке
         col_widths = []
         for i, header in enumerate(headers):
             max_width = len(str(header))
-            for row in rows:
+            for row in sample:
                 cell_width = len(str(row[i])) if i < len(row) else 0
                 max_width = max(max_width, cell_width)
             col_widths.append(min(max_width, 50 if show_full_ids and i == 0 else 30))
 
         # Вывод разделителя
         total_width = sum(col_widths) + 3 * len(col_widths) + 1
-        print("┌" + "─" * (total_width - 2) + "┐")
+        out = sys.stdout
+        out.write("┌" + "─" * (total_width - 2) + "┐\n")
 
         # Вывод заголовков
-        header_row = "│"
-        for i, header in enumerate(headers):
-            header_row += f" {str(header).ljust(col_widths[i])} │"
-        print(header_row)
+        out.write("│" + "".join(f" {str(header).ljust(col_widths[i])} │" for i, header in enumerate(headers)) + "\n")
 
         # Вывод разделителя
-        print("├" + "─" * (total_width - 2) + "┤")
+        out.write("├" + "─" * (total_width - 2) + "┤\n")
 
-        # Вывод строк
-        for row in rows:
-            row_str = "│"
+        # Вывод строк блоками по chunk_size, длинные значения обрезаются по ширине выборки
+        buffer = []
+        for row in chain(sample, rows):
+            cells = []
             for i, cell in enumerate(row):
                 cell_str = str(cell)
                 if len(cell_str) > col_widths[i]:
                     cell_str = cell_str[:col_widths[i] - 3] + "..."
-                row_str += f" {cell_str.ljust(col_widths[i])} │"
-            print(row_str)
+                cells.append(f" {cell_str.ljust(col_widths[i])} │")
+            buffer.append("│" + "".join(cells))
+            if len(buffer) >= chunk_size:
+                out.write("\n".join(buffer) + "\n")
+                buffer = []
+        if buffer:
+            out.write("\n".join(buffer) + "\n")
 
         # Вывод нижней границы
-        print("└" + "─" * (total_width - 2) + "┘")
+        out.write("└" + "─" * (total_width - 2) + "┘\n")
+        out.flush()
 
     @staticmethod
     def get_input(prompt: str, required: bool = False, input_type: type = str,
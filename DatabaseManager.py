@@ -1,36 +1,208 @@
+import os
 import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Optional
+from CategoryCache import CategoryCache
+from ConnectionPool import ConnectionPool
+from QueryProfiler import QueryProfiler, profiler_from_environment
+from Statements import STATEMENTS
+
+
+# Профили соединения: набор PRAGMA и режим доступа
+PROFILES = {
+    # Интерактивная работа: WAL, полная синхронизация, проверка внешних ключей
+    'durable': {
+        'read_only': False,
+        'pragmas': [
+            ('journal_mode', 'WAL'),
+            ('synchronous', 'FULL'),
+            ('cache_size', -16000),
+            ('mmap_size', 0),
+            ('temp_store', 'DEFAULT'),
+            ('foreign_keys', 'ON'),
+        ]
+    },
+    # Массовая загрузка: без fsync на каждый коммит, большой кэш, ссылки проверяет импорт
+    'fast-ingest': {
+        'read_only': False,
+        'pragmas': [
+            ('journal_mode', 'WAL'),
+            ('synchronous', 'NORMAL'),
+            ('cache_size', -262144),
+            ('mmap_size', 268435456),
+            ('temp_store', 'MEMORY'),
+            ('foreign_keys', 'OFF'),
+        ]
+    },
+    # Отчеты и анализ: только чтение, читает параллельно с записью приложения
+    'analytics': {
+        'read_only': True,
+        'pragmas': [
+            ('cache_size', -131072),
+            ('mmap_size', 1073741824),
+            ('temp_store', 'MEMORY'),
+            ('foreign_keys', 'ON'),
+            ('query_only', 'ON'),
+        ]
+    }
+}
+
+DEFAULT_PROFILE = 'durable'
+
+# Размер кэша подготовленных запросов каждого соединения (по умолчанию в sqlite3 - 128):
+# вмещает все именованные запросы и варианты запросов с фильтрами без повторной компиляции
+STATEMENT_CACHE_SIZE = 512
 
 
 class DatabaseManager:
     """Класс для управления базой данных"""
 
-    def __init__(self, db_name: str = "finance.db"):
+    def __init__(self, db_name: str = "finance.db", profile: Optional[str] = None, readers: int = 4,
+                 profiler: Optional[QueryProfiler] = None):
         self.db_name = db_name
+        self.profile = profile or os.environ.get('FINANCE_DB_PROFILE', DEFAULT_PROFILE)
+        if self.profile not in PROFILES:
+            raise ValueError(f"Неизвестный профиль соединения '{self.profile}', "
+                             f"доступны: {', '.join(PROFILES)}")
+        self.readers = readers
+        self.pool = None
         self.conn = None
+        # Курсор последнего запроса записи (rowcount, lastrowid); у каждого вызова свой курсор
         self.cursor = None
+        self.transaction_depth = 0
+        # Профилирование запросов (по умолчанию выключено, см. FINANCE_DB_QUERY_PROFILE)
+        self.profiler = profiler or profiler_from_environment()
+        # Справочник категорий общий для всех менеджеров, работающих с этой базой
+        self.category_cache = CategoryCache(self)
 
     def connect(self):
         """Установка соединения с базой данных"""
-        self.conn = sqlite3.connect(self.db_name)
-        self.conn.row_factory = sqlite3.Row
-        self.cursor = self.conn.cursor()
+        settings = PROFILES[self.profile]
+        self.pool = ConnectionPool(self.db_name, settings['pragmas'], settings['read_only'], self.readers,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+        # Основное соединение - единственный писатель пула
+        self.conn = self.pool.writer
+        self.cursor = None
+        self.transaction_depth = 0
+        self.category_cache.invalidate()
+
+    def describe_profile(self) -> str:
+        """Описание активного профиля с фактическими значениями PRAGMA"""
+        settings = PROFILES[self.profile]
+        names = ['journal_mode'] + [name for name, _ in settings['pragmas'] if name != 'journal_mode']
+        with self.pool.write_connection() as conn:
+            values = ", ".join(f"{name}={conn.execute(f'PRAGMA {name}').fetchone()[0]}" for name in names)
+        mode = "только чтение" if settings['read_only'] else "чтение/запись"
+        return f"{self.profile} ({mode}; {values}; читателей в пуле: {self.pool.max_readers})"
 
     def disconnect(self):
         """Закрытие соединения с базой данных"""
-        if self.conn:
-            self.conn.close()
-
-    def execute_query(self, query: str, params: tuple = ()):
-        """Выполнение SQL запроса"""
-        self.cursor.execute(query, params)
-        self.conn.commit()
-
-    def fetch_all(self, query: str, params: tuple = ()):
-        """Получение всех результатов запроса"""
-        self.cursor.execute(query, params)
-        return self.cursor.fetchall()
-
-    def fetch_one(self, query: str, params: tuple = ()):
-        """Получение одного результата запроса"""
-        self.cursor.execute(query, params)
-        return self.cursor.fetchone()
\ No newline at end of file
+        if self.pool:
+            self.pool.close()
+            self.pool = None
+
+    def reader(self):
+        """Соединение только для чтения из пула (контекстный менеджер)"""
+        return self.pool.read_connection()
+
+    @contextmanager
+    def transaction(self):
+        """Транзакция; вложенные вызовы выполняются как SAVEPOINT"""
+        # Писатель удерживается всю транзакцию, другие потоки ждут
+        with self.pool.write_connection():
+            savepoint = f"sp_{self.transaction_depth}"
+            if self.transaction_depth == 0:
+                self.conn.execute("BEGIN")
+            else:
+                self.conn.execute(f"SAVEPOINT {savepoint}")
+            self.transaction_depth += 1
+
+            try:
+                yield self
+                if self.transaction_depth == 1:
+                    self.conn.execute("COMMIT")
+                else:
+                    self.conn.execute(f"RELEASE {savepoint}")
+            except BaseException:
+                self._rollback(savepoint)
+                raise
+            finally:
+                self.transaction_depth -= 1
+
+    def _rollback(self, savepoint: str):
+        """Откат текущего уровня транзакции; ошибка отката не заменяет исходное исключение"""
+        try:
+            if self.transaction_depth == 1:
+                self.conn.execute("ROLLBACK")
+            else:
+                self.conn.execute(f"ROLLBACK TO {savepoint}")
+                self.conn.execute(f"RELEASE {savepoint}")
+        except sqlite3.Error:
+            # SQLite мог уже откатить транзакцию сам (ошибка ввода-вывода, нехватка памяти)
+            pass
+
+    def _run(self, query: str, params, many: bool = False) -> sqlite3.Cursor:
+        """Выполнение отдельным курсором писателя; при включенном профилировании - с замером времени"""
+        query = STATEMENTS.get(query, query)
+        cursor = self.conn.cursor()
+        execute = cursor.executemany if many else cursor.execute
+        if not self.profiler:
+            execute(query, params)
+        else:
+            started = time.perf_counter()
+            execute(query, params)
+            if many:
+                # План executemany снимается по первому набору параметров
+                params = params[0] if isinstance(params, (list, tuple)) and params else None
+            self.profiler.record(self.conn, query, params, time.perf_counter() - started, cursor.rowcount)
+        self.cursor = cursor
+        return cursor
+
+    def execute_query(self, query: str, params: tuple = ()) -> sqlite3.Cursor:
+        """Выполнение SQL запроса или именованного запроса (вне transaction() - отдельной транзакцией)"""
+        with self.pool.write_connection():
+            if self.transaction_depth:
+                return self._run(query, params)
+            with self.transaction():
+                return self._run(query, params)
+
+    def execute_many(self, query: str, params_seq) -> sqlite3.Cursor:
+        """Выполнение SQL запроса для набора параметров одной транзакцией"""
+        with self.pool.write_connection():
+            if self.transaction_depth:
+                return self._run(query, params_seq, many=True)
+            with self.transaction():
+                return self._run(query, params_seq, many=True)
+
+    @staticmethod
+    def _cursor(conn: sqlite3.Connection, record) -> sqlite3.Cursor:
+        """Курсор запроса; с record строки собираются в компактные записи (см. Records.py)"""
+        cursor = conn.cursor()
+        if record is not None:
+            cursor.row_factory = record.row_factory()
+        return cursor
+
+    def fetch_all(self, query: str, params: tuple = (), record=None):
+        """Получение всех результатов запроса (текст или имя из реестра)"""
+        query = STATEMENTS.get(query, query)
+        with self.pool.read_connection() as conn:
+            cursor = self._cursor(conn, record)
+            if not self.profiler:
+                return cursor.execute(query, params).fetchall()
+            started = time.perf_counter()
+            rows = cursor.execute(query, params).fetchall()
+            self.profiler.record(conn, query, params, time.perf_counter() - started, len(rows))
+            return rows
+
+    def fetch_one(self, query: str, params: tuple = (), record=None):
+        """Получение одного результата запроса (текст или имя из реестра)"""
+        query = STATEMENTS.get(query, query)
+        with self.pool.read_connection() as conn:
+            cursor = self._cursor(conn, record)
+            if not self.profiler:
+                return cursor.execute(query, params).fetchone()
+            started = time.perf_counter()
+            row = cursor.execute(query, params).fetchone()
+            self.profiler.record(conn, query, params, time.perf_counter() - started, 0 if row is None else 1)
+            return row
@@ -0,0 +1,108 @@
+from typing import Optional, Dict, Any
+import pandas as pd
+import Analytics
+from ChangeLog import ChangeLog
+from DatabaseManager import DatabaseManager
+from Snapshot import OperationSnapshot, pyarrow_available
+
+
+class OperationDataset:
+    """Набор операций для анализа в pandas: загружается один раз и дозагружает только изменения"""
+
+    # Для IN (...) - не больше лимита параметров SQLite
+    FETCH_BATCH = 500
+
+    def __init__(self, db_manager: DatabaseManager, snapshot_path: Optional[str] = 'finance_snapshot'):
+        self.db = db_manager
+        self.change_log = ChangeLog(db_manager)
+        # Снимок Parquet ускоряет первую загрузку, если установлен pyarrow
+        self.snapshot = OperationSnapshot(db_manager, snapshot_path) if snapshot_path and pyarrow_available() else None
+        self.df = None
+        self.position = None
+
+    def _read_sql(self, where: str = "", params: tuple = ()) -> pd.DataFrame:
+        """Операции из базы (полный запрос снимка с условием)"""
+        with self.db.reader() as conn:
+            return pd.read_sql_query(OperationSnapshot.QUERY + where, conn, params=params)
+
+    @staticmethod
+    def _prepare(df: pd.DataFrame) -> pd.DataFrame:
+        """Типы колонок (datetime, category, числа) и порядок от новых операций к старым"""
+        df = df.drop(columns=['month'], errors='ignore')
+        if not pd.api.types.is_datetime64_any_dtype(df['date']):
+            df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
+        df['amount_cents'] = df['amount_cents'].astype('int64')
+        df['amount'] = df['amount_cents'] / 100
+        df = df.sort_values(['date', 'key'], ascending=False, ignore_index=True)
+        return Analytics.prepare_operations(df)
+
+    def read_period(self, month: Optional[str] = None, year: Optional[str] = None,
+                    start_date: Optional[str] = None, end_date: Optional[str] = None) -> pd.DataFrame:
+        """Операции за месяц ('ГГГГ-ММ'), год ('ГГГГ') или диапазон дат - запросом к базе по индексу"""
+        filters = []
+        params = []
+        if month:
+            # Генерируемая колонка month, индекс idx_operations_month
+            filters.append("o.month = ?")
+            params.append(month)
+        if year:
+            filters.append("o.date >= ? AND o.date < ?")
+            params.extend([f"{year}-01-01", f"{int(year) + 1:04d}-01-01"])
+        # Даты хранятся как ГГГГ-ММ-ДД: сравнение строк - диапазон по idx_operations_date
+        if start_date:
+            filters.append("o.date >= ?")
+            params.append(start_date)
+        if end_date:
+            filters.append("o.date <= ?")
+            params.append(end_date)
+
+        where = " WHERE " + " AND ".join(filters) if filters else ""
+        return self._prepare(self._read_sql(where, tuple(params)))
+
+    def load(self) -> pd.DataFrame:
+        """Полная загрузка (из снимка Parquet, если он доступен)"""
+        if self.snapshot:
+            self.snapshot.refresh()
+            meta = self.snapshot.read_meta()
+            self.position = {key: meta[key] for key in ('change_seq', 'max_key', 'names')}
+            df = self.snapshot.load()
+        else:
+            # Позиция читается до данных: изменения между чтениями будут применены повторно
+            self.position = self.change_log.position()
+            df = self._read_sql()
+        self.df = self._prepare(df)
+        return self.df
+
+    def refresh(self) -> Dict[str, Any]:
+        """Дозагрузка изменений с прошлой загрузки: mode ('full' / 'incremental' / 'none'), rows"""
+        if self.df is None:
+            self.load()
+            return {'mode': 'full', 'rows': len(self.df)}
+
+        position = self.change_log.position()
+        # Переименование категорий или очищенный журнал - данные перечитываются полностью
+        if position['names'] != self.position['names'] or not self.change_log.is_complete(self.position['change_seq']):
+            self.load()
+            return {'mode': 'full', 'rows': len(self.df)}
+
+        changed = self.change_log.changed_operations(self.position['change_seq'])
+        if not changed and position['max_key'] <= self.position['max_key']:
+            self.position = position
+            return {'mode': 'none', 'rows': 0}
+
+        parts = [self._read_sql(" WHERE o.id > ? AND o.id <= ?", (self.position['max_key'], position['max_key']))]
+        for i in range(0, len(changed), self.FETCH_BATCH):
+            batch = changed[i:i + self.FETCH_BATCH]
+            placeholders = ", ".join("?" * len(batch))
+            parts.append(self._read_sql(f" WHERE o.id IN ({placeholders}) AND o.id <= ?",
+                                        (*batch, self.position['max_key'])))
+        fetched = pd.concat(parts, ignore_index=True)
+
+        # Измененные и удаленные строки убираются, актуальные версии добавляются
+        # (строки, прочитанные повторно из-за гонки с записью, не дублируются)
+        kept = self.df[~self.df['key'].isin(changed) & ~self.df['key'].isin(fetched['key'])]
+        self.df = self._prepare(pd.concat([kept.astype({name: object for name in Analytics.CATEGORICAL_COLUMNS
+                                                         if name in kept.columns}), fetched],
+                                          ignore_index=True))
+        self.position = position
+        return {'mode': 'incremental', 'rows': len(fetched)}
@@ -0,0 +1,183 @@
+import argparse
+import os
+import sqlite3
+import time
+from typing import Dict, Any
+from ConsoleFormatter import ConsoleFormatter
+from DatabaseManager import DatabaseManager
+
+# openpyxl нужен только для выгрузки в Excel
+try:
+    from openpyxl import Workbook
+except ImportError:
+    Workbook = None
+
+
+# Предел строк листа Excel (вместе со строкой заголовка)
+EXCEL_MAX_ROWS = 1048576
+
+TYPE_NAMES = {'income': 'Доход', 'expense': 'Расход'}
+
+
+def openpyxl_available() -> bool:
+    """Установлен ли openpyxl"""
+    return Workbook is not None
+
+
+class OperationExporter:
+    """Класс для потоковой выгрузки операций в Excel (постоянный объем памяти)"""
+
+    OPERATIONS_QUERY = """
+                       SELECT o.uuid AS id,
+                              o.type,
+                              o.date,
+                              o.description,
+                              c.name AS category_name,
+                              c.type AS category_type,
+                              s.name AS subcategory_name,
+                              o.amount_cents
+                       FROM operations o
+                                LEFT JOIN categories c ON o.category_id = c.id
+                                LEFT JOIN subcategories s ON o.subcategory_id = s.id
+                       ORDER BY o.date DESC, o.id DESC
+                       """
+    OPERATIONS_HEADERS = ['id', 'type', 'date', 'description', 'category_name', 'category_type',
+                          'subcategory_name', 'amount']
+
+    # Сводные листы считаются по таблице агрегатов operations_rollup, без чтения операций
+    CATEGORY_QUERY = """
+                     SELECT c.name AS category_name,
+                            c.type AS category_type,
+                            SUM(r.operations_count) AS operations_count,
+                            SUM(r.total_cents) AS total_cents
+                     FROM operations_rollup r
+                     JOIN categories c ON r.category_id = c.id
+                     GROUP BY c.name, c.type
+                     ORDER BY c.name, c.type
+                     """
+    MONTHLY_QUERY = """
+                    SELECT r.month,
+                           SUM(r.operations_count) AS operations_count,
+                           COALESCE(SUM(CASE WHEN r.type = 'income' THEN r.total_cents END), 0)  AS income_cents,
+                           COALESCE(SUM(CASE WHEN r.type = 'expense' THEN r.total_cents END), 0) AS expense_cents
+                    FROM operations_rollup r
+                    JOIN categories c ON r.category_id = c.id
+                    GROUP BY r.month
+                    ORDER BY r.month
+                    """
+
+    def __init__(self, db_manager: DatabaseManager, chunk_size: int = 50000,
+                 rows_per_sheet: int = EXCEL_MAX_ROWS - 1):
+        if not openpyxl_available():
+            raise ImportError("Для выгрузки в Excel установите openpyxl: pip install openpyxl")
+        self.db = db_manager
+        self.formatter = ConsoleFormatter()
+        self.chunk_size = chunk_size
+        self.rows_per_sheet = min(rows_per_sheet, EXCEL_MAX_ROWS - 1)
+
+    def _operations_sheet(self, workbook, number: int):
+        """Новый лист операций с заголовком: 'Операции', 'Операции 2', ..."""
+        sheet = workbook.create_sheet("Операции" if number == 1 else f"Операции {number}")
+        sheet.append(self.OPERATIONS_HEADERS)
+        return sheet
+
+    def _write_operations(self, conn: sqlite3.Connection, workbook) -> Dict[str, int]:
+        """Операции порциями по chunk_size; при заполнении листа начинается следующий"""
+        started = time.perf_counter()
+        exported = 0
+        sheets = 1
+        sheet = self._operations_sheet(workbook, sheets)
+        sheet_rows = 0
+
+        cursor = conn.execute(self.OPERATIONS_QUERY)
+        while True:
+            chunk = cursor.fetchmany(self.chunk_size)
+            if not chunk:
+                break
+            for row in chunk:
+                if sheet_rows >= self.rows_per_sheet:
+                    sheets += 1
+                    sheet = self._operations_sheet(workbook, sheets)
+                    sheet_rows = 0
+                sheet.append([
+                    row['id'],
+                    TYPE_NAMES.get(row['type'], row['type']),
+                    row['date'],
+                    row['description'],
+                    row['category_name'],
+                    TYPE_NAMES.get(row['category_type'], row['category_type']),
+                    row['subcategory_name'],
+                    row['amount_cents'] / 100
+                ])
+                sheet_rows += 1
+            exported += len(chunk)
+            elapsed = time.perf_counter() - started
+            print(f"   ... {exported} строк, {exported / elapsed:,.0f} строк/с, листов: {sheets}")
+
+        return {'rows': exported, 'sheets': sheets}
+
+    def _write_summaries(self, conn: sqlite3.Connection, workbook):
+        """Листы статистики по категориям и по месяцам"""
+        sheet = workbook.create_sheet("Статистика по категориям")
+        sheet.append(['category_name', 'category_type', 'operations_count', 'total_amount'])
+        for row in conn.execute(self.CATEGORY_QUERY):
+            sheet.append([row['category_name'], row['category_type'], row['operations_count'],
+                          row['total_cents'] / 100])
+
+        sheet = workbook.create_sheet("Ежемесячная статистика")
+        sheet.append(['month', 'operations_count', 'income', 'expense', 'balance'])
+        for row in conn.execute(self.MONTHLY_QUERY):
+            sheet.append([row['month'], row['operations_count'], row['income_cents'] / 100,
+                          row['expense_cents'] / 100, (row['income_cents'] - row['expense_cents']) / 100])
+
+    def export(self, filename: str) -> Dict[str, Any]:
+        """Выгрузка в файл, возвращает статистику: rows, sheets, seconds"""
+        started = time.perf_counter()
+        # write_only: строки уходят во временный файл сразу, в памяти не копятся
+        workbook = Workbook(write_only=True)
+
+        with self.db.reader() as conn:
+            # Одна транзакция чтения: операции и сводки согласованы между собой
+            conn.execute("BEGIN")
+            try:
+                stats = self._write_operations(conn, workbook)
+                self._write_summaries(conn, workbook)
+            finally:
+                conn.execute("COMMIT")
+
+        workbook.save(filename)
+        stats['seconds'] = time.perf_counter() - started
+        return stats
+
+
+def main():
+    """Точка входа: потоковая выгрузка операций в Excel"""
+    parser = argparse.ArgumentParser(description="Потоковая выгрузка операций в Excel")
+    parser.add_argument("path", nargs="?", help="Файл .xlsx (по умолчанию operations_export_<время>.xlsx)")
+    parser.add_argument("--db", default="finance.db", help="Путь к базе данных")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Количество строк, читаемых за раз")
+    args = parser.parse_args()
+
+    formatter = ConsoleFormatter()
+    if not openpyxl_available():
+        formatter.print_error("openpyxl не установлен. Установите его командой: pip install openpyxl")
+        return
+    if not os.path.exists(args.db):
+        formatter.print_error(f"База данных '{args.db}' не найдена!")
+        return
+
+    path = args.path or f"operations_export_{time.strftime('%Y%m%d_%H%M%S')}.xlsx"
+    db = DatabaseManager(args.db, profile='analytics')
+    db.connect()
+    try:
+        stats = OperationExporter(db, args.chunk_size).export(path)
+        formatter.print_success(f"Выгружено {stats['rows']} операций на {stats['sheets']} лист(ах) "
+                                f"за {stats['seconds']:.2f} с -> {path}")
+    except (sqlite3.Error, OSError) as e:
+        formatter.print_error(f"Ошибка при выгрузке: {e}")
+    finally:
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    main()
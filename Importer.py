@@ -0,0 +1,208 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+import uuid
+from decimal import InvalidOperation
+from typing import Optional, Dict, Any, Iterator, Tuple, Union
+from ConsoleFormatter import ConsoleFormatter
+from DatabaseManager import DatabaseManager, PROFILES
+from Lookup import name_key
+from Money import to_cents
+from Operation import Operation
+
+
+class ImportRowError(Exception):
+    """Ошибка проверки строки импорта"""
+
+
+class OperationImporter:
+    """Класс для массового импорта операций из CSV / JSON Lines"""
+
+    INSERT_QUERY = """
+                   INSERT INTO operations (uuid, type, category_id, subcategory_id, amount_cents, date, description)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   """
+
+    def __init__(self, db_manager: DatabaseManager, batch_size: int = 10000):
+        self.db = db_manager
+        self.formatter = ConsoleFormatter()
+        self.batch_size = batch_size
+        self.category_types = {}
+        self.category_uuids = {}
+        self.category_names = {}
+        self.subcategory_parents = {}
+        self.subcategory_uuids = {}
+        self.subcategory_names = {}
+
+    @staticmethod
+    def read_rows(path: str, format_: Optional[str] = None) -> Iterator[Tuple[int, Union[Dict[str, Any], str]]]:
+        """Потоковое чтение строк файла: (номер строки, словарь полей CSV или текст строки JSON Lines)"""
+        if format_ is None:
+            format_ = 'jsonl' if path.lower().endswith(('.jsonl', '.json')) else 'csv'
+
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            if format_ == 'csv':
+                # Первая строка - заголовок, нумерация строк данных с 2
+                for line_no, row in enumerate(csv.DictReader(f), 2):
+                    yield line_no, row
+            else:
+                for line_no, line in enumerate(f, 1):
+                    line = line.strip()
+                    if line:
+                        # Разбор JSON - в validate_row: ошибка одной строки не прерывает импорт
+                        yield line_no, line
+
+    def load_references(self):
+        """Загрузка справочников категорий и подкатегорий для проверки ссылок"""
+        # Ключи справочников - целочисленные id; UUID и имена переводятся в них
+        self.category_types = {}
+        self.category_uuids = {}
+        self.category_names = {}
+        for row in self.db.fetch_all("SELECT id, uuid, name, type FROM categories"):
+            self.category_types[row['id']] = row['type']
+            self.category_uuids[row['uuid']] = row['id']
+            self.category_names[name_key(row['name'])] = row['id']
+
+        self.subcategory_parents = {}
+        self.subcategory_uuids = {}
+        self.subcategory_names = {}
+        for row in self.db.fetch_all("SELECT id, uuid, category_id, name FROM subcategories"):
+            self.subcategory_parents[row['id']] = row['category_id']
+            self.subcategory_uuids[row['uuid']] = row['id']
+            self.subcategory_names[(row['category_id'], name_key(row['name']))] = row['id']
+
+    def _resolve_category(self, value: str) -> int:
+        """Категория по UUID или имени"""
+        category_id = self.category_uuids.get(value) or self.category_names.get(name_key(value))
+        if not category_id:
+            raise ImportRowError(f"категория '{value}' не найдена")
+        return category_id
+
+    def _resolve_subcategory(self, value: str, category_id: int) -> int:
+        """Подкатегория по UUID или имени внутри категории"""
+        subcategory_id = self.subcategory_uuids.get(value)
+        if subcategory_id and self.subcategory_parents[subcategory_id] == category_id:
+            return subcategory_id
+        subcategory_id = self.subcategory_names.get((category_id, name_key(value)))
+        if not subcategory_id:
+            raise ImportRowError(f"подкатегория '{value}' не найдена в категории")
+        return subcategory_id
+
+    @staticmethod
+    def _decode_row(row: Union[Dict[str, Any], str]) -> Dict[str, Any]:
+        """Словарь полей строки; строка JSON Lines должна быть объектом JSON"""
+        if isinstance(row, str):
+            try:
+                row = json.loads(row)
+            except json.JSONDecodeError as e:
+                raise ImportRowError(f"неверный JSON: {e.msg} (позиция {e.pos})")
+        if not isinstance(row, dict):
+            raise ImportRowError(f"ожидался объект JSON, получено: {type(row).__name__}")
+        return row
+
+    def validate_row(self, row: Union[Dict[str, Any], str]) -> tuple:
+        """Проверка строки и преобразование в параметры INSERT"""
+        row = self._decode_row(row)
+        category_value = str(row.get('category_id') or row.get('category') or '').strip()
+        if not category_value:
+            raise ImportRowError("не указана категория")
+        category_id = self._resolve_category(category_value)
+
+        type_ = str(row.get('type') or '').strip() or self.category_types[category_id]
+        if type_ not in ('income', 'expense'):
+            raise ImportRowError(f"неверный тип операции '{type_}'")
+        if type_ != self.category_types[category_id]:
+            raise ImportRowError(f"тип операции '{type_}' не совпадает с типом категории")
+
+        subcategory_value = str(row.get('subcategory_id') or row.get('subcategory') or '').strip()
+        subcategory_id = self._resolve_subcategory(subcategory_value, category_id) if subcategory_value else None
+
+        try:
+            amount_cents = to_cents(str(row.get('amount', '')).replace(',', '.').replace(' ', ''))
+        except (InvalidOperation, ValueError):
+            raise ImportRowError(f"неверная сумма '{row.get('amount')}'")
+        if amount_cents <= 0:
+            raise ImportRowError(f"сумма должна быть больше нуля: {row.get('amount')}")
+
+        date = str(row.get('date') or '').strip()
+        if not Operation.validate_date(date):
+            raise ImportRowError(f"неверная дата '{date}' (ожидается ГГГГ-ММ-ДД)")
+
+        description = str(row.get('description') or '').strip() or None
+
+        return str(uuid.uuid4()), type_, category_id, subcategory_id, amount_cents, date, description
+
+    def import_file(self, path: str, format_: Optional[str] = None, max_errors: int = 20) -> Dict[str, Any]:
+        """Импорт файла, возвращает статистику: imported, skipped, seconds, rows_per_sec"""
+        self.load_references()
+
+        imported = 0
+        skipped = 0
+        batch = []
+        started = time.perf_counter()
+
+        for line_no, row in self.read_rows(path, format_):
+            try:
+                batch.append(self.validate_row(row))
+            except ImportRowError as e:
+                skipped += 1
+                if skipped <= max_errors:
+                    self.formatter.print_warning(f"Строка {line_no} пропущена: {e}")
+                continue
+
+            if len(batch) >= self.batch_size:
+                self.db.execute_many(self.INSERT_QUERY, batch)
+                imported += len(batch)
+                batch = []
+                elapsed = time.perf_counter() - started
+                print(f"   ... {imported} строк, {imported / elapsed:,.0f} строк/с")
+
+        if batch:
+            self.db.execute_many(self.INSERT_QUERY, batch)
+            imported += len(batch)
+
+        elapsed = time.perf_counter() - started
+        return {
+            'imported': imported,
+            'skipped': skipped,
+            'seconds': elapsed,
+            'rows_per_sec': imported / elapsed if elapsed > 0 else 0.0
+        }
+
+
+def main():
+    """Точка входа: импорт операций из файла"""
+    parser = argparse.ArgumentParser(description="Массовый импорт операций из CSV / JSON Lines")
+    parser.add_argument("path", help="Файл с операциями (.csv или .jsonl)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Формат файла (по умолчанию по расширению)")
+    parser.add_argument("--db", default="finance.db", help="Путь к базе данных")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Количество строк в одной транзакции")
+    parser.add_argument("--profile", default="fast-ingest", choices=list(PROFILES),
+                        help="Профиль соединения с базой данных")
+    args = parser.parse_args()
+
+    formatter = ConsoleFormatter()
+    if not os.path.exists(args.path):
+        formatter.print_error(f"Файл '{args.path}' не найден!")
+        return
+
+    db = DatabaseManager(args.db, args.profile)
+    db.connect()
+    formatter.print_info(f"Профиль соединения: {db.describe_profile()}")
+    try:
+        importer = OperationImporter(db, args.batch_size)
+        stats = importer.import_file(args.path, args.format)
+        formatter.print_success(
+            f"Импортировано {stats['imported']} операций за {stats['seconds']:.2f} с "
+            f"({stats['rows_per_sec']:,.0f} строк/с), пропущено: {stats['skipped']}")
+    except (sqlite3.Error, OSError, ValueError) as e:
+        formatter.print_error(f"Ошибка при импорте: {e}")
+    finally:
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    main()
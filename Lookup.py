@@ -0,0 +1,30 @@
+from typing import Optional
+
+
+# Длина сокращенного ID в таблицах ("1b520b24...")
+SHORT_ID_LENGTH = 8
+
+
+def name_key(name: str) -> str:
+    """Нормализованное имя для поиска без учета регистра (колонка name_key)"""
+    # COLLATE NOCASE сворачивает только ASCII, поэтому ключ для кириллицы считается в Python
+    return " ".join(name.split()).casefold()
+
+
+def uuid_prefix(identifier: str) -> Optional[str]:
+    """Префикс UUID из введенного ID: полный или сокращенный вида '1b520b24...'"""
+    prefix = identifier.strip().rstrip('.').lower()
+    if len(prefix) < SHORT_ID_LENGTH or any(ch not in '0123456789abcdef-' for ch in prefix):
+        return None
+    return prefix
+
+
+def find_uuid_by_prefix(db, table: str, identifier: str) -> Optional[str]:
+    """Полный UUID строки таблицы по префиксу; None, если не найден или неоднозначен"""
+    prefix = uuid_prefix(identifier)
+    if prefix is None:
+        return None
+    # Диапазон [prefix, prefix с увеличенным последним символом) читается по уникальному индексу uuid
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    rows = db.fetch_all(f"SELECT uuid FROM {table} WHERE uuid >= ? AND uuid < ? LIMIT 2", (prefix, upper))
+    return rows[0]['uuid'] if len(rows) == 1 else None
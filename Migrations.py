@@ -0,0 +1,384 @@
+import argparse
+from typing import List, Tuple, Callable
+from ChangeLog import ChangeLog
+from DatabaseManager import DatabaseManager
+from Lookup import name_key
+from Rollup import Rollup
+from SearchIndex import SearchIndex
+
+
+def migration_001_base_schema(db: DatabaseManager):
+    """Базовые таблицы: категории, подкатегории, операции"""
+    # IF NOT EXISTS: базы, созданные до появления миграций, уже содержат эти таблицы
+    db.execute_query("""
+                     CREATE TABLE IF NOT EXISTS categories
+                     (
+                         id   TEXT PRIMARY KEY,
+                         name TEXT NOT NULL,
+                         type TEXT NOT NULL CHECK (type IN ('income', 'expense'))
+                     )
+                     """)
+
+    db.execute_query("""
+                     CREATE TABLE IF NOT EXISTS subcategories
+                     (
+                         id          TEXT PRIMARY KEY,
+                         category_id TEXT NOT NULL,
+                         name        TEXT NOT NULL,
+                         FOREIGN KEY (category_id) REFERENCES categories (id) ON DELETE CASCADE
+                     )
+                     """)
+
+    db.execute_query("""
+                     CREATE TABLE IF NOT EXISTS operations
+                     (
+                         id             TEXT PRIMARY KEY,
+                         type           TEXT     NOT NULL CHECK (type IN ('income', 'expense')),
+                         category_id    TEXT     NOT NULL,
+                         subcategory_id TEXT,
+                         amount         REAL     NOT NULL,
+                         date           DATETIME NOT NULL,
+                         description    TEXT,
+                         FOREIGN KEY (category_id) REFERENCES categories (id),
+                         FOREIGN KEY (subcategory_id) REFERENCES subcategories (id) ON DELETE SET NULL
+                     )
+                     """)
+
+    db.execute_query("CREATE INDEX IF NOT EXISTS idx_operations_date ON operations(date)")
+    db.execute_query("CREATE INDEX IF NOT EXISTS idx_operations_type ON operations(type)")
+    db.execute_query("CREATE INDEX IF NOT EXISTS idx_subcategories_category ON subcategories(category_id)")
+
+
+def migration_002_rollups(db: DatabaseManager):
+    """Агрегаты по месяцам и категориям, поддерживаемые триггерами"""
+    Rollup(db).create_schema(amount='amount', total='total', total_type='REAL', key_type='TEXT')
+
+
+def migration_003_foreign_key_indexes(db: DatabaseManager):
+    """Индексы по внешним ключам операций и составные индексы для отчетов"""
+    # Соединения с категориями, удаление категорий и выборки по категории за период
+    db.execute_query("CREATE INDEX IF NOT EXISTS idx_operations_category_date ON operations(category_id, date)")
+    # ON DELETE SET NULL при удалении подкатегории и соединение с подкатегориями
+    db.execute_query("CREATE INDEX IF NOT EXISTS idx_operations_subcategory ON operations(subcategory_id)")
+    # Фильтр по типу и периоду с суммой без обращения к таблице
+    db.execute_query("CREATE INDEX IF NOT EXISTS idx_operations_type_date_amount ON operations(type, date, amount)")
+    # Покрывается префиксом idx_operations_type_date_amount
+    db.execute_query("DROP INDEX IF EXISTS idx_operations_type")
+    db.execute_query("ANALYZE")
+
+
+def migration_004_amount_cents(db: DatabaseManager):
+    """Хранение сумм операций целым числом копеек (amount REAL -> amount_cents INTEGER)"""
+    # Триггеры агрегатов ссылаются на operations - пересоздаются после перестройки таблицы
+    rollup = Rollup(db)
+    rollup.drop_schema()
+
+    db.execute_query("""
+                     CREATE TABLE operations_new
+                     (
+                         id             TEXT     PRIMARY KEY,
+                         type           TEXT     NOT NULL CHECK (type IN ('income', 'expense')),
+                         category_id    TEXT     NOT NULL,
+                         subcategory_id TEXT,
+                         amount_cents   INTEGER  NOT NULL,
+                         date           DATETIME NOT NULL,
+                         description    TEXT,
+                         FOREIGN KEY (category_id) REFERENCES categories (id),
+                         FOREIGN KEY (subcategory_id) REFERENCES subcategories (id) ON DELETE SET NULL
+                     )
+                     """)
+    db.execute_query("""
+                     INSERT INTO operations_new (id, type, category_id, subcategory_id, amount_cents, date, description)
+                     SELECT id, type, category_id, subcategory_id, CAST(ROUND(amount * 100) AS INTEGER), date, description
+                     FROM operations
+                     """)
+    db.execute_query("DROP TABLE operations")
+    db.execute_query("ALTER TABLE operations_new RENAME TO operations")
+
+    db.execute_query("CREATE INDEX idx_operations_date ON operations(date)")
+    db.execute_query("CREATE INDEX idx_operations_category_date ON operations(category_id, date)")
+    db.execute_query("CREATE INDEX idx_operations_subcategory ON operations(subcategory_id)")
+    db.execute_query("CREATE INDEX idx_operations_type_date_amount ON operations(type, date, amount_cents)")
+
+    rollup.create_schema(amount='amount_cents', total='total_cents', total_type='INTEGER', key_type='TEXT')
+    db.execute_query("ANALYZE")
+
+
+def migration_005_integer_keys(db: DatabaseManager):
+    """Целочисленные первичные ключи; UUID остается публичным идентификатором в колонке uuid"""
+    rollup = Rollup(db)
+    rollup.drop_schema()
+
+    db.execute_query("""
+                     CREATE TABLE categories_new
+                     (
+                         id   INTEGER PRIMARY KEY,
+                         uuid TEXT NOT NULL UNIQUE,
+                         name TEXT NOT NULL,
+                         type TEXT NOT NULL CHECK (type IN ('income', 'expense'))
+                     )
+                     """)
+    db.execute_query("""
+                     CREATE TABLE subcategories_new
+                     (
+                         id          INTEGER PRIMARY KEY,
+                         uuid        TEXT    NOT NULL UNIQUE,
+                         category_id INTEGER NOT NULL,
+                         name        TEXT    NOT NULL,
+                         FOREIGN KEY (category_id) REFERENCES categories_new (id) ON DELETE CASCADE
+                     )
+                     """)
+    db.execute_query("""
+                     CREATE TABLE operations_new
+                     (
+                         id             INTEGER PRIMARY KEY,
+                         uuid           TEXT     NOT NULL UNIQUE,
+                         type           TEXT     NOT NULL CHECK (type IN ('income', 'expense')),
+                         category_id    INTEGER  NOT NULL,
+                         subcategory_id INTEGER,
+                         amount_cents   INTEGER  NOT NULL,
+                         date           DATETIME NOT NULL,
+                         description    TEXT,
+                         FOREIGN KEY (category_id) REFERENCES categories_new (id),
+                         FOREIGN KEY (subcategory_id) REFERENCES subcategories_new (id) ON DELETE SET NULL
+                     )
+                     """)
+
+    # Старые TEXT ключи становятся uuid, ссылки переводятся на новые rowid
+    db.execute_query("""
+                     INSERT INTO categories_new (uuid, name, type)
+                     SELECT id, name, type
+                     FROM categories
+                     ORDER BY rowid
+                     """)
+    db.execute_query("""
+                     INSERT INTO subcategories_new (uuid, category_id, name)
+                     SELECT s.id, c.id, s.name
+                     FROM subcategories s
+                     JOIN categories_new c ON c.uuid = s.category_id
+                     ORDER BY s.rowid
+                     """)
+    # Операции удаленных категорий сохраняются: для их ключа создается категория-заглушка
+    db.execute_query("""
+                     INSERT INTO categories_new (uuid, name, type)
+                     SELECT o.category_id, 'Удаленная категория', MIN(o.type)
+                     FROM operations o
+                     WHERE NOT EXISTS (SELECT 1 FROM categories c WHERE c.id = o.category_id)
+                     GROUP BY o.category_id
+                     """)
+    db.execute_query("""
+                     INSERT INTO operations_new (uuid, type, category_id, subcategory_id, amount_cents, date, description)
+                     SELECT o.id, o.type, c.id, s.id, o.amount_cents, o.date, o.description
+                     FROM operations o
+                     JOIN categories_new c ON c.uuid = o.category_id
+                     LEFT JOIN subcategories_new s ON s.uuid = o.subcategory_id
+                     ORDER BY o.date, o.rowid
+                     """)
+
+    # Сначала дочерние таблицы, чтобы не нарушать внешние ключи
+    db.execute_query("DROP TABLE operations")
+    db.execute_query("DROP TABLE subcategories")
+    db.execute_query("DROP TABLE categories")
+    db.execute_query("ALTER TABLE categories_new RENAME TO categories")
+    db.execute_query("ALTER TABLE subcategories_new RENAME TO subcategories")
+    db.execute_query("ALTER TABLE operations_new RENAME TO operations")
+
+    db.execute_query("CREATE INDEX idx_subcategories_category ON subcategories(category_id)")
+    db.execute_query("CREATE INDEX idx_operations_date ON operations(date)")
+    db.execute_query("CREATE INDEX idx_operations_category_date ON operations(category_id, date)")
+    db.execute_query("CREATE INDEX idx_operations_subcategory ON operations(subcategory_id)")
+    db.execute_query("CREATE INDEX idx_operations_type_date_amount ON operations(type, date, amount_cents)")
+
+    rollup.create_schema(amount='amount_cents', total='total_cents', total_type='INTEGER', key_type='INTEGER')
+    db.execute_query("ANALYZE")
+
+
+def migration_006_name_keys(db: DatabaseManager):
+    """Нормализованные имена категорий и подкатегорий с индексами для поиска по имени"""
+    db.execute_query("ALTER TABLE categories ADD COLUMN name_key TEXT")
+    db.execute_query("ALTER TABLE subcategories ADD COLUMN name_key TEXT")
+
+    # Ключ считается в Python (casefold), как и при записи из приложения
+    for table in ("categories", "subcategories"):
+        rows = db.fetch_all(f"SELECT id, name FROM {table}")
+        db.execute_many(f"UPDATE {table} SET name_key = ? WHERE id = ?",
+                        [(name_key(row['name']), row['id']) for row in rows])
+
+    db.execute_query("CREATE INDEX idx_categories_name_key ON categories(name_key)")
+    # Заменяет idx_subcategories_category: поиск подкатегории по имени внутри категории
+    db.execute_query("CREATE INDEX idx_subcategories_category_name_key ON subcategories(category_id, name_key)")
+    db.execute_query("DROP INDEX IF EXISTS idx_subcategories_category")
+    db.execute_query("ANALYZE")
+
+
+def migration_007_search_index(db: DatabaseManager):
+    """Полнотекстовый индекс FTS5 по описаниям операций и названиям категорий"""
+    SearchIndex(db).create_schema()
+
+
+def migration_008_change_log(db: DatabaseManager):
+    """Журнал изменений операций для инкрементального обновления аналитики"""
+    ChangeLog(db).create_schema()
+
+
+def migration_009_budgets(db: DatabaseManager):
+    """Бюджеты: лимит расходов категории или подкатегории на месяц"""
+    db.execute_query("""
+                     CREATE TABLE budgets
+                     (
+                         id             INTEGER PRIMARY KEY,
+                         uuid           TEXT    NOT NULL UNIQUE,
+                         category_id    INTEGER NOT NULL,
+                         subcategory_id INTEGER,
+                         month          TEXT    NOT NULL,
+                         limit_cents    INTEGER NOT NULL CHECK (limit_cents > 0),
+                         FOREIGN KEY (category_id) REFERENCES categories (id) ON DELETE CASCADE,
+                         FOREIGN KEY (subcategory_id) REFERENCES subcategories (id) ON DELETE CASCADE
+                     )
+                     """)
+    # Проверка при вводе операции: бюджеты ее месяца и категории
+    db.execute_query("CREATE INDEX idx_budgets_key ON budgets(month, category_id, subcategory_id)")
+    # Внешние ключи: удаление категорий и подкатегорий
+    db.execute_query("CREATE INDEX idx_budgets_category ON budgets(category_id)")
+    db.execute_query("CREATE INDEX idx_budgets_subcategory ON budgets(subcategory_id)")
+
+
+def migration_010_recurring_operations(db: DatabaseManager):
+    """Шаблоны регулярных операций и ссылка операции на шаблон"""
+    db.execute_query("""
+                     CREATE TABLE recurring_operations
+                     (
+                         id             INTEGER PRIMARY KEY,
+                         uuid           TEXT    NOT NULL UNIQUE,
+                         type           TEXT    NOT NULL CHECK (type IN ('income', 'expense')),
+                         category_id    INTEGER NOT NULL,
+                         subcategory_id INTEGER,
+                         amount_cents   INTEGER NOT NULL,
+                         description    TEXT,
+                         rule           TEXT    NOT NULL,
+                         start_date     TEXT    NOT NULL,
+                         end_date       TEXT,
+                         last_run       TEXT,
+                         FOREIGN KEY (category_id) REFERENCES categories (id) ON DELETE CASCADE,
+                         FOREIGN KEY (subcategory_id) REFERENCES subcategories (id) ON DELETE SET NULL
+                     )
+                     """)
+    db.execute_query("CREATE INDEX idx_recurring_operations_category ON recurring_operations(category_id)")
+    db.execute_query("CREATE INDEX idx_recurring_operations_subcategory ON recurring_operations(subcategory_id)")
+
+    db.execute_query("""
+                     ALTER TABLE operations
+                         ADD COLUMN recurring_id INTEGER REFERENCES recurring_operations (id) ON DELETE SET NULL
+                     """)
+    # Одна операция шаблона на дату: повторное проведение отбрасывается INSERT OR IGNORE
+    db.execute_query("""
+                     CREATE UNIQUE INDEX idx_operations_recurring ON operations(recurring_id, date)
+                         WHERE recurring_id IS NOT NULL
+                     """)
+
+
+def migration_011_month_column(db: DatabaseManager):
+    """Даты операций в формате ГГГГ-ММ-ДД, генерируемая колонка month с индексом"""
+    # Время в дате ломает сравнение диапазонов ('2024-01-31 10:00' > '2024-01-31'): оставляем только дату
+    db.execute_query("""
+                     UPDATE operations
+                     SET date = date(date)
+                     WHERE date IS NOT date(date)
+                       AND date(date) IS NOT NULL
+                     """)
+    # Новые даты принимаются только в формате ГГГГ-ММ-ДД
+    db.execute_query("""
+                     CREATE TRIGGER trg_operations_date_insert
+                         BEFORE INSERT ON operations
+                         WHEN NEW.date IS NOT date(NEW.date)
+                     BEGIN
+                         SELECT RAISE(ABORT, 'Дата операции должна быть в формате ГГГГ-ММ-ДД');
+                     END
+                     """)
+    db.execute_query("""
+                     CREATE TRIGGER trg_operations_date_update
+                         BEFORE UPDATE OF date ON operations
+                         WHEN NEW.date IS NOT date(NEW.date)
+                     BEGIN
+                         SELECT RAISE(ABORT, 'Дата операции должна быть в формате ГГГГ-ММ-ДД');
+                     END
+                     """)
+
+    # Выборка за месяц - поиск по индексу idx_operations_month вместо сравнения строк
+    db.execute_query("""
+                     ALTER TABLE operations
+                         ADD COLUMN month TEXT GENERATED ALWAYS AS (substr(date, 1, 7)) VIRTUAL
+                     """)
+    db.execute_query("CREATE INDEX idx_operations_month ON operations(month)")
+    db.execute_query("ANALYZE")
+
+
+# Список миграций по порядку: (версия, описание, функция)
+MIGRATIONS: List[Tuple[int, str, Callable[[DatabaseManager], None]]] = [
+    (1, "Базовая схема", migration_001_base_schema),
+    (2, "Таблица агрегатов operations_rollup", migration_002_rollups),
+    (3, "Индексы по внешним ключам операций", migration_003_foreign_key_indexes),
+    (4, "Суммы операций в копейках", migration_004_amount_cents),
+    (5, "Целочисленные ключи вместо UUID", migration_005_integer_keys),
+    (6, "Поиск категорий и подкатегорий по имени", migration_006_name_keys),
+    (7, "Полнотекстовый поиск операций", migration_007_search_index),
+    (8, "Журнал изменений операций", migration_008_change_log),
+    (9, "Бюджеты по категориям", migration_009_budgets),
+    (10, "Регулярные операции", migration_010_recurring_operations),
+    (11, "Нормализованные даты и колонка месяца", migration_011_month_column),
+]
+
+
+def get_schema_version(db: DatabaseManager) -> int:
+    """Текущая версия схемы (PRAGMA user_version)"""
+    return db.fetch_one("PRAGMA user_version")[0]
+
+
+def migrate(db: DatabaseManager, verbose: bool = True) -> int:
+    """Применение всех недостающих миграций, возвращает итоговую версию схемы"""
+    version = get_schema_version(db)
+    # Перестройка таблиц требует отключенных внешних ключей (PRAGMA действует только вне транзакции)
+    with db.pool.write_connection() as conn:
+        foreign_keys = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+        conn.execute("PRAGMA foreign_keys = OFF")
+        try:
+            for target, description, apply in MIGRATIONS:
+                if target <= version:
+                    continue
+                # Каждая миграция и отметка версии - одна транзакция
+                with db.transaction():
+                    apply(db)
+                    db.execute_query(f"PRAGMA user_version = {target}")
+                version = target
+                if verbose:
+                    print(f"✅ Миграция {target}: {description}")
+        finally:
+            conn.execute(f"PRAGMA foreign_keys = {foreign_keys}")
+    return version
+
+
+def main():
+    """Точка входа: применение миграций схемы"""
+    parser = argparse.ArgumentParser(description="Миграции схемы базы данных")
+    parser.add_argument("--db", default="finance.db", help="Путь к базе данных")
+    parser.add_argument("--status", action="store_true", help="Только показать версию схемы")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    db.connect()
+    try:
+        version = get_schema_version(db)
+        latest = MIGRATIONS[-1][0]
+        if args.status:
+            print(f"ℹ️  Версия схемы: {version}, последняя доступная: {latest}")
+            return
+        if version >= latest:
+            print(f"ℹ️  Схема актуальна (версия {version})")
+            return
+        migrate(db)
+    finally:
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    main()
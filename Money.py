@@ -0,0 +1,16 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Union
+
+
+# Суммы хранятся в базе целым числом копеек; в Decimal переводятся только для вывода
+CENT = Decimal('0.01')
+
+
+def to_cents(amount: Union[int, float, str, Decimal]) -> int:
+    """Перевод суммы в рублях в целое число копеек с округлением до копейки"""
+    return int((Decimal(str(amount)).quantize(CENT, rounding=ROUND_HALF_UP) * 100))
+
+
+def from_cents(cents: int) -> Decimal:
+    """Перевод целого числа копеек в сумму Decimal с двумя знаками"""
+    return Decimal(cents or 0).scaleb(-2)
@@ -1,118 +1,296 @@
 import sqlite3
 import uuid
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from typing import Optional, List, Dict, Any, Union, Tuple, Iterator, Iterable
+from datetime import date
+from decimal import Decimal
+from Budget import Budget
+from Category import Category
 from ConsoleFormatter import ConsoleFormatter
 from DatabaseManager import DatabaseManager
+from Money import to_cents
+from Records import OperationRecord
+from SearchIndex import fts_query
+from Statements import register_statement
+from Subcategory import Subcategory
 
 
 class Operation:
     """Класс для работы с финансовыми операциями"""
 
+    SELECT_QUERY = """
+                   SELECT o.id AS key, o.uuid AS id, o.type, c.uuid AS category_id, c.name as category_name,
+                          s.uuid AS subcategory_id, s.name as subcategory_name,
+                          o.amount_cents, o.date, o.description
+                   FROM operations o
+                   JOIN categories c ON o.category_id = c.id
+                   LEFT JOIN subcategories s ON o.subcategory_id = s.id
+                   """
+
+    # Именованные запросы реестра DatabaseManager
+    INSERT = register_statement('operations.insert', """
+        INSERT INTO operations (uuid, type, category_id, subcategory_id, amount_cents, date, description)
+        VALUES (?, ?,
+                (SELECT id FROM categories WHERE uuid = ?),
+                (SELECT id FROM subcategories WHERE uuid = ?),
+                ?, ?, ?)
+        """)
+    BY_UUID = register_statement('operations.by_uuid', SELECT_QUERY + " WHERE o.uuid = ?")
+    UPDATE = register_statement('operations.update', """
+        UPDATE operations
+        SET amount_cents   = ?,
+            date           = ?,
+            description    = ?,
+            category_id    = (SELECT id FROM categories WHERE uuid = ?),
+            subcategory_id = (SELECT id FROM subcategories WHERE uuid = ?)
+        WHERE uuid = ?
+        """)
+    DELETE = register_statement('operations.delete', "DELETE FROM operations WHERE uuid = ?")
+    SEARCH_BOUND = register_statement('operations.search_bound', """
+        SELECT rowid
+        FROM operations_fts
+        WHERE operations_fts MATCH ?
+        ORDER BY rowid DESC
+        LIMIT 1 OFFSET ?
+        """)
+
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
         self.formatter = ConsoleFormatter()
+        self.budget_manager = Budget(db_manager)
+        self.category_manager = Category(db_manager)
+        self.subcategory_manager = Subcategory(db_manager)
 
     @staticmethod
     def validate_date(date_str: str) -> bool:
-        """Проверка корректности даты в формате ГГГГ-ММ-ДД"""
+        """Проверка корректности даты строго в формате ГГГГ-ММ-ДД (как триггер trg_operations_date_*)"""
         try:
-            datetime.strptime(date_str, "%Y-%m-%d")
-            return True
-        except ValueError:
+            # strptime принимает и '2024-1-6', а триггер такую дату отклоняет
+            return date.fromisoformat(date_str).isoformat() == date_str
+        except (TypeError, ValueError):
             return False
 
+    def resolve_references(self, type_: str, category_id: str,
+                           subcategory_id: Optional[str]) -> Optional[Tuple[str, Optional[str]]]:
+        """Полные UUID категории и подкатегории операции; None с сообщением, если ссылка неверна.
+
+        Подзапросы INSERT / UPDATE превращают неизвестный UUID в NULL, поэтому ссылки проверяются заранее.
+        """
+        category = self.category_manager.resolve_category(category_id)
+        if not category:
+            self.formatter.print_error(f"Категория '{category_id}' не найдена!")
+            return None
+        if category['type'] != type_:
+            self.formatter.print_error(f"Категория '{category['name']}' не подходит для операции типа '{type_}'!")
+            return None
+        if not subcategory_id:
+            return category['id'], None
+
+        subcategory = self.subcategory_manager.resolve_subcategory(subcategory_id)
+        if not subcategory:
+            self.formatter.print_error(f"Подкатегория '{subcategory_id}' не найдена!")
+            return None
+        if subcategory['category_id'] != category['id']:
+            self.formatter.print_error(f"Подкатегория '{subcategory['name']}' не относится "
+                                       f"к категории '{category['name']}'!")
+            return None
+        return category['id'], subcategory['id']
+
     def create_operation(self, type_: str, category_id: str, subcategory_id: Optional[str],
-                         amount: float, date: str, description: Optional[str]):
+                         amount: Union[float, Decimal], date: str, description: Optional[str]):
         """Создание новой операции"""
+        if not self.validate_date(date):
+            self.formatter.print_error(f"Неверная дата '{date}', ожидается ГГГГ-ММ-ДД")
+            return None
+        references = self.resolve_references(type_, category_id, subcategory_id)
+        if references is None:
+            return None
+        category_id, subcategory_id = references
         try:
             op_id = str(uuid.uuid4())
-            query = """
-                    INSERT INTO operations (id, type, category_id, subcategory_id, amount, date, description)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """
-            self.db.execute_query(query, (op_id, type_, category_id, subcategory_id, amount, date, description))
+            self.db.execute_query(self.INSERT, (op_id, type_, category_id, subcategory_id, to_cents(amount),
+                                          date, description))
             self.formatter.print_success(f"Операция создана успешно! ID: {op_id}")
+            # Потраченное по бюджету уже обновлено триггером operations_rollup
+            self.budget_manager.warn_operation(op_id)
             return op_id
         except sqlite3.Error as e:
             self.formatter.print_error(f"Ошибка при создании операции: {e}")
             return None
 
+    # Сколько последних совпадений полнотекстового поиска ранжируется в первую очередь
+    SEARCH_WINDOW = 5000
+
+    @staticmethod
+    def _build_filters(start_date: Optional[str], end_date: Optional[str],
+                       type_: Optional[str]) -> Tuple[List[str], List[Any]]:
+        """Условия WHERE и параметры для фильтрации по дате и типу"""
+        params = []
+        filters = []
+
+        if type_:
+            filters.append("o.type = ?")
+            params.append(type_)
+
+        if start_date:
+            filters.append("o.date >= ?")
+            params.append(start_date)
+        if end_date:
+            filters.append("o.date <= ?")
+            params.append(end_date)
+
+        return filters, params
+
     def get_all_operations(self, start_date: Optional[str] = None,
                            end_date: Optional[str] = None,
-                           type_: Optional[str] = None) -> List[Dict[str, Any]]:
+                           type_: Optional[str] = None) -> List[OperationRecord]:
         """Получение всех операций с фильтрацией по дате и типу"""
         try:
-            query = """
-                    SELECT o.*, c.name as category_name, s.name as subcategory_name
-                    FROM operations o
-                    JOIN categories c ON o.category_id = c.id
-                    LEFT JOIN subcategories s ON o.subcategory_id = s.id
-                    """
-            params = []
-            filters = []
-
-            if type_:
-                filters.append("o.type = ?")
-                params.append(type_)
-
-            if start_date:
-                filters.append("o.date >= ?")
-                params.append(start_date)
-            if end_date:
-                filters.append("o.date <= ?")
-                params.append(end_date)
+            query = self.SELECT_QUERY
+            filters, params = self._build_filters(start_date, end_date, type_)
 
             if filters:
                 query += " WHERE " + " AND ".join(filters)
 
-            query += " ORDER BY o.date DESC"
+            query += " ORDER BY o.date DESC, o.id DESC"
+
+            # Строки сразу собираются в компактные записи, без промежуточных sqlite3.Row и словарей
+            return self.db.fetch_all(query, tuple(params), record=OperationRecord)
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при получении операций: {e}")
+            return []
+
+    def get_operations_page(self, start_date: Optional[str] = None,
+                            end_date: Optional[str] = None,
+                            type_: Optional[str] = None,
+                            page_size: int = 20,
+                            after: Optional[Tuple[str, int]] = None,
+                            before: Optional[Tuple[str, int]] = None) -> List[OperationRecord]:
+        """Страница операций (от новых к старым) с пагинацией по ключу (date, key).
+
+        after - позиция последней строки текущей страницы (следующая страница),
+        before - позиция первой строки текущей страницы (предыдущая страница).
+        """
+        try:
+            query = self.SELECT_QUERY
+            filters, params = self._build_filters(start_date, end_date, type_)
+
+            # Сравнение пар (date, id) идет по индексу idx_operations_date без OFFSET
+            if after:
+                filters.append("(o.date, o.id) < (?, ?)")
+                params.extend(after)
+            elif before:
+                filters.append("(o.date, o.id) > (?, ?)")
+                params.extend(before)
 
-            rows = self.db.fetch_all(query, tuple(params))
+            if filters:
+                query += " WHERE " + " AND ".join(filters)
 
-            operations = []
-            for row in rows:
-                operations.append({
-                    'id': row['id'],
-                    'type': row['type'],
-                    'category_id': row['category_id'],
-                    'category_name': row['category_name'],
-                    'subcategory_id': row['subcategory_id'],
-                    'subcategory_name': row['subcategory_name'],
-                    'amount': row['amount'],
-                    'date': row['date'],
-                    'description': row['description']
-                })
+            if before and not after:
+                query += " ORDER BY o.date ASC, o.id ASC LIMIT ?"
+            else:
+                query += " ORDER BY o.date DESC, o.id DESC LIMIT ?"
+            params.append(page_size)
 
+            operations = self.db.fetch_all(query, tuple(params), record=OperationRecord)
+            if before and not after:
+                operations.reverse()
             return operations
         except sqlite3.Error as e:
             self.formatter.print_error(f"Ошибка при получении операций: {e}")
             return []
 
-    def get_operation_by_id(self, op_id: str) -> Optional[Dict[str, Any]]:
-        """Получение операции по ID"""
+    def iter_operations(self, start_date: Optional[str] = None,
+                        end_date: Optional[str] = None,
+                        type_: Optional[str] = None,
+                        page_size: int = 1000) -> Iterator[OperationRecord]:
+        """Потоковый обход операций страницами фиксированного размера"""
+        after = None
+        while True:
+            page = self.get_operations_page(start_date, end_date, type_, page_size, after=after)
+            yield from page
+            if len(page) < page_size:
+                return
+            after = (page[-1]['date'], page[-1]['key'])
+
+    def get_operations_summary(self, start_date: Optional[str] = None,
+                               end_date: Optional[str] = None,
+                               type_: Optional[str] = None) -> Dict[str, int]:
+        """Количество операций и суммы доходов/расходов (в копейках) с фильтрацией"""
         try:
+            filters, params = self._build_filters(start_date, end_date, type_)
             query = """
-                    SELECT o.*, c.name as category_name, s.name as subcategory_name
+                    SELECT COUNT(*)                                                        AS total_count,
+                           COALESCE(SUM(CASE WHEN o.type = 'income' THEN o.amount_cents END), 0)  AS income_cents,
+                           COALESCE(SUM(CASE WHEN o.type = 'expense' THEN o.amount_cents END), 0) AS expense_cents
                     FROM operations o
                     JOIN categories c ON o.category_id = c.id
-                    LEFT JOIN subcategories s ON o.subcategory_id = s.id
-                    WHERE o.id = ?
                     """
-            row = self.db.fetch_one(query, (op_id,))
-            if row:
-                return {
-                    'id': row['id'],
-                    'type': row['type'],
-                    'category_id': row['category_id'],
-                    'category_name': row['category_name'],
-                    'subcategory_id': row['subcategory_id'],
-                    'subcategory_name': row['subcategory_name'],
-                    'amount': row['amount'],
-                    'date': row['date'],
-                    'description': row['description']
-                }
-            return None
+            if filters:
+                query += " WHERE " + " AND ".join(filters)
+
+            row = self.db.fetch_one(query, tuple(params))
+            return {
+                'total_count': row['total_count'],
+                'income_cents': row['income_cents'],
+                'expense_cents': row['expense_cents']
+            }
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при расчете статистики операций: {e}")
+            return {'total_count': 0, 'income_cents': 0, 'expense_cents': 0}
+
+    def search_operations(self, text: str,
+                          start_date: Optional[str] = None,
+                          end_date: Optional[str] = None,
+                          type_: Optional[str] = None,
+                          limit: int = 50) -> List[OperationRecord]:
+        """Полнотекстовый поиск по описанию, категории и подкатегории (лучшие совпадения первыми)"""
+        match = fts_query(text)
+        if not match:
+            return []
+
+        try:
+            # Ранжирование bm25 считается для каждого совпадения, поэтому для частых слов
+            # ранжируются только SEARCH_WINDOW последних совпадений (граница по rowid индекса)
+            bound = self.db.fetch_one(self.SEARCH_BOUND, (match, self.SEARCH_WINDOW - 1))
+
+            operations = self._search_ranked(match, start_date, end_date, type_, limit, bound[0] if bound else None)
+            # Фильтры оставили в окне слишком мало строк - ранжируем все совпадения
+            if bound and len(operations) < limit:
+                operations = self._search_ranked(match, start_date, end_date, type_, limit)
+            return operations
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при поиске операций: {e}")
+            return []
+
+    def _search_ranked(self, match: str, start_date: Optional[str], end_date: Optional[str],
+                       type_: Optional[str], limit: int, min_rowid: Optional[int] = None) -> List[OperationRecord]:
+        """Совпадения FTS5 с фильтрами, отсортированные по bm25 (описание весит больше названий)"""
+        filters, params = self._build_filters(start_date, end_date, type_)
+        if min_rowid is not None:
+            filters.append("operations_fts.rowid >= ?")
+            params.append(min_rowid)
+
+        # CROSS JOIN закрепляет порядок: сначала индекс FTS5, затем операции по первичному ключу
+        query = """
+                SELECT o.id AS key, o.uuid AS id, o.type, c.uuid AS category_id, c.name as category_name,
+                       s.uuid AS subcategory_id, s.name as subcategory_name,
+                       o.amount_cents, o.date, o.description
+                FROM operations_fts
+                CROSS JOIN operations o ON o.id = operations_fts.rowid
+                JOIN categories c ON o.category_id = c.id
+                LEFT JOIN subcategories s ON o.subcategory_id = s.id
+                WHERE operations_fts MATCH ?
+                """
+        if filters:
+            query += " AND " + " AND ".join(filters)
+        query += " ORDER BY bm25(operations_fts, 4.0, 1.0, 2.0), o.date DESC LIMIT ?"
+
+        return self.db.fetch_all(query, (match, *params, limit), record=OperationRecord)
+
+    def get_operation_by_id(self, op_id: str) -> Optional[OperationRecord]:
+        """Получение операции по ID"""
+        try:
+            return self.db.fetch_one(self.BY_UUID, (op_id,), record=OperationRecord)
         except sqlite3.Error as e:
             self.formatter.print_error(f"Ошибка при получении операции: {e}")
             return None
@@ -155,15 +333,17 @@ class Operation:
         if subcategory_id == '':
             subcategory_id = None
 
+        # Сокращенные ID - в полные UUID; неизвестная ссылка не должна молча стать NULL
+        references = self.resolve_references(operation['type'], category_id, subcategory_id)
+        if references is None:
+            return False
+        category_id, subcategory_id = references
+
         # Обновляем запись
         try:
-            query = """
-                    UPDATE operations
-                    SET amount = ?, date = ?, description = ?, category_id = ?, subcategory_id = ?
-                    WHERE id = ?
-                    """
-            self.db.execute_query(query, (amount, date, description, category_id, subcategory_id, op_id))
+            self.db.execute_query(self.UPDATE, (to_cents(amount), date, description, category_id, subcategory_id, op_id))
             self.formatter.print_success("Операция успешно обновлена!")
+            self.budget_manager.warn_operation(op_id)
             return True
         except sqlite3.Error as e:
             self.formatter.print_error(f"Ошибка при обновлении операции: {e}")
@@ -181,32 +361,33 @@ class Operation:
             return False
 
         try:
-            self.db.execute_query("DELETE FROM operations WHERE id = ?", (op_id,))
+            self.db.execute_query(self.DELETE, (op_id,))
             self.formatter.print_success("Операция успешно удалена!")
             return True
         except sqlite3.Error as e:
             self.formatter.print_error(f"Ошибка при удалении операции: {e}")
             return False
 
-    def show_operations_table(self, operations: List[Dict[str, Any]], title: str, show_full_ids: bool = False):
-        """Отображение операций в виде таблицы"""
-        if not operations:
+    def show_operations_table(self, operations: Iterable[Dict[str, Any]], title: str, show_full_ids: bool = False):
+        """Отображение операций в виде таблицы (operations может быть генератором, например iter_operations)"""
+        if isinstance(operations, list) and not operations:
             self.formatter.print_info("Операции не найдены!")
             return
 
         headers = ["ID", "Дата", "Тип", "Сумма", "Категория", "Подкатегория", "Описание"]
-        rows = []
-
-        for op in operations:
-            display_id = op['id'] if show_full_ids else f"{op['id'][:8]}..."
-            rows.append([
-                display_id,
-                op['date'],
-                "📈 Доход" if op['type'] == 'income' else "📉 Расход",
-                f"{op['amount']:.2f}",
-                op['category_name'],
-                op['subcategory_name'] if op['subcategory_name'] else "-",
-                op['description'] if op['description'] else "-"
-            ])
-
+        rows = (self._format_table_row(op, show_full_ids) for op in operations)
         self.formatter.print_table(headers, rows, title, show_full_ids)
+
+    @staticmethod
+    def _format_table_row(op: Dict[str, Any], show_full_ids: bool) -> List[Any]:
+        """Строка таблицы для операции"""
+        display_id = op['id'] if show_full_ids else f"{op['id'][:8]}..."
+        return [
+            display_id,
+            op['date'],
+            "📈 Доход" if op['type'] == 'income' else "📉 Расход",
+            f"{op['amount']:.2f}",
+            op['category_name'],
+            op['subcategory_name'] if op['subcategory_name'] else "-",
+            op['description'] if op['description'] else "-"
+        ]
@@ -0,0 +1,217 @@
+import atexit
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Optional, List, Dict, Any, Tuple
+from ConsoleFormatter import ConsoleFormatter
+
+
+# Профилирование включается переменной окружения: значение - порог медленного запроса в мс
+PROFILE_ENV = 'FINANCE_DB_QUERY_PROFILE'
+# Файл JSON, куда при выходе сохраняется полная статистика
+OUTPUT_ENV = 'FINANCE_DB_QUERY_PROFILE_OUT'
+
+# Таблицы и их псевдонимы в запросе: FROM operations o, JOIN categories AS c
+TABLE_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+SQL_KEYWORDS = {'WHERE', 'JOIN', 'LEFT', 'INNER', 'CROSS', 'ON', 'USING', 'GROUP', 'ORDER', 'LIMIT',
+                'UNION', 'SET', 'NATURAL', 'INDEXED', 'NOT', 'HAVING', 'WINDOW', 'VALUES'}
+LIMIT_PATTERN = re.compile(r'\bLIMIT\b', re.IGNORECASE)
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+class QueryProfiler:
+    """Профилировщик SQL: время, число строк и место вызова каждого запроса, планы медленных запросов"""
+
+    # План есть только у запросов к данным (не у BEGIN / PRAGMA / CREATE)
+    EXPLAIN_PREFIXES = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+    # Кадры слоя доступа к базе пропускаются при поиске места вызова
+    SKIP_FILES = ('DatabaseManager.py', 'QueryProfiler.py', 'contextlib.py')
+
+    def __init__(self, threshold_ms: float = 50.0, output: Optional[str] = None, stack_depth: int = 3):
+        self.threshold = threshold_ms / 1000
+        self.output = output
+        self.stack_depth = stack_depth
+        self.formatter = ConsoleFormatter()
+        self.stats = {}
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Текст запроса одной строкой - ключ статистики"""
+        return " ".join(query.split())
+
+    def call_site(self) -> str:
+        """Цепочка вызовов вне слоя базы: 'Operation.py:120 get_all_operations < main.py:310 ...'"""
+        frame = sys._getframe(1)
+        sites = []
+        while frame is not None and len(sites) < self.stack_depth:
+            name = os.path.basename(frame.f_code.co_filename)
+            if name not in self.SKIP_FILES:
+                sites.append(f"{name}:{frame.f_lineno} {frame.f_code.co_name}")
+            frame = frame.f_back
+        return " < ".join(sites) or "?"
+
+    @staticmethod
+    def scanned_tables(query: str, plan: List[str], indexed: bool = False) -> List[str]:
+        """Таблицы, которые план читает просмотром (SCAN), с учетом псевдонимов.
+
+        indexed=False - просмотр самой таблицы; indexed=True - просмотр по индексу (SCAN ... USING INDEX).
+        Виртуальные таблицы (FTS5) не учитываются.
+        """
+        names = {}
+        for table, alias in TABLE_PATTERN.findall(query):
+            names[table] = table
+            if alias and alias.upper() not in SQL_KEYWORDS:
+                names[alias] = table
+        tables = []
+        for detail in plan:
+            match = re.match(r'\s*SCAN (\w+)(.*)', detail)
+            if not match or 'VIRTUAL TABLE' in match.group(2):
+                continue
+            uses_index = re.search(r'USING (COVERING )?INDEX', match.group(2)) is not None
+            if uses_index == indexed:
+                table = names.get(match.group(1), match.group(1))
+                if table not in tables:
+                    tables.append(table)
+        return tables
+
+    @classmethod
+    def classify_scans(cls, query: str, plan: List[str]) -> Tuple[List[str], List[str]]:
+        """Таблицы с полным просмотром и таблицы с просмотром по индексу, ограниченным LIMIT.
+
+        Просмотр по индексу без LIMIT проходит весь индекс и читает каждую строку таблицы,
+        поэтому он считается полным; под LIMIT читается только начало индекса.
+        """
+        scans = cls.scanned_tables(query, plan)
+        index_scans = cls.scanned_tables(query, plan, indexed=True)
+        if LIMIT_PATTERN.search(query):
+            return scans, index_scans
+        return scans + [table for table in index_scans if table not in scans], []
+
+    @staticmethod
+    def explain(conn: sqlite3.Connection, query: str, params) -> List[str]:
+        """EXPLAIN QUERY PLAN: шаги плана с отступом по вложенности"""
+        depth = {0: -1}
+        plan = []
+        for node_id, parent, _, detail in conn.execute("EXPLAIN QUERY PLAN " + query, params).fetchall():
+            depth[node_id] = depth.get(parent, -1) + 1
+            plan.append("  " * depth[node_id] + detail)
+        return plan
+
+    def record(self, conn: sqlite3.Connection, query: str, params, seconds: float, rows: int):
+        """Учет выполненного запроса; для медленного запроса план снимается один раз"""
+        sql = self.normalize(query)
+        site = self.call_site()
+        with self.lock:
+            stat = self.stats.get(sql)
+            if stat is None:
+                stat = self.stats[sql] = {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'rows': 0,
+                                          'slow_calls': 0, 'sites': {}, 'plan': None, 'scans': [],
+                                          'index_scans': []}
+            stat['calls'] += 1
+            stat['seconds'] += seconds
+            stat['max_seconds'] = max(stat['max_seconds'], seconds)
+            stat['rows'] += max(rows, 0)
+            stat['sites'][site] = stat['sites'].get(site, 0) + 1
+            slow = seconds >= self.threshold
+            if slow:
+                stat['slow_calls'] += 1
+            need_plan = slow and stat['plan'] is None and sql.upper().startswith(self.EXPLAIN_PREFIXES)
+            if need_plan:
+                # Метка до EXPLAIN: другие потоки не снимают тот же план параллельно
+                stat['plan'] = []
+
+        if need_plan and params is not None:
+            try:
+                plan = self.explain(conn, query, params)
+            except sqlite3.Error as e:
+                plan = [f"(план недоступен: {e})"]
+            with self.lock:
+                stat['plan'] = plan
+                stat['scans'], stat['index_scans'] = self.classify_scans(sql, plan)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Статистика по запросам, от самых затратных по суммарному времени"""
+        with self.lock:
+            items = [dict(stat, sql=sql, sites=dict(stat['sites'])) for sql, stat in self.stats.items()]
+        return sorted(items, key=lambda item: item['seconds'], reverse=True)
+
+    def dump(self, path: str):
+        """Сохранение статистики в JSON"""
+        data = {
+            'threshold_ms': self.threshold * 1000,
+            'elapsed_seconds': time.perf_counter() - self.started,
+            'statements': self.summary()
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def report(self, limit: int = 20, table: str = 'operations'):
+        """Вывод сводки: самые затратные запросы и места вызова с полным просмотром таблицы"""
+        statements = self.summary()
+        if not statements:
+            return
+
+        rows = []
+        for stat in statements[:limit]:
+            site = max(stat['sites'], key=stat['sites'].get)
+            rows.append([
+                stat['calls'],
+                f"{stat['seconds'] * 1000:.1f}",
+                f"{stat['max_seconds'] * 1000:.1f}",
+                stat['rows'],
+                ", ".join(stat['scans']) or "-",
+                ", ".join(stat['index_scans']) or "-",
+                stat['sql'],
+                site
+            ])
+        self.formatter.print_table(["Вызовов", "Всего, мс", "Макс, мс", "Строк", "SCAN", "SCAN по индексу + LIMIT",
+                                    "Запрос", "Место вызова"], rows, "Профиль SQL-запросов")
+
+        full_scans = [stat for stat in statements if table in stat['scans']]
+        if not full_scans:
+            self.formatter.print_info(f"Медленных запросов с полным просмотром {table} нет "
+                                      f"(порог {self.threshold * 1000:.0f} мс)")
+            return
+        self.formatter.print_warning(f"Полный просмотр {table} (порог {self.threshold * 1000:.0f} мс):")
+        for stat in full_scans:
+            print(f"\n  {stat['sql'][:200]}")
+            print(f"  вызовов: {stat['calls']}, всего {stat['seconds'] * 1000:.1f} мс")
+            for line in stat['plan']:
+                print(f"    {line}")
+            for site, calls in sorted(stat['sites'].items(), key=lambda item: item[1], reverse=True):
+                print(f"    <- {site} ({calls})")
+
+    def finish(self):
+        """Итог при выходе из программы: сводка в консоль и JSON, если задан файл"""
+        self.report()
+        if self.output:
+            try:
+                self.dump(self.output)
+                self.formatter.print_info(f"Профиль SQL-запросов сохранен в {self.output}")
+            except OSError as e:
+                self.formatter.print_error(f"Ошибка при сохранении профиля запросов: {e}")
+
+
+def profiler_from_environment() -> Optional[QueryProfiler]:
+    """Общий профилировщик процесса, если задана переменная FINANCE_DB_QUERY_PROFILE (порог в мс)"""
+    global _shared
+    value = os.environ.get(PROFILE_ENV)
+    if not value:
+        return None
+    with _shared_lock:
+        if _shared is None:
+            try:
+                threshold = float(value)
+            except ValueError:
+                raise ValueError(f"{PROFILE_ENV} должна быть порогом медленного запроса в мс, получено '{value}'")
+            _shared = QueryProfiler(threshold, os.environ.get(OUTPUT_ENV))
+            atexit.register(_shared.finish)
+        return _shared
@@ -0,0 +1,85 @@
+from collections import namedtuple
+from typing import Any, Tuple
+from Money import from_cents
+
+
+def record_type(name: str, fields: Tuple[str, ...]):
+    """Тип записи: namedtuple с доступом по имени поля как у словаря (record['name'])"""
+    base = namedtuple(name + 'Base', fields)
+
+    class Record(base):
+        __slots__ = ()
+
+        def __getitem__(self, key):
+            if isinstance(key, str):
+                # Только поля записи: имена методов кортежа (count, index) - не ключи
+                if key not in self.keys():
+                    raise KeyError(key)
+                return getattr(self, key)
+            return tuple.__getitem__(self, key)
+
+        def __contains__(self, key) -> bool:
+            return key in self.keys()
+
+        def get(self, key: str, default: Any = None) -> Any:
+            return getattr(self, key) if key in self.keys() else default
+
+        def keys(self) -> Tuple[str, ...]:
+            return self._fields
+
+        def values(self) -> list:
+            return [self[key] for key in self.keys()]
+
+        def items(self) -> list:
+            return [(key, self[key]) for key in self.keys()]
+
+        def to_dict(self) -> dict:
+            return dict(self.items())
+
+        @classmethod
+        def row_factory(cls):
+            """row_factory для нового курсора: строка сразу собирается в запись (порядок колонок = fields)"""
+            new = tuple.__new__
+            return lambda cursor, row: new(cls, row)
+
+    Record.__name__ = Record.__qualname__ = name
+    return Record
+
+
+# Порядок полей совпадает с порядком колонок запросов менеджеров
+CategoryRecord = record_type('CategoryRecord', ('id', 'name', 'type'))
+SubcategoryRecord = record_type('SubcategoryRecord', ('id', 'category_id', 'name', 'category_name'))
+_OperationBase = record_type('OperationRecord', ('key', 'id', 'type', 'category_id', 'category_name',
+                                                 'subcategory_id', 'subcategory_name', 'amount_cents',
+                                                 'date', 'description'))
+
+
+class OperationRecord(_OperationBase):
+    """Операция; сумма в рублях (amount) вычисляется из копеек при обращении"""
+    __slots__ = ()
+
+    @property
+    def amount(self):
+        return from_cents(self.amount_cents)
+
+    @classmethod
+    def row_factory(cls):
+        """row_factory для нового курсора: тип, категории и даты повторяются из строки в строку,
+        поэтому одинаковые значения хранятся одним объектом (кэш живет, пока жив курсор)"""
+        new = tuple.__new__
+        shared = {}
+        get = shared.setdefault
+
+        def factory(cursor, row):
+            key, id_, type_, category_id, category_name, subcategory_id, subcategory_name, amount_cents, date, \
+                description = row
+            return new(cls, (key, id_, get(type_, type_), get(category_id, category_id),
+                             get(category_name, category_name), get(subcategory_id, subcategory_id),
+                             get(subcategory_name, subcategory_name), amount_cents, get(date, date), description))
+        return factory
+
+    def keys(self) -> Tuple[str, ...]:
+        return OPERATION_KEYS
+
+
+OPERATION_KEYS = OperationRecord._fields[:8] + ('amount',) + OperationRecord._fields[8:]
@@ -0,0 +1,254 @@
+import sqlite3
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Optional, List, Dict, Any, Set, Union
+from decimal import Decimal
+from ConsoleFormatter import ConsoleFormatter
+from DatabaseManager import DatabaseManager
+from Lookup import find_uuid_by_prefix
+from Money import to_cents, from_cents
+from Operation import Operation
+
+
+class RecurrenceRule:
+    """Правило повторения в стиле cron из трех полей: 'день месяц день_недели'.
+
+    Поле - '*', число, список '1,15', диапазон '1-5' или шаг '*/2', '1-15/7'.
+    День месяца 'L' - последний день месяца. Дни недели: 1 - понедельник ... 7 - воскресенье (0 тоже воскресенье).
+    Как в cron, если заданы и день месяца, и день недели, подходит любой из них.
+    Примеры: '1 * *' - 1-го числа каждого месяца, '* * 1' - по понедельникам, 'L 3,6,9,12 *' - конец квартала.
+    """
+
+    FIELDS = [('день месяца', 1, 31), ('месяц', 1, 12), ('день недели', 0, 7)]
+
+    def __init__(self, text: str):
+        parts = text.split()
+        if len(parts) != 3:
+            raise ValueError("правило должно состоять из трех полей: 'день месяц день_недели'")
+        self.text = " ".join(parts)
+        day_items = parts[0].split(',')
+        self.last_day = any(item.upper() == 'L' for item in day_items)
+        day_items = [item for item in day_items if item.upper() != 'L']
+        self.days = self._parse_field(",".join(day_items), *self.FIELDS[0]) if day_items else set()
+        self.months = self._parse_field(parts[1], *self.FIELDS[1])
+        # Воскресенье: 0 и 7 сводятся к isoweekday() == 7
+        self.weekdays = {7 if value == 0 else value for value in self._parse_field(parts[2], *self.FIELDS[2])}
+        self.any_day = parts[0] == '*'
+        self.any_weekday = parts[2] == '*'
+
+    @staticmethod
+    def _parse_field(field: str, name: str, low: int, high: int) -> Set[int]:
+        """Множество значений поля cron"""
+        values = set()
+        for item in field.split(','):
+            step = 1
+            if '/' in item:
+                item, step_text = item.split('/', 1)
+                if not step_text.isdigit() or int(step_text) < 1:
+                    raise ValueError(f"неверный шаг в поле '{name}': '{step_text}'")
+                step = int(step_text)
+
+            if item == '*':
+                start, end = low, high
+            elif '-' in item:
+                start_text, end_text = item.split('-', 1)
+                if not (start_text.isdigit() and end_text.isdigit()):
+                    raise ValueError(f"неверный диапазон в поле '{name}': '{item}'")
+                start, end = int(start_text), int(end_text)
+            elif item.isdigit():
+                start = int(item)
+                end = high if step > 1 else start
+            else:
+                raise ValueError(f"неверное значение в поле '{name}': '{item}'")
+
+            if not low <= start <= end <= high:
+                raise ValueError(f"значение поля '{name}' вне диапазона {low}-{high}: '{item}'")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def matches(self, day: date) -> bool:
+        """Подходит ли дата под правило"""
+        if day.month not in self.months:
+            return False
+        day_match = day.day in self.days or (self.last_day and (day + timedelta(days=1)).day == 1)
+        weekday_match = day.isoweekday() in self.weekdays
+        if self.any_day:
+            return weekday_match
+        if self.any_weekday:
+            return day_match
+        return day_match or weekday_match
+
+    def occurrences(self, start: date, end: date) -> List[date]:
+        """Даты от start до end включительно, подходящие под правило"""
+        result = []
+        day = start
+        while day <= end:
+            if self.matches(day):
+                result.append(day)
+            day += timedelta(days=1)
+        return result
+
+    def next_occurrence(self, after: date, horizon_days: int = 366 * 4) -> Optional[date]:
+        """Ближайшая дата после after (в пределах horizon_days)"""
+        day = after + timedelta(days=1)
+        for _ in range(horizon_days):
+            if self.matches(day):
+                return day
+            day += timedelta(days=1)
+        return None
+
+
+class Recurring:
+    """Класс для работы с шаблонами регулярных операций и их проведения по расписанию"""
+
+    # Повторная вставка той же даты шаблона игнорируется уникальным индексом idx_operations_recurring
+    INSERT_QUERY = """
+                   INSERT OR IGNORE INTO operations (uuid, type, category_id, subcategory_id, amount_cents, date,
+                                                     description, recurring_id)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   """
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+        self.formatter = ConsoleFormatter()
+
+    def create_template(self, type_: str, category_id: str, subcategory_id: Optional[str],
+                        amount: Union[float, Decimal], rule: str, start_date: str,
+                        end_date: Optional[str] = None, description: Optional[str] = None) -> Optional[str]:
+        """Создание шаблона регулярной операции"""
+        try:
+            RecurrenceRule(rule)
+        except ValueError as e:
+            self.formatter.print_error(f"Неверное правило повторения: {e}")
+            return None
+        # Даты шаблона попадают в operations, где триггер принимает только ГГГГ-ММ-ДД
+        for value in (start_date, end_date):
+            if value is not None and not Operation.validate_date(value):
+                self.formatter.print_error(f"Неверная дата '{value}', ожидается ГГГГ-ММ-ДД")
+                return None
+
+        try:
+            template_id = str(uuid.uuid4())
+            query = """
+                    INSERT INTO recurring_operations (uuid, type, category_id, subcategory_id, amount_cents,
+                                                      description, rule, start_date, end_date)
+                    VALUES (?, ?,
+                            (SELECT id FROM categories WHERE uuid = ?),
+                            (SELECT id FROM subcategories WHERE uuid = ?),
+                            ?, ?, ?, ?, ?)
+                    """
+            self.db.execute_query(query, (template_id, type_, category_id, subcategory_id, to_cents(amount),
+                                          description, " ".join(rule.split()), start_date, end_date))
+            self.formatter.print_success(f"Регулярная операция создана успешно! ID: {template_id}")
+            return template_id
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при создании регулярной операции: {e}")
+            return None
+
+    def get_all_templates(self) -> List[Dict[str, Any]]:
+        """Все шаблоны регулярных операций"""
+        try:
+            query = """
+                    SELECT t.uuid AS id, t.type, c.name AS category_name, s.name AS subcategory_name,
+                           t.amount_cents, t.description, t.rule, t.start_date, t.end_date, t.last_run
+                    FROM recurring_operations t
+                    JOIN categories c ON t.category_id = c.id
+                    LEFT JOIN subcategories s ON t.subcategory_id = s.id
+                    ORDER BY t.id
+                    """
+            return [dict(row) for row in self.db.fetch_all(query)]
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при получении регулярных операций: {e}")
+            return []
+
+    def delete_template(self, template_id: str):
+        """Удаление шаблона; проведенные по нему операции остаются"""
+        try:
+            full_id = find_uuid_by_prefix(self.db, "recurring_operations", template_id)
+            if not full_id:
+                self.formatter.print_error(f"Регулярная операция '{template_id}' не найдена!")
+                return False
+
+            # Ссылки операций на шаблон обнуляются (ON DELETE SET NULL)
+            self.db.execute_query("DELETE FROM recurring_operations WHERE uuid = ?", (full_id,))
+            self.formatter.print_success("Регулярная операция удалена успешно!")
+            return True
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при удалении регулярной операции: {e}")
+            return False
+
+    def materialize(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """Проведение всех операций, наступивших с прошлого запуска, одной транзакцией.
+
+        Повторный запуск ничего не дублирует: last_run шаблона сдвигается вместе со вставкой,
+        а уникальный индекс (recurring_id, date) отбрасывает уже проведенные даты.
+        Возвращает статистику: created, templates, seconds.
+        """
+        started = time.perf_counter()
+        today = today or date.today()
+        created = 0
+        templates = 0
+
+        with self.db.transaction():
+            query = """
+                    SELECT id, type, category_id, subcategory_id, amount_cents, description,
+                           rule, start_date, end_date, last_run
+                    FROM recurring_operations
+                    WHERE (last_run IS NULL OR last_run < ?)
+                      AND start_date <= ?
+                    """
+            rows = []
+            due = []
+            for template in self.db.fetch_all(query, (today.isoformat(), today.isoformat())):
+                start = datetime.strptime(template['start_date'], "%Y-%m-%d").date()
+                if template['last_run']:
+                    start = max(start, datetime.strptime(template['last_run'], "%Y-%m-%d").date() + timedelta(days=1))
+                end = today
+                if template['end_date']:
+                    end = min(end, datetime.strptime(template['end_date'], "%Y-%m-%d").date())
+
+                rule = RecurrenceRule(template['rule'])
+                for day in rule.occurrences(start, end):
+                    rows.append((str(uuid.uuid4()), template['type'], template['category_id'],
+                                 template['subcategory_id'], template['amount_cents'], day.isoformat(),
+                                 template['description'], template['id']))
+                due.append((today.isoformat(), template['id']))
+
+            if rows:
+                # Пропущенные INSERT OR IGNORE строки и вставки триггеров в rowcount не входят
+                created = self.db.execute_many(self.INSERT_QUERY, rows).rowcount
+            if due:
+                self.db.execute_many("UPDATE recurring_operations SET last_run = ? WHERE id = ?", due)
+                templates = len(due)
+
+        return {'created': created, 'templates': templates, 'seconds': time.perf_counter() - started}
+
+    def show_templates_table(self, show_full_ids: bool = False):
+        """Отображение шаблонов регулярных операций в виде таблицы"""
+        templates = self.get_all_templates()
+
+        if not templates:
+            self.formatter.print_info("Регулярные операции не найдены!")
+            return
+
+        headers = ["ID", "Тип", "Категория", "Подкатегория", "Сумма", "Правило", "Следующая", "Описание"]
+        rows = []
+        today = date.today()
+        for template in templates:
+            next_day = RecurrenceRule(template['rule']).next_occurrence(
+                max(today, datetime.strptime(template['start_date'], "%Y-%m-%d").date() - timedelta(days=1)))
+            if next_day and template['end_date'] and next_day.isoformat() > template['end_date']:
+                next_day = None
+            rows.append([
+                template['id'] if show_full_ids else f"{template['id'][:8]}...",
+                "📈 Доход" if template['type'] == 'income' else "📉 Расход",
+                template['category_name'],
+                template['subcategory_name'] or "-",
+                f"{from_cents(template['amount_cents']):.2f}",
+                template['rule'],
+                next_day.isoformat() if next_day else "-",
+                template['description'] or "-"
+            ])
+
+        self.formatter.print_table(headers, rows, "Регулярные операции", show_full_ids)
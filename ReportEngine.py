@@ -0,0 +1,74 @@
+import sqlite3
+from typing import List, Dict, Any
+from ConsoleFormatter import ConsoleFormatter
+from DatabaseManager import DatabaseManager
+
+
+class ReportEngine:
+    """Класс для построения отчетов по таблице агрегатов operations_rollup"""
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+        self.formatter = ConsoleFormatter()
+
+    def get_totals(self) -> Dict[str, Any]:
+        """Общая статистика: количество операций и суммы по типам (в копейках)"""
+        try:
+            query = """
+                    SELECT COALESCE(SUM(r.operations_count), 0)                                      AS total_count,
+                           COALESCE(SUM(CASE WHEN r.type = 'income' THEN r.operations_count END), 0)  AS income_count,
+                           COALESCE(SUM(CASE WHEN r.type = 'expense' THEN r.operations_count END), 0) AS expense_count,
+                           COALESCE(SUM(CASE WHEN r.type = 'income' THEN r.total_cents END), 0)       AS total_income_cents,
+                           COALESCE(SUM(CASE WHEN r.type = 'expense' THEN r.total_cents END), 0)      AS total_expense_cents
+                    FROM operations_rollup r
+                    JOIN categories c ON r.category_id = c.id
+                    """
+            row = self.db.fetch_one(query)
+            return {
+                'total_count': row['total_count'],
+                'income_count': row['income_count'],
+                'expense_count': row['expense_count'],
+                'total_income_cents': row['total_income_cents'],
+                'total_expense_cents': row['total_expense_cents']
+            }
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при расчете общей статистики: {e}")
+            return {'total_count': 0, 'income_count': 0, 'expense_count': 0,
+                    'total_income_cents': 0, 'total_expense_cents': 0}
+
+    def get_totals_by_category(self, type_: str) -> List[Dict[str, Any]]:
+        """Суммы операций заданного типа по категориям (в копейках), по убыванию суммы"""
+        try:
+            query = """
+                    SELECT c.name AS category_name, SUM(r.total_cents) AS total_cents
+                    FROM operations_rollup r
+                    JOIN categories c ON r.category_id = c.id
+                    WHERE r.type = ?
+                    GROUP BY c.name
+                    ORDER BY total_cents DESC
+                    """
+            rows = self.db.fetch_all(query, (type_,))
+            return [{'category_name': row['category_name'], 'total_cents': row['total_cents']} for row in rows]
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при расчете статистики по категориям: {e}")
+            return []
+
+    def get_monthly_stats(self) -> List[Dict[str, Any]]:
+        """Доходы и расходы по месяцам (ГГГГ-ММ) в копейках, от новых к старым"""
+        try:
+            query = """
+                    SELECT r.month,
+                           COALESCE(SUM(CASE WHEN r.type = 'income' THEN r.total_cents END), 0)  AS income_cents,
+                           COALESCE(SUM(CASE WHEN r.type <> 'income' THEN r.total_cents END), 0) AS expense_cents
+                    FROM operations_rollup r
+                    JOIN categories c ON r.category_id = c.id
+                    GROUP BY r.month
+                    ORDER BY month DESC
+                    """
+            rows = self.db.fetch_all(query)
+            return [{'month': row['month'], 'income_cents': row['income_cents'],
+                     'expense_cents': row['expense_cents']}
+                    for row in rows]
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при расчете ежемесячной статистики: {e}")
+            return []
@@ -0,0 +1,208 @@
+import argparse
+import sqlite3
+from typing import List, Dict, Any
+from ConsoleFormatter import ConsoleFormatter
+from DatabaseManager import DatabaseManager
+from Money import from_cents
+
+
+# Текущая схема: суммы хранятся в копейках (целые числа)
+AMOUNT_COLUMN = 'amount_cents'
+TOTAL_COLUMN = 'total_cents'
+TOTAL_TYPE = 'INTEGER'
+# Ключи категорий - целочисленные rowid
+KEY_TYPE = 'INTEGER'
+
+ROLLUP_TRIGGERS = ['trg_operations_rollup_insert', 'trg_operations_rollup_delete', 'trg_operations_rollup_update']
+
+
+def _increment_sql(row: str, amount: str, total: str) -> str:
+    """Тело триггера: добавить операцию row (NEW/OLD) в агрегаты"""
+    return f"""
+            UPDATE operations_rollup
+            SET operations_count = operations_count + 1,
+                {total}          = {total} + {row}.{amount}
+            WHERE month = substr({row}.date, 1, 7)
+              AND type = {row}.type
+              AND category_id = {row}.category_id
+              AND subcategory_id IS {row}.subcategory_id;
+            INSERT INTO operations_rollup (month, type, category_id, subcategory_id, operations_count, {total})
+            SELECT substr({row}.date, 1, 7), {row}.type, {row}.category_id, {row}.subcategory_id, 1, {row}.{amount}
+            WHERE NOT EXISTS (SELECT 1
+                              FROM operations_rollup
+                              WHERE month = substr({row}.date, 1, 7)
+                                AND type = {row}.type
+                                AND category_id = {row}.category_id
+                                AND subcategory_id IS {row}.subcategory_id);
+            """
+
+
+def _decrement_sql(row: str, amount: str, total: str) -> str:
+    """Тело триггера: убрать операцию row (NEW/OLD) из агрегатов"""
+    return f"""
+            UPDATE operations_rollup
+            SET operations_count = operations_count - 1,
+                {total}          = {total} - {row}.{amount}
+            WHERE month = substr({row}.date, 1, 7)
+              AND type = {row}.type
+              AND category_id = {row}.category_id
+              AND subcategory_id IS {row}.subcategory_id;
+            DELETE FROM operations_rollup
+            WHERE operations_count <= 0
+              AND month = substr({row}.date, 1, 7)
+              AND type = {row}.type
+              AND category_id = {row}.category_id
+              AND subcategory_id IS {row}.subcategory_id;
+            """
+
+
+def rollup_schema_sql(amount: str = AMOUNT_COLUMN, total: str = TOTAL_COLUMN,
+                      total_type: str = TOTAL_TYPE, key_type: str = KEY_TYPE) -> List[str]:
+    """DDL таблицы агрегатов по ключу (месяц, тип, категория, подкатегория) и ее триггеров"""
+    # Параметры позволяют миграциям воспроизводить схему своей версии
+    return [
+        f"""
+        CREATE TABLE IF NOT EXISTS operations_rollup
+        (
+            month            TEXT    NOT NULL,
+            type             TEXT    NOT NULL,
+            category_id      {key_type} NOT NULL,
+            subcategory_id   {key_type},
+            operations_count INTEGER NOT NULL DEFAULT 0,
+            {total}          {total_type} NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_operations_rollup_key
+            ON operations_rollup (month, type, category_id, subcategory_id)
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_operations_rollup_insert
+            AFTER INSERT ON operations
+        BEGIN
+            {_increment_sql('NEW', amount, total)}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_operations_rollup_delete
+            AFTER DELETE ON operations
+        BEGIN
+            {_decrement_sql('OLD', amount, total)}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_operations_rollup_update
+            AFTER UPDATE OF type, category_id, subcategory_id, {amount}, date ON operations
+        BEGIN
+            {_decrement_sql('OLD', amount, total)}
+            {_increment_sql('NEW', amount, total)}
+        END
+        """
+    ]
+
+
+class Rollup:
+    """Класс для обслуживания таблицы агрегатов operations_rollup"""
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+        self.formatter = ConsoleFormatter()
+
+    def create_schema(self, amount: str = AMOUNT_COLUMN, total: str = TOTAL_COLUMN,
+                      total_type: str = TOTAL_TYPE, key_type: str = KEY_TYPE):
+        """Создание таблицы агрегатов, индекса и триггеров"""
+        with self.db.transaction():
+            for statement in rollup_schema_sql(amount, total, total_type, key_type):
+                self.db.execute_query(statement)
+
+            # Для существующих баз агрегаты заполняются из операций один раз
+            rollup_rows = self.db.fetch_one("SELECT COUNT(*) FROM operations_rollup")[0]
+            operations = self.db.fetch_one("SELECT EXISTS (SELECT 1 FROM operations)")[0]
+            if not rollup_rows and operations:
+                self._fill(amount, total)
+
+    def drop_schema(self):
+        """Удаление таблицы агрегатов и триггеров (перед перестройкой таблицы operations)"""
+        with self.db.transaction():
+            for trigger in ROLLUP_TRIGGERS:
+                self.db.execute_query(f"DROP TRIGGER IF EXISTS {trigger}")
+            self.db.execute_query("DROP TABLE IF EXISTS operations_rollup")
+
+    def _fill(self, amount: str = AMOUNT_COLUMN, total: str = TOTAL_COLUMN):
+        """Заполнение пустой таблицы агрегатов по таблице operations"""
+        self.db.execute_query(f"""
+                              INSERT INTO operations_rollup
+                                  (month, type, category_id, subcategory_id, operations_count, {total})
+                              SELECT substr(date, 1, 7), type, category_id, subcategory_id, COUNT(*), SUM({amount})
+                              FROM operations
+                              GROUP BY substr(date, 1, 7), type, category_id, subcategory_id
+                              """)
+
+    def rebuild(self) -> bool:
+        """Полный пересчет агрегатов по таблице operations"""
+        try:
+            with self.db.transaction():
+                self.db.execute_query("DELETE FROM operations_rollup")
+                self._fill()
+            return True
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при пересчете агрегатов: {e}")
+            return False
+
+    def verify(self) -> List[Dict[str, Any]]:
+        """Сверка агрегатов с исходной таблицей, возвращает расхождения"""
+        query = """
+                WITH actual AS (SELECT substr(date, 1, 7) AS month, type, category_id, subcategory_id,
+                                       COUNT(*) AS operations_count, SUM(amount_cents) AS total_cents
+                                FROM operations
+                                GROUP BY 1, 2, 3, 4),
+                     stored AS (SELECT month, type, category_id, subcategory_id, operations_count, total_cents
+                                FROM operations_rollup)
+                SELECT 'missing' AS problem, * FROM (SELECT * FROM actual EXCEPT SELECT * FROM stored)
+                UNION ALL
+                SELECT 'stale' AS problem, * FROM (SELECT * FROM stored EXCEPT SELECT * FROM actual)
+                """
+        rows = self.db.fetch_all(query)
+        return [{
+            'problem': row['problem'],
+            'month': row['month'],
+            'type': row['type'],
+            'category_id': row['category_id'],
+            'subcategory_id': row['subcategory_id'],
+            'operations_count': row['operations_count'],
+            'total_cents': row['total_cents']
+        } for row in rows]
+
+
+def main():
+    """Точка входа: пересчет или сверка агрегатов"""
+    parser = argparse.ArgumentParser(description="Обслуживание агрегатов операций")
+    parser.add_argument("--db", default="finance.db", help="Путь к базе данных")
+    parser.add_argument("command", choices=["verify", "rebuild"], help="verify - сверка, rebuild - пересчет")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    db.connect()
+    try:
+        rollup = Rollup(db)
+        if args.command == "rebuild":
+            if rollup.rebuild():
+                rollup.formatter.print_success("Агрегаты пересчитаны")
+            return
+
+        problems = rollup.verify()
+        if not problems:
+            rollup.formatter.print_success("Агрегаты совпадают с таблицей операций")
+            return
+
+        headers = ["Проблема", "Месяц", "Тип", "Категория", "Подкатегория", "Кол-во", "Сумма"]
+        rows = [[p['problem'], p['month'], p['type'], p['category_id'], p['subcategory_id'] or "-",
+                 p['operations_count'], f"{from_cents(p['total_cents']):.2f}"] for p in problems]
+        rollup.formatter.print_table(headers, rows, "Расхождения агрегатов")
+        rollup.formatter.print_warning("Для исправления выполните: python Rollup.py rebuild")
+    finally:
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import argparse
+import sqlite3
+from typing import List
+from ConsoleFormatter import ConsoleFormatter
+from DatabaseManager import DatabaseManager
+
+
+SEARCH_TRIGGERS = [
+    'trg_operations_fts_insert', 'trg_operations_fts_delete', 'trg_operations_fts_update',
+    'trg_categories_fts_rename', 'trg_subcategories_fts_rename', 'trg_subcategories_fts_delete'
+]
+
+
+def _fold_sql(expr: str) -> str:
+    """Выражение SQL: ё -> е (remove_diacritics не сводит ё к е)"""
+    return f"replace(replace({expr}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def fold(text: str) -> str:
+    """Текст запроса с той же заменой ё -> е, что и в индексе"""
+    return text.replace('ё', 'е').replace('Ё', 'Е')
+
+
+def search_schema_sql() -> List[str]:
+    """DDL полнотекстового индекса operations_fts (rowid = operations.id) и его триггеров"""
+    description = _fold_sql('NEW.description')
+    category_name = _fold_sql('(SELECT name FROM categories WHERE id = NEW.category_id)')
+    subcategory_name = _fold_sql('(SELECT name FROM subcategories WHERE id = NEW.subcategory_id)')
+    return [
+        # unicode61 сворачивает регистр кириллицы; ё заменяется на е при записи в индекс
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS operations_fts USING fts5
+        (
+            description,
+            category_name,
+            subcategory_name,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_operations_fts_insert
+            AFTER INSERT ON operations
+        BEGIN
+            INSERT INTO operations_fts (rowid, description, category_name, subcategory_name)
+            VALUES (NEW.id, {description}, {category_name}, {subcategory_name});
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_operations_fts_delete
+            AFTER DELETE ON operations
+        BEGIN
+            DELETE FROM operations_fts WHERE rowid = OLD.id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_operations_fts_update
+            AFTER UPDATE OF description, category_id, subcategory_id ON operations
+        BEGIN
+            UPDATE operations_fts
+            SET description      = {description},
+                category_name    = {category_name},
+                subcategory_name = {subcategory_name}
+            WHERE rowid = NEW.id;
+        END
+        """,
+        # Переименование категории переписывает только ее операции (по idx_operations_category_date)
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_categories_fts_rename
+            AFTER UPDATE OF name ON categories
+        BEGIN
+            UPDATE operations_fts
+            SET category_name = {_fold_sql('NEW.name')}
+            WHERE rowid IN (SELECT id FROM operations WHERE category_id = NEW.id);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_subcategories_fts_rename
+            AFTER UPDATE OF name ON subcategories
+        BEGIN
+            UPDATE operations_fts
+            SET subcategory_name = {_fold_sql('NEW.name')}
+            WHERE rowid IN (SELECT id FROM operations WHERE subcategory_id = NEW.id);
+        END
+        """,
+        # При выключенных внешних ключах ON DELETE SET NULL не срабатывает - имя убирается здесь
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_subcategories_fts_delete
+            AFTER DELETE ON subcategories
+        BEGIN
+            UPDATE operations_fts
+            SET subcategory_name = NULL
+            WHERE rowid IN (SELECT id FROM operations WHERE subcategory_id = OLD.id);
+        END
+        """
+    ]
+
+
+def fts_query(text: str) -> str:
+    """Запрос FTS5 из пользовательского ввода: все слова обязательны, поиск по началу слова"""
+    # Каждое слово берется в кавычки, чтобы символы синтаксиса FTS5 не ломали запрос
+    terms = ['"' + term.replace('"', '""') + '"*' for term in fold(text).split()]
+    return " ".join(terms)
+
+
+class SearchIndex:
+    """Класс для обслуживания полнотекстового индекса операций operations_fts"""
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+        self.formatter = ConsoleFormatter()
+
+    def create_schema(self):
+        """Создание индекса и триггеров; для существующих операций индекс заполняется"""
+        with self.db.transaction():
+            for statement in search_schema_sql():
+                self.db.execute_query(statement)
+
+            indexed = self.db.fetch_one("SELECT EXISTS (SELECT 1 FROM operations_fts)")[0]
+            if not indexed:
+                self._fill()
+
+    def drop_schema(self):
+        """Удаление индекса и триггеров (перед перестройкой таблицы operations)"""
+        with self.db.transaction():
+            for trigger in SEARCH_TRIGGERS:
+                self.db.execute_query(f"DROP TRIGGER IF EXISTS {trigger}")
+            self.db.execute_query("DROP TABLE IF EXISTS operations_fts")
+
+    def _fill(self):
+        """Заполнение индекса по таблице operations"""
+        self.db.execute_query(f"""
+                              INSERT INTO operations_fts (rowid, description, category_name, subcategory_name)
+                              SELECT o.id, {_fold_sql('o.description')}, {_fold_sql('c.name')}, {_fold_sql('s.name')}
+                              FROM operations o
+                              JOIN categories c ON o.category_id = c.id
+                              LEFT JOIN subcategories s ON o.subcategory_id = s.id
+                              """)
+
+    def rebuild(self) -> bool:
+        """Полная перестройка индекса и слияние его сегментов"""
+        try:
+            with self.db.transaction():
+                self.db.execute_query("DELETE FROM operations_fts")
+                self._fill()
+                self.db.execute_query("INSERT INTO operations_fts (operations_fts) VALUES ('optimize')")
+            return True
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при перестройке поискового индекса: {e}")
+            return False
+
+    def verify(self) -> int:
+        """Количество операций, строка индекса которых отсутствует или устарела"""
+        query = f"""
+                SELECT COUNT(*)
+                FROM operations o
+                JOIN categories c ON o.category_id = c.id
+                LEFT JOIN subcategories s ON o.subcategory_id = s.id
+                LEFT JOIN operations_fts f ON f.rowid = o.id
+                WHERE f.rowid IS NULL
+                   OR f.description IS NOT {_fold_sql('o.description')}
+                   OR f.category_name IS NOT {_fold_sql('c.name')}
+                   OR f.subcategory_name IS NOT {_fold_sql('s.name')}
+                """
+        stale = self.db.fetch_one(query)[0]
+        orphaned = self.db.fetch_one("""
+                                     SELECT COUNT(*)
+                                     FROM operations_fts f
+                                     WHERE NOT EXISTS (SELECT 1 FROM operations o WHERE o.id = f.rowid)
+                                     """)[0]
+        return stale + orphaned
+
+
+def main():
+    """Точка входа: перестройка или сверка поискового индекса"""
+    parser = argparse.ArgumentParser(description="Обслуживание полнотекстового индекса операций")
+    parser.add_argument("--db", default="finance.db", help="Путь к базе данных")
+    parser.add_argument("command", choices=["verify", "rebuild"], help="verify - сверка, rebuild - перестройка")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    db.connect()
+    try:
+        index = SearchIndex(db)
+        if args.command == "rebuild":
+            if index.rebuild():
+                index.formatter.print_success("Поисковый индекс перестроен")
+            return
+
+        problems = index.verify()
+        if not problems:
+            index.formatter.print_success("Поисковый индекс совпадает с таблицей операций")
+            return
+        index.formatter.print_warning(f"Расхождений в поисковом индексе: {problems}. "
+                                      f"Для исправления выполните: python SearchIndex.py rebuild")
+    finally:
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    main()
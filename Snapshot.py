@@ -0,0 +1,223 @@
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import time
+from typing import Optional, List, Dict, Any, Tuple
+from ChangeLog import ChangeLog
+from ConsoleFormatter import ConsoleFormatter
+from DatabaseManager import DatabaseManager
+
+# pyarrow нужен только для снимка; без него приложение и анализ через SQL работают как раньше
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+# Колонки снимка; строки с повторяющимися значениями хранятся словарем (dictionary encoding)
+COLUMNS = ['key', 'id', 'type', 'amount_cents', 'date', 'description', 'category_name', 'category_type',
+           'subcategory_name']
+DICTIONARY_COLUMNS = ['type', 'category_name', 'category_type', 'subcategory_name']
+
+META_FILE = '_snapshot.json'
+
+
+def pyarrow_available() -> bool:
+    """Установлен ли pyarrow"""
+    return pa is not None
+
+
+class OperationSnapshot:
+    """Снимок операций в Parquet, разбитый по году и месяцу (year=YYYY/month=MM)"""
+
+    QUERY = """
+            SELECT o.id AS key,
+                   o.uuid AS id,
+                   o.type,
+                   o.amount_cents,
+                   o.date,
+                   o.description,
+                   c.name AS category_name,
+                   c.type AS category_type,
+                   s.name AS subcategory_name
+            FROM operations o
+                     LEFT JOIN categories c ON o.category_id = c.id
+                     LEFT JOIN subcategories s ON o.subcategory_id = s.id
+            """
+
+    def __init__(self, db_manager: DatabaseManager, path: str = 'finance_snapshot', chunk_size: int = 50000):
+        if not pyarrow_available():
+            raise ImportError("Для снимка Parquet установите pyarrow: pip install pyarrow")
+        self.db = db_manager
+        self.path = path
+        self.chunk_size = chunk_size
+        self.formatter = ConsoleFormatter()
+
+    def read_meta(self) -> Optional[Dict[str, Any]]:
+        """Состояние снимка: позиция журнала изменений, версия схемы, выгруженные месяцы"""
+        try:
+            with open(os.path.join(self.path, META_FILE), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta: Dict[str, Any]):
+        """Сохранение состояния снимка (после записи всех файлов)"""
+        tmp_path = os.path.join(self.path, META_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, os.path.join(self.path, META_FILE))
+
+    def _partition_dir(self, month: str) -> str:
+        """Каталог раздела месяца 'ГГГГ-ММ'"""
+        return os.path.join(self.path, f"year={month[:4]}", f"month={month[5:7]}")
+
+    def _write_partition(self, month: str, rows: List[tuple]):
+        """Запись раздела месяца одним файлом Parquet (файл раздела перезаписывается)"""
+        columns = list(zip(*rows))
+        arrays = []
+        for name, values in zip(COLUMNS, columns):
+            if name in ('key', 'amount_cents'):
+                array = pa.array(values, type=pa.int64())
+            else:
+                array = pa.array(values, type=pa.string())
+            if name in DICTIONARY_COLUMNS:
+                array = array.dictionary_encode()
+            arrays.append(array)
+
+        partition_dir = self._partition_dir(month)
+        os.makedirs(partition_dir, exist_ok=True)
+        pq.write_table(pa.Table.from_arrays(arrays, names=COLUMNS),
+                       os.path.join(partition_dir, 'part-0.parquet'), compression='zstd')
+
+    @staticmethod
+    def _next_month(month: str) -> str:
+        """Следующий месяц 'ГГГГ-ММ'"""
+        year, mon = int(month[:4]), int(month[5:7])
+        return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}"
+
+    def _export(self, query: str, params: tuple = ()) -> Tuple[int, List[str]]:
+        """Выгрузка строк запроса (по возрастанию даты) в разделы месяцев: (строк, месяцы)"""
+        # Строки идут по дате - раздел месяца записывается, как только начинается следующий
+        exported = 0
+        months = []
+        current_month = None
+        month_rows = []
+        with self.db.reader() as conn:
+            cursor = conn.execute(query, params)
+            while True:
+                chunk = cursor.fetchmany(self.chunk_size)
+                if not chunk:
+                    break
+                for row in chunk:
+                    month = row['date'][:7]
+                    if month != current_month:
+                        if month_rows:
+                            self._write_partition(current_month, month_rows)
+                            months.append(current_month)
+                        current_month = month
+                        month_rows = []
+                    month_rows.append(tuple(row))
+                exported += len(chunk)
+        if month_rows:
+            self._write_partition(current_month, month_rows)
+            months.append(current_month)
+        return exported, months
+
+    def refresh(self, full: bool = False) -> Dict[str, Any]:
+        """Обновление снимка: заново выгружаются только месяцы, затронутые изменениями.
+
+        Полная выгрузка - при full=True, смене версии схемы, переименовании категорий
+        или если журнал изменений уже очищен дальше сохраненной позиции.
+        Возвращает статистику: mode, rows, partitions, seconds.
+        """
+        started = time.perf_counter()
+        change_log = ChangeLog(self.db)
+        position = change_log.position()
+        schema_version = self.db.fetch_one("PRAGMA user_version")[0]
+
+        meta = None if full else self.read_meta()
+        if meta and (meta.get('schema_version') != schema_version
+                     or meta.get('names') != position['names']
+                     or not change_log.is_complete(meta.get('change_seq', 0))):
+            meta = None
+
+        if meta:
+            mode = 'incremental'
+            months = set(meta.get('months', []))
+            exported = 0
+            for month in change_log.changed_months(meta['change_seq'], meta['max_key']):
+                shutil.rmtree(self._partition_dir(month), ignore_errors=True)
+                months.discard(month)
+                rows, written = self._export(self.QUERY + " WHERE o.date >= ? AND o.date < ? ORDER BY o.date, o.id",
+                                             (f"{month}-01", f"{self._next_month(month)}-01"))
+                exported += rows
+                months.update(written)
+        else:
+            mode = 'full'
+            shutil.rmtree(self.path, ignore_errors=True)
+            os.makedirs(self.path, exist_ok=True)
+            exported, written = self._export(self.QUERY + " ORDER BY o.date, o.id")
+            months = set(written)
+
+        self._write_meta({
+            'schema_version': schema_version,
+            'change_seq': position['change_seq'],
+            'max_key': position['max_key'],
+            'names': position['names'],
+            'months': sorted(months),
+            'refreshed_at': time.strftime('%Y-%m-%d %H:%M:%S')
+        })
+        return {
+            'mode': mode,
+            'rows': exported,
+            'partitions': len(months),
+            'seconds': time.perf_counter() - started
+        }
+
+    def load(self, columns: Optional[List[str]] = None):
+        """Чтение снимка в DataFrame; колонки-словари становятся pandas category"""
+        if not os.path.exists(os.path.join(self.path, META_FILE)):
+            return None
+        # Каталоги year=/month= читаются как разделы, но в DataFrame не нужны
+        dataset = pq.ParquetDataset(self.path, partitioning='hive')
+        df = dataset.read(columns=columns or COLUMNS).to_pandas()
+        # Словари разных файлов объединяются в порядке появления; сортировка дает порядок как у строк
+        for name in DICTIONARY_COLUMNS:
+            if name in df.columns:
+                df[name] = df[name].cat.set_categories(sorted(df[name].cat.categories))
+        return df
+
+
+def main():
+    """Точка входа: выгрузка снимка операций в Parquet"""
+    parser = argparse.ArgumentParser(description="Снимок операций в Parquet (разделы по году и месяцу)")
+    parser.add_argument("--db", default="finance.db", help="Путь к базе данных")
+    parser.add_argument("--path", default="finance_snapshot", help="Каталог снимка")
+    parser.add_argument("--full", action="store_true", help="Полная выгрузка вместо инкрементальной")
+    args = parser.parse_args()
+
+    formatter = ConsoleFormatter()
+    if not pyarrow_available():
+        formatter.print_error("pyarrow не установлен. Установите его командой: pip install pyarrow")
+        return
+
+    db = DatabaseManager(args.db, profile='analytics')
+    db.connect()
+    try:
+        stats = OperationSnapshot(db, args.path).refresh(full=args.full)
+        mode = "полная" if stats['mode'] == 'full' else "инкрементальная"
+        formatter.print_success(f"Снимок обновлен ({mode} выгрузка): {stats['rows']} строк, "
+                                f"{stats['partitions']} месяцев за {stats['seconds']:.2f} с -> {args.path}")
+    except (sqlite3.Error, OSError) as e:
+        formatter.print_error(f"Ошибка при выгрузке снимка: {e}")
+    finally:
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    main()
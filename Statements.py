@@ -0,0 +1,19 @@
+from typing import Dict
+
+
+# Реестр именованных запросов: текст объявляется один раз при импорте модуля менеджера,
+# методы DatabaseManager (fetch_all, fetch_one, execute_query, execute_many) принимают имя вместо текста.
+# Один и тот же текст при каждом вызове попадает в кэш подготовленных запросов соединения.
+STATEMENTS: Dict[str, str] = {}
+
+
+def register_statement(name: str, query: str) -> str:
+    """Объявление именованного запроса; возвращает имя.
+
+    Текст хранится как есть: схлопывание пробелов изменило бы строковые литералы и комментарии '--'
+    (ключ статистики профилировщика нормализуется отдельно).
+    """
+    if STATEMENTS.get(name, query) != query:
+        raise ValueError(f"Запрос '{name}' уже объявлен с другим текстом")
+    STATEMENTS[name] = query
+    return name
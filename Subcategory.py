@@ -1,9 +1,12 @@
 import sqlite3
 import uuid
-from typing import Optional, List, Dict, Any
+from typing import Optional, List
 
 from Category import Category
 from ConsoleFormatter import ConsoleFormatter
+from Lookup import name_key, find_uuid_by_prefix
+from Records import SubcategoryRecord
+from Statements import register_statement
 
 
 class DatabaseManager:
@@ -13,136 +16,120 @@ class DatabaseManager:
 class Subcategory:
     """Класс для работы с подкатегориями"""
 
+    # Именованные запросы реестра DatabaseManager
+    FIND_UUID = register_statement('subcategories.find_uuid', """
+        SELECT uuid
+        FROM subcategories
+        WHERE category_id = (SELECT id FROM categories WHERE uuid = ?)
+          AND name_key = ?
+        ORDER BY id
+        LIMIT 1
+        """)
+    INSERT = register_statement('subcategories.insert', """
+        INSERT INTO subcategories (uuid, category_id, name, name_key)
+        VALUES (?, (SELECT id FROM categories WHERE uuid = ?), ?, ?)
+        """)
+    UPDATE = register_statement('subcategories.update', """
+        UPDATE subcategories
+        SET name        = ?,
+            name_key    = ?,
+            category_id = (SELECT id FROM categories WHERE uuid = ?)
+        WHERE uuid = ?
+        """)
+    DELETE = register_statement('subcategories.delete', "DELETE FROM subcategories WHERE uuid = ?")
+
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
         self.formatter = ConsoleFormatter()
         self.category_manager = Category(db_manager)
+        self.cache = db_manager.category_cache
 
     def create_subcategory(self, category_id: str, name: str):
         """Создание новой подкатегории"""
         try:
-            # Проверяем, существует ли уже такая подкатегория в этой категории
-            existing = self.get_all_subcategories(category_id)
-            for subcat in existing:
-                if subcat['name'].lower() == name.lower():
+            # ID, сокращенный ID или имя категории
+            category = self.category_manager.resolve_category(category_id)
+            if not category:
+                self.formatter.print_error(f"Категория '{category_id}' не найдена!")
+                return None
+            category_id = category['id']
+
+            # Проверка дубликата и вставка - одна транзакция
+            with self.db.transaction():
+                # Проверяем по индексу (category_id, name_key), существует ли уже такая подкатегория
+                existing = self.db.fetch_one(self.FIND_UUID, (category_id, name_key(name)))
+                if existing:
                     self.formatter.print_warning(f"Подкатегория '{name}' уже существует в этой категории!")
-                    return subcat['id']
-
-            # Создаем новую подкатегорию
-            subcategory_id = str(uuid.uuid4())
-            query = """
-                    INSERT INTO subcategories (id, category_id, name)
-                    VALUES (?, ?, ?) \
-                    """
-            self.db.execute_query(query, (subcategory_id, category_id, name))
+                    return existing['uuid']
+
+                # Создаем новую подкатегорию
+                subcategory_id = str(uuid.uuid4())
+                self.db.execute_query(self.INSERT, (subcategory_id, category_id, name, name_key(name)))
+            self.cache.invalidate()
             self.formatter.print_success(f"Подкатегория '{name}' создана успешно! ID: {subcategory_id}")
             return subcategory_id
         except sqlite3.Error as e:
             self.formatter.print_error(f"Ошибка при создании подкатегории: {e}")
             return None
 
-    def get_all_subcategories(self, category_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    def get_all_subcategories(self, category_id: Optional[str] = None) -> List[SubcategoryRecord]:
         """Получение всех подкатегорий с опциональной фильтрацией по категории"""
         try:
             if category_id:
-                # Проверим, может быть введено имя категории вместо ID
-                category = self.category_manager.get_category_by_id(category_id)
-                if not category:
-                    category = self.category_manager.get_category_by_name(category_id)
-                    if category:
-                        category_id = category['id']
-
-                query = """
-                        SELECT s.*, c.name as category_name
-                        FROM subcategories s
-                                 JOIN categories c ON s.category_id = c.id
-                        WHERE s.category_id = ?
-                        ORDER BY s.name \
-                        """
-                results = self.db.fetch_all(query, (category_id,))
-            else:
-                query = """
-                        SELECT s.*, c.name as category_name
-                        FROM subcategories s
-                                 JOIN categories c ON s.category_id = c.id
-                        ORDER BY c.name, s.name \
-                        """
-                results = self.db.fetch_all(query)
-
-            subcategories = []
-            for row in results:
-                subcategories.append({
-                    'id': row['id'],
-                    'category_id': row['category_id'],
-                    'name': row['name'],
-                    'category_name': row['category_name']
-                })
-            return subcategories
+                # Может быть введен сокращенный ID или имя категории вместо ID
+                category = self.category_manager.resolve_category(category_id)
+                if category:
+                    category_id = category['id']
+
+            return self.cache.get_subcategories(category_id)
         except sqlite3.Error as e:
             self.formatter.print_error(f"Ошибка при получении подкатегорий: {e}")
             return []
 
-    def get_subcategory_by_id(self, subcategory_id: str) -> Optional[Dict[str, Any]]:
+    def get_subcategory_by_id(self, subcategory_id: str) -> Optional[SubcategoryRecord]:
         """Получение подкатегории по ID"""
         try:
-            query = """
-                    SELECT s.*, c.name as category_name
-                    FROM subcategories s
-                             JOIN categories c ON s.category_id = c.id
-                    WHERE s.id = ? \
-                    """
-            result = self.db.fetch_one(query, (subcategory_id,))
-
-            if result:
-                return {
-                    'id': result['id'],
-                    'category_id': result['category_id'],
-                    'name': result['name'],
-                    'category_name': result['category_name']
-                }
-            return None
+            return self.cache.get_subcategory(subcategory_id)
         except sqlite3.Error as e:
             self.formatter.print_error(f"Ошибка при получении подкатегории: {e}")
             return None
 
-    def get_subcategory_by_name(self, name: str, category_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
-        """Получение подкатегории по имени"""
+    def get_subcategory_by_name(self, name: str, category_name: Optional[str] = None) -> Optional[SubcategoryRecord]:
+        """Получение подкатегории по имени без учета регистра"""
         try:
             if category_name:
-                query = """
-                        SELECT s.*, c.name as category_name
-                        FROM subcategories s
-                                 JOIN categories c ON s.category_id = c.id
-                        WHERE s.name = ? \
-                          AND c.name = ? \
-                        """
-                result = self.db.fetch_one(query, (name, category_name))
-            else:
-                query = """
-                        SELECT s.*, c.name as category_name
-                        FROM subcategories s
-                                 JOIN categories c ON s.category_id = c.id
-                        WHERE s.name = ? \
-                        """
-                result = self.db.fetch_one(query, (name,))
-
-            if result:
-                return {
-                    'id': result['id'],
-                    'category_id': result['category_id'],
-                    'name': result['name'],
-                    'category_name': result['category_name']
-                }
+                category = self.cache.find_category(category_name)
+                return self.cache.find_subcategory(category.id, name) if category else None
+            return self.cache.find_subcategory(None, name)
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при получении подкатегории: {e}")
+            return None
+
+    def find_subcategory(self, category_id: str, name: str) -> Optional[SubcategoryRecord]:
+        """Подкатегория по имени внутри категории"""
+        try:
+            return self.cache.find_subcategory(category_id, name)
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при получении подкатегории: {e}")
             return None
+
+    def resolve_subcategory(self, identifier: str) -> Optional[SubcategoryRecord]:
+        """Подкатегория по полному или сокращенному ID"""
+        subcategory = self.get_subcategory_by_id(identifier)
+        if subcategory:
+            return subcategory
+        try:
+            subcategory_id = find_uuid_by_prefix(self.db, "subcategories", identifier)
         except sqlite3.Error as e:
             self.formatter.print_error(f"Ошибка при получении подкатегории: {e}")
             return None
+        return self.get_subcategory_by_id(subcategory_id) if subcategory_id else None
 
     def update_subcategory(self, subcategory_id: str, name: str = None,
                            category_id: str = None):
         """Обновление подкатегории"""
         try:
-            subcategory = self.get_subcategory_by_id(subcategory_id)
+            subcategory = self.resolve_subcategory(subcategory_id)
             if not subcategory:
                 # Попробуем найти по имени
                 if subcategory_id and not '-' in subcategory_id:  # Если введено не UUID
@@ -154,8 +141,8 @@ class Subcategory:
                 if not subcategory:
                     self.formatter.print_error(f"Подкатегория '{subcategory_id}' не найдена!")
                     return False
-                else:
-                    subcategory_id = subcategory['id']
+            # Сокращенный ID или имя - дальше запросы идут по полному UUID
+            subcategory_id = subcategory['id']
 
             if name is None:
                 name = self.formatter.get_input(
@@ -185,12 +172,19 @@ class Subcategory:
                     )
                     if cat_choice is None:
                         return False
-                    category_id = cat_choice
+                    new_category = self.category_manager.resolve_category(cat_choice)
+                    if not new_category:
+                        self.formatter.print_error(f"Категория '{cat_choice}' не найдена!")
+                        return False
+                    category_id = new_category['id']
                 else:
                     category_id = subcategory['category_id']
 
-            query = "UPDATE subcategories SET name = ?, category_id = ? WHERE id = ?"
-            self.db.execute_query(query, (name, category_id, subcategory_id))
+            cursor = self.db.execute_query(self.UPDATE, (name, name_key(name), category_id, subcategory_id))
+            self.cache.invalidate()
+            if cursor.rowcount == 0:
+                self.formatter.print_error(f"Подкатегория '{subcategory_id}' не найдена!")
+                return False
             self.formatter.print_success(f"Подкатегория '{name}' обновлена успешно!")
             return True
         except sqlite3.Error as e:
@@ -200,7 +194,7 @@ class Subcategory:
     def delete_subcategory(self, subcategory_id: str):
         """Удаление подкатегории"""
         try:
-            subcategory = self.get_subcategory_by_id(subcategory_id)
+            subcategory = self.resolve_subcategory(subcategory_id)
             if not subcategory:
                 # Попробуем найти по имени
                 if subcategory_id and not '-' in subcategory_id:  # Если введено не UUID
@@ -212,15 +206,18 @@ class Subcategory:
                 if not subcategory:
                     self.formatter.print_error(f"Подкатегория '{subcategory_id}' не найдена!")
                     return False
-                else:
-                    subcategory_id = subcategory['id']
+            # Сокращенный ID или имя - дальше запросы идут по полному UUID
+            subcategory_id = subcategory['id']
 
             confirm = input(f"Удалить подкатегорию '{subcategory['name']}'? (y/n): ").lower()
             if confirm != 'y':
                 return False
 
-            query = "DELETE FROM subcategories WHERE id = ?"
-            self.db.execute_query(query, (subcategory_id,))
+            cursor = self.db.execute_query(self.DELETE, (subcategory_id,))
+            self.cache.invalidate()
+            if cursor.rowcount == 0:
+                self.formatter.print_error(f"Подкатегория '{subcategory_id}' не найдена!")
+                return False
             self.formatter.print_success(f"Подкатегория '{subcategory['name']}' удалена успешно!")
             return True
         except sqlite3.Error as e:
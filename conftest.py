@@ -0,0 +1,17 @@
+"""Общие фикстуры тестов"""
+import pytest
+
+from Category import Category
+from DatabaseManager import DatabaseManager
+from Migrations import migrate
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Пустая база со схемой последней версии и одной категорией расходов"""
+    manager = DatabaseManager(str(tmp_path / "finance.db"))
+    manager.connect()
+    migrate(manager, verbose=False)
+    Category(manager).create_category("Продукты", "expense")
+    yield manager
+    manager.disconnect()
@@ -2,10 +2,17 @@ import sqlite3
 import uuid
 from datetime import datetime
 import os
+from Budget import Budget, validate_month
 from Category import Category
+from ChangeLog import ChangeLog
 from ConsoleFormatter import ConsoleFormatter
 from DatabaseManager import DatabaseManager
+from Lookup import name_key
 from Operation import Operation
+from Migrations import migrate
+from Money import from_cents
+from Recurring import Recurring, RecurrenceRule
+from ReportEngine import ReportEngine
 from Subcategory import Subcategory
 
 
@@ -18,6 +25,9 @@ class FinanceApp:
         self.category_manager = Category(self.db)
         self.subcategory_manager = Subcategory(self.db)
         self.operation_manager = Operation(self.db)
+        self.budget_manager = Budget(self.db)
+        self.recurring_manager = Recurring(self.db)
+        self.report_engine = ReportEngine(self.db)
         self.formatter = ConsoleFormatter()
 
     def clear_screen(self):
@@ -28,17 +38,19 @@ class FinanceApp:
         """Отображение главного меню"""
         self.clear_screen()
         self.formatter.print_header("Управление личными финансами")
+        print(f"Профиль базы данных: {self.db.profile}")
 
         self.formatter.print_menu([
             "📁 Управление категориями",
             "📂 Управление подкатегориями",
             "💰 Управление операциями",
+            "💼 Управление бюджетами",
             "📊 Просмотр отчетов",
             "❌ Выход"
         ])
 
         choice = self.formatter.get_input("Выберите действие", input_type=int,
-                                          validation_func=lambda x: 1 <= x <= 5)
+                                          validation_func=lambda x: 1 <= x <= 6)
         return choice
 
     def handle_category_menu(self):
@@ -207,6 +219,7 @@ class FinanceApp:
 
         self.formatter.print_info("Вы можете ввести:")
         print("1. Полный ID категории (скопируйте из таблицы выше)")
+        print("2. Сокращенный ID (первые 8 символов) или название категории")
 
         category_identifier = self.formatter.get_input("Введите ID", required=True)
         if category_identifier is None:
@@ -298,14 +311,15 @@ class FinanceApp:
                 "➕ Создать операцию",
                 "👁️ Просмотреть все операции (сокращенные ID)",
                 "👁️ Просмотреть все операции (полные ID)",
-                "🔍 Поиск операции по ID",
+                "🔍 Поиск операций (по ID или тексту)",
                 "📝 Обновить операцию",
                 "🗑️ Удалить операцию",
+                "🔁 Регулярные операции",
                 "🔙 Назад в главное меню"
             ])
 
             choice = self.formatter.get_input("Выберите действие", input_type=int,
-                                              validation_func=lambda x: 1 <= x <= 7)
+                                              validation_func=lambda x: 1 <= x <= 8)
 
             if choice == 1:
                 self.handle_operation_creation()
@@ -320,6 +334,8 @@ class FinanceApp:
             elif choice == 6:
                 self.handle_operation_delete()
             elif choice == 7:
+                self.handle_recurring_menu()
+            elif choice == 8:
                 break
             else:
                 self.formatter.print_error("Неверный выбор!")
@@ -349,8 +365,8 @@ class FinanceApp:
         if category_identifier is None:
             return
 
-        category = self.category_manager.get_category_by_id(category_identifier)
-        if not category:
+        category = self.category_manager.resolve_category(category_identifier)
+        if not category or category['type'] != type_:
             self.formatter.print_error(f"Категория с ID '{category_identifier}' не найдена!")
             return
         category_id = category['id']
@@ -364,16 +380,15 @@ class FinanceApp:
 
         subcategory_input = input("Введите ID или имя подкатегории (Enter чтобы пропустить): ").strip()
         if subcategory_input:
-            # Сначала ищем по ID
-            subcat = self.subcategory_manager.get_subcategory_by_id(subcategory_input)
+            # Сначала ищем по полному или сокращенному ID
+            subcat = self.subcategory_manager.resolve_subcategory(subcategory_input)
             if subcat and subcat['category_id'] == category_id:
                 subcategory_id = subcat['id']
             else:
                 # Ищем по имени в текущей категории
-                for s in subcategories:
-                    if s['name'].lower() == subcategory_input.lower():
-                        subcategory_id = s['id']
-                        break
+                subcat = self.subcategory_manager.find_subcategory(category_id, subcategory_input)
+                if subcat:
+                    subcategory_id = subcat['id']
                 # Если не нашли — создаём новую
                 if not subcategory_id:
                     create_new = input(f"Подкатегория '{subcategory_input}' не найдена. Создать новую? (y/n): ").lower()
@@ -397,7 +412,6 @@ class FinanceApp:
 
         # Создание операции
         self.operation_manager.create_operation(type_, category_id, subcategory_id, amount, date, description)
-        self.formatter.print_success("Операция создана успешно!")
 
     def handle_operation_list(self, show_full_ids: bool = False):
         """Обработка просмотра операций"""
@@ -429,21 +443,21 @@ class FinanceApp:
             type_ = 'expense'
         elif filter_choice == 4:
             start_date = self.formatter.get_input("Дата начала (ГГГГ-ММ-ДД)",
-                                                  validation_func=lambda x: self.operation_manager._validate_date(x))
+                                                  validation_func=lambda x: self.operation_manager.validate_date(x))
             if start_date is None:
                 return
 
             end_date = self.formatter.get_input("Дата окончания (ГГГГ-ММ-ДД)",
-                                                validation_func=lambda x: self.operation_manager._validate_date(x))
+                                                validation_func=lambda x: self.operation_manager.validate_date(x))
             if end_date is None:
                 return
 
-        operations = self.operation_manager.get_all_operations(start_date, end_date, type_)
+        # Статистика считается в SQLite, операции показываются постранично
+        summary = self.operation_manager.get_operations_summary(start_date, end_date, type_)
 
-        if operations:
-            # Выводим статистику
-            total_income = sum(op['amount'] for op in operations if op['type'] == 'income')
-            total_expense = sum(op['amount'] for op in operations if op['type'] == 'expense')
+        if summary['total_count']:
+            total_income = from_cents(summary['income_cents'])
+            total_expense = from_cents(summary['expense_cents'])
             balance = total_income - total_expense
 
             self.formatter.print_header("Статистика")
@@ -451,20 +465,74 @@ class FinanceApp:
             print(f"📉 Всего расходов: {total_expense:.2f}")
             print(f"💰 Баланс: {balance:.2f}")
 
-            # Выводим операции
-            title = f"Операции ({len(operations)})"
-            self.operation_manager.show_operations_table(operations, title, show_full_ids)
+            page_size = self.formatter.get_input("Операций на странице (0 - вывести все)", input_type=int,
+                                                 default="20", validation_func=lambda x: x >= 0)
+            if page_size is None:
+                return
+
+            if page_size == 0:
+                # Полный список выводится потоком, без загрузки всех операций в память
+                operations = self.operation_manager.iter_operations(start_date, end_date, type_)
+                self.operation_manager.show_operations_table(
+                    operations, f"Операции ({summary['total_count']})", show_full_ids)
+            else:
+                self.browse_operations(start_date, end_date, type_, page_size, summary['total_count'],
+                                       show_full_ids)
         else:
             self.formatter.print_info("Операции не найдены!")
 
         if show_full_ids:
             self.formatter.print_info("Полные ID показаны. Вы можете скопировать их для обновления/удаления.")
 
+    def browse_operations(self, start_date, end_date, type_, page_size: int, total_count: int,
+                          show_full_ids: bool = False):
+        """Постраничный просмотр операций (пагинация по ключу, без загрузки всей истории)"""
+        page_number = 1
+        page = self.operation_manager.get_operations_page(start_date, end_date, type_, page_size)
+
+        while page:
+            pages_total = (total_count + page_size - 1) // page_size
+            title = f"Операции ({total_count}), страница {page_number} из {pages_total}"
+            self.operation_manager.show_operations_table(page, title, show_full_ids)
+
+            choice = input("\n[n] следующая, [p] предыдущая, Enter - выход: ").strip().lower()
+            if choice == 'n':
+                next_page = self.operation_manager.get_operations_page(
+                    start_date, end_date, type_, page_size, after=(page[-1]['date'], page[-1]['key']))
+                if next_page:
+                    page = next_page
+                    page_number += 1
+                else:
+                    self.formatter.print_info("Это последняя страница")
+            elif choice == 'p':
+                prev_page = self.operation_manager.get_operations_page(
+                    start_date, end_date, type_, page_size, before=(page[0]['date'], page[0]['key']))
+                if prev_page:
+                    page = prev_page
+                    page_number -= 1
+                else:
+                    self.formatter.print_info("Это первая страница")
+            else:
+                break
+
     def handle_operation_search(self):
-        """Обработка поиска операции по ID"""
+        """Обработка поиска операции по ID или по тексту"""
         self.clear_screen()
         self.formatter.print_header("Поиск операции")
 
+        self.formatter.print_menu([
+            "По ID",
+            "По тексту (описание, категория, подкатегория)"
+        ], "Режим поиска")
+
+        mode = self.formatter.get_input("Выберите режим", input_type=int, default="1",
+                                        validation_func=lambda x: 1 <= x <= 2)
+        if mode is None:
+            return
+        if mode == 2:
+            self.handle_operation_text_search()
+            return
+
         operation_id = self.formatter.get_input("Введите ID операции", required=True)
         if operation_id is None:
             return
@@ -489,16 +557,48 @@ class FinanceApp:
         else:
             self.formatter.print_error("Операция не найдена!")
 
+    def handle_operation_text_search(self):
+        """Полнотекстовый поиск операций с фильтрами по типу и датам"""
+        text = self.formatter.get_input("Текст для поиска (все слова, можно начало слова)", required=True)
+        if text is None:
+            return
+
+        self.formatter.print_menu(["Все операции", "Только доходы", "Только расходы"], "Тип")
+        type_choice = self.formatter.get_input("Выберите тип", input_type=int, default="1",
+                                               validation_func=lambda x: 1 <= x <= 3)
+        if type_choice is None:
+            return
+        type_ = {1: None, 2: 'income', 3: 'expense'}[type_choice]
+
+        # Пустой ввод - без ограничения
+        start_date = self.formatter.get_input("Дата начала (ГГГГ-ММ-ДД, Enter - без ограничения)",
+                                              validation_func=lambda x: not x or self.operation_manager.validate_date(x))
+        if start_date is None:
+            return
+        end_date = self.formatter.get_input("Дата окончания (ГГГГ-ММ-ДД, Enter - без ограничения)",
+                                            validation_func=lambda x: not x or self.operation_manager.validate_date(x))
+        if end_date is None:
+            return
+
+        operations = self.operation_manager.search_operations(text, start_date or None, end_date or None, type_)
+        if not operations:
+            self.formatter.print_info(f"По запросу '{text}' операции не найдены!")
+            return
+
+        self.operation_manager.show_operations_table(
+            operations, f"Результаты поиска '{text}' ({len(operations)}, лучшие совпадения первыми)",
+            show_full_ids=True)
+
     def handle_operation_update(self):
         """Обработка обновления операции"""
         self.clear_screen()
         self.formatter.print_header("Обновление операции")
 
         # Показываем последние 10 операций с полными ID
-        recent_ops = self.operation_manager.get_all_operations()
+        recent_ops = self.operation_manager.get_operations_page(page_size=10)
         if recent_ops:
             self.formatter.print_info("Последние операции (полные ID):")
-            self.operation_manager.show_operations_table(recent_ops[:10], "Последние 10 операций", show_full_ids=True)
+            self.operation_manager.show_operations_table(recent_ops, "Последние 10 операций", show_full_ids=True)
         else:
             self.formatter.print_info("Операции не найдены!")
 
@@ -514,10 +614,10 @@ class FinanceApp:
         self.formatter.print_header("Удаление операции")
 
         # Показываем последние 10 операций с полными ID
-        recent_ops = self.operation_manager.get_all_operations()
+        recent_ops = self.operation_manager.get_operations_page(page_size=10)
         if recent_ops:
             self.formatter.print_info("Последние операции (полные ID):")
-            self.operation_manager.show_operations_table(recent_ops[:10], "Последние 10 операций", show_full_ids=True)
+            self.operation_manager.show_operations_table(recent_ops, "Последние 10 операций", show_full_ids=True)
         else:
             self.formatter.print_info("Операции не найдены!")
 
@@ -527,30 +627,265 @@ class FinanceApp:
 
         self.operation_manager.delete_operation(operation_id)
 
+    def handle_recurring_menu(self):
+        """Обработка меню регулярных операций"""
+        while True:
+            self.clear_screen()
+            self.formatter.print_header("Регулярные операции")
+
+            self.formatter.print_menu([
+                "➕ Создать регулярную операцию",
+                "👁️ Просмотреть регулярные операции",
+                "🗑️ Удалить регулярную операцию",
+                "▶️ Провести наступившие операции",
+                "🔙 Назад"
+            ])
+
+            choice = self.formatter.get_input("Выберите действие", input_type=int,
+                                              validation_func=lambda x: 1 <= x <= 5)
+
+            if choice == 1:
+                self.handle_recurring_creation()
+            elif choice == 2:
+                self.recurring_manager.show_templates_table(show_full_ids=True)
+            elif choice == 3:
+                self.handle_recurring_delete()
+            elif choice == 4:
+                self.materialize_recurring()
+            elif choice == 5:
+                break
+            else:
+                self.formatter.print_error("Неверный выбор!")
+
+    def handle_recurring_creation(self):
+        """Обработка создания регулярной операции"""
+        self.clear_screen()
+        self.formatter.print_header("Создание регулярной операции")
+
+        self.formatter.print_menu(["📈 Доход", "📉 Расход"], "Тип операции")
+        type_choice = self.formatter.get_input("Выберите тип", input_type=int,
+                                               validation_func=lambda x: 1 <= x <= 2)
+        if type_choice is None:
+            return
+
+        type_ = 'income' if type_choice == 1 else 'expense'
+
+        if not self.category_manager.get_all_categories(type_):
+            self.formatter.print_error(f"Сначала создайте категории типа '{type_}'!")
+            return
+
+        self.category_manager.show_categories_table(type_, show_full_ids=True)
+        category_identifier = self.formatter.get_input("Введите ID или имя категории", required=True)
+        if category_identifier is None:
+            return
+
+        category = self.category_manager.resolve_category(category_identifier)
+        if not category or category['type'] != type_:
+            self.formatter.print_error(f"Категория '{category_identifier}' не найдена!")
+            return
+
+        subcategory_id = None
+        if self.subcategory_manager.get_all_subcategories(category['id']):
+            self.subcategory_manager.show_subcategories_table(category['id'], show_full_ids=True)
+        subcategory_input = input("Введите ID или имя подкатегории (Enter чтобы пропустить): ").strip()
+        if subcategory_input:
+            subcat = self.subcategory_manager.resolve_subcategory(subcategory_input)
+            if not subcat or subcat['category_id'] != category['id']:
+                subcat = self.subcategory_manager.find_subcategory(category['id'], subcategory_input)
+            if not subcat:
+                self.formatter.print_error(f"Подкатегория '{subcategory_input}' не найдена!")
+                return
+            subcategory_id = subcat['id']
+
+        amount = self.formatter.get_input("Сумма", input_type=float, validation_func=lambda x: x > 0)
+        if amount is None:
+            return
+
+        self.formatter.print_info("Правило: 'день месяц день_недели', например:")
+        print("   '1 * *' - 1-го числа каждого месяца, 'L * *' - в последний день месяца,")
+        print("   '* * 1' - по понедельникам, '10,25 * *' - 10-го и 25-го, '15 1,4,7,10 *' - раз в квартал")
+
+        def valid_rule(text):
+            try:
+                RecurrenceRule(text)
+                return True
+            except ValueError as e:
+                self.formatter.print_error(f"Неверное правило: {e}")
+                return False
+
+        rule = self.formatter.get_input("Правило повторения", required=True, validation_func=valid_rule)
+        if rule is None:
+            return
+
+        today = datetime.now().strftime("%Y-%m-%d")
+        start_date = self.formatter.get_input(f"Дата начала (ГГГГ-ММ-ДД) [{today}]", default=today,
+                                              validation_func=lambda x: self.operation_manager.validate_date(x))
+        if start_date is None:
+            return
+
+        end_date = input("Дата окончания (ГГГГ-ММ-ДД, Enter - без окончания): ").strip() or None
+        if end_date and not self.operation_manager.validate_date(end_date):
+            self.formatter.print_error("Неверная дата окончания!")
+            return
+
+        description = input("Описание (опционально, Enter чтобы пропустить): ").strip() or None
+
+        if self.recurring_manager.create_template(type_, category['id'], subcategory_id, amount, rule,
+                                                  start_date, end_date, description):
+            # Операции с прошедшими датами проводятся сразу
+            self.materialize_recurring()
+
+    def handle_recurring_delete(self):
+        """Обработка удаления регулярной операции"""
+        self.clear_screen()
+        self.formatter.print_header("Удаление регулярной операции")
+
+        self.recurring_manager.show_templates_table(show_full_ids=True)
+        template_id = self.formatter.get_input("Введите ID регулярной операции для удаления", required=True)
+        if template_id is None:
+            return
+
+        self.recurring_manager.delete_template(template_id)
+
+    def materialize_recurring(self):
+        """Проведение наступивших регулярных операций"""
+        try:
+            stats = self.recurring_manager.materialize()
+        except sqlite3.Error as e:
+            self.formatter.print_error(f"Ошибка при проведении регулярных операций: {e}")
+            return
+        if stats['created']:
+            self.formatter.print_success(f"Проведено регулярных операций: {stats['created']} "
+                                         f"({stats['seconds'] * 1000:.1f} мс)")
+
+    def handle_budget_menu(self):
+        """Обработка меню бюджетов"""
+        while True:
+            self.clear_screen()
+            self.formatter.print_header("Управление бюджетами")
+
+            self.formatter.print_menu([
+                "➕ Установить бюджет на месяц",
+                "👁️ Просмотреть бюджеты месяца",
+                "🗑️ Удалить бюджет",
+                "🔙 Назад в главное меню"
+            ])
+
+            choice = self.formatter.get_input("Выберите действие", input_type=int,
+                                              validation_func=lambda x: 1 <= x <= 4)
+
+            if choice == 1:
+                self.handle_budget_creation()
+            elif choice == 2:
+                self.handle_budget_list()
+            elif choice == 3:
+                self.handle_budget_delete()
+            elif choice == 4:
+                break
+            else:
+                self.formatter.print_error("Неверный выбор!")
+
+    def input_month(self):
+        """Ввод месяца ГГГГ-ММ, по умолчанию текущий"""
+        current_month = datetime.now().strftime("%Y-%m")
+        return self.formatter.get_input(f"Месяц (ГГГГ-ММ) [{current_month}]", default=current_month,
+                                        validation_func=validate_month)
+
+    def handle_budget_creation(self):
+        """Обработка установки бюджета"""
+        self.clear_screen()
+        self.formatter.print_header("Установка бюджета")
+
+        categories = self.category_manager.get_all_categories('expense')
+        if not categories:
+            self.formatter.print_error("Сначала создайте категории расходов!")
+            return
+
+        self.category_manager.show_categories_table('expense', show_full_ids=True)
+        category_identifier = self.formatter.get_input("Введите ID или имя категории", required=True)
+        if category_identifier is None:
+            return
+
+        category = self.category_manager.resolve_category(category_identifier)
+        if not category or category['type'] != 'expense':
+            self.formatter.print_error(f"Категория расходов '{category_identifier}' не найдена!")
+            return
+
+        # Без подкатегории бюджет действует на всю категорию
+        subcategory_id = None
+        if self.subcategory_manager.get_all_subcategories(category['id']):
+            self.subcategory_manager.show_subcategories_table(category['id'], show_full_ids=True)
+        subcategory_input = input("Введите ID или имя подкатегории (Enter - бюджет на всю категорию): ").strip()
+        if subcategory_input:
+            subcat = self.subcategory_manager.resolve_subcategory(subcategory_input)
+            if not subcat or subcat['category_id'] != category['id']:
+                subcat = self.subcategory_manager.find_subcategory(category['id'], subcategory_input)
+            if not subcat:
+                self.formatter.print_error(f"Подкатегория '{subcategory_input}' не найдена!")
+                return
+            subcategory_id = subcat['id']
+
+        month = self.input_month()
+        if month is None:
+            return
+
+        amount = self.formatter.get_input("Лимит расходов", input_type=float, validation_func=lambda x: x > 0)
+        if amount is None:
+            return
+
+        self.budget_manager.set_budget(category['id'], subcategory_id, month, amount)
+
+    def handle_budget_list(self):
+        """Обработка просмотра бюджетов"""
+        self.clear_screen()
+        self.formatter.print_header("Просмотр бюджетов")
+
+        month = self.input_month()
+        if month is None:
+            return
+
+        self.budget_manager.show_budgets_table(month, show_full_ids=True)
+
+    def handle_budget_delete(self):
+        """Обработка удаления бюджета"""
+        self.clear_screen()
+        self.formatter.print_header("Удаление бюджета")
+
+        month = self.input_month()
+        if month is None:
+            return
+
+        self.budget_manager.show_budgets_table(month, show_full_ids=True)
+        budget_id = self.formatter.get_input("Введите ID бюджета для удаления", required=True)
+        if budget_id is None:
+            return
+
+        self.budget_manager.delete_budget(budget_id)
+
     def show_reports(self):
         """Отображение отчетов"""
         self.clear_screen()
         self.formatter.print_header("Финансовые отчеты")
 
-        # Получаем все операции
-        operations = self.operation_manager.get_all_operations()
+        # Агрегаты считаются в SQLite, операции в память не загружаются
+        totals = self.report_engine.get_totals()
 
-        if not operations:
+        if not totals['total_count']:
             self.formatter.print_info("Нет данных для отчетов!")
             return
 
         # Общая статистика
-        total_income = sum(op['amount'] for op in operations if op['type'] == 'income')
-        total_expense = sum(op['amount'] for op in operations if op['type'] == 'expense')
+        total_income = from_cents(totals['total_income_cents'])
+        total_expense = from_cents(totals['total_expense_cents'])
         balance = total_income - total_expense
 
         self.formatter.print_header("Общая статистика")
 
         headers = ["Показатель", "Значение"]
         rows = [
-            ["Всего операций", len(operations)],
-            ["Операций доходов", sum(1 for op in operations if op['type'] == 'income')],
-            ["Операций расходов", sum(1 for op in operations if op['type'] == 'expense')],
+            ["Всего операций", totals['total_count']],
+            ["Операций доходов", totals['income_count']],
+            ["Операций расходов", totals['expense_count']],
             ["Общий доход", f"{total_income:.2f}"],
             ["Общий расход", f"{total_expense:.2f}"],
             ["Баланс", f"{balance:.2f}"]
@@ -559,70 +894,60 @@ class FinanceApp:
         self.formatter.print_table(headers, rows)
 
         # Расходы по категориям
-        expense_by_category = {}
-        for op in operations:
-            if op['type'] == 'expense':
-                cat_name = op['category_name']
-                expense_by_category[cat_name] = expense_by_category.get(cat_name, 0) + op['amount']
+        expense_by_category = self.report_engine.get_totals_by_category('expense')
 
         if expense_by_category:
             self.formatter.print_header("Расходы по категориям")
 
             headers = ["Категория", "Сумма", "Доля"]
             rows = []
-            for category, amount in sorted(expense_by_category.items(), key=lambda x: x[1], reverse=True):
+            for item in expense_by_category:
+                amount = from_cents(item['total_cents'])
                 percentage = (amount / total_expense * 100) if total_expense > 0 else 0
-                rows.append([category, f"{amount:.2f}", f"{percentage:.1f}%"])
+                rows.append([item['category_name'], f"{amount:.2f}", f"{percentage:.1f}%"])
 
             self.formatter.print_table(headers, rows)
 
         # Доходы по категориям
-        income_by_category = {}
-        for op in operations:
-            if op['type'] == 'income':
-                cat_name = op['category_name']
-                income_by_category[cat_name] = income_by_category.get(cat_name, 0) + op['amount']
+        income_by_category = self.report_engine.get_totals_by_category('income')
 
         if income_by_category:
             self.formatter.print_header("Доходы по категориям")
 
             headers = ["Категория", "Сумма", "Доля"]
             rows = []
-            for category, amount in sorted(income_by_category.items(), key=lambda x: x[1], reverse=True):
+            for item in income_by_category:
+                amount = from_cents(item['total_cents'])
                 percentage = (amount / total_income * 100) if total_income > 0 else 0
-                rows.append([category, f"{amount:.2f}", f"{percentage:.1f}%"])
+                rows.append([item['category_name'], f"{amount:.2f}", f"{percentage:.1f}%"])
 
             self.formatter.print_table(headers, rows)
 
         # Ежемесячная статистика
-        monthly_stats = {}
-        for op in operations:
-            month = op['date'][:7]  # ГГГГ-ММ
-            if month not in monthly_stats:
-                monthly_stats[month] = {'income': 0, 'expense': 0}
-
-            if op['type'] == 'income':
-                monthly_stats[month]['income'] += op['amount']
-            else:
-                monthly_stats[month]['expense'] += op['amount']
+        monthly_stats = self.report_engine.get_monthly_stats()
 
         if monthly_stats:
             self.formatter.print_header("Ежемесячная статистика")
 
             headers = ["Месяц", "Доход", "Расход", "Баланс"]
             rows = []
-            for month in sorted(monthly_stats.keys(), reverse=True):
-                stats = monthly_stats[month]
-                balance = stats['income'] - stats['expense']
+            for stats in monthly_stats:
+                income = from_cents(stats['income_cents'])
+                expense = from_cents(stats['expense_cents'])
                 rows.append([
-                    month,
-                    f"{stats['income']:.2f}",
-                    f"{stats['expense']:.2f}",
-                    f"{balance:.2f}"
+                    stats['month'],
+                    f"{income:.2f}",
+                    f"{expense:.2f}",
+                    f"{income - expense:.2f}"
                 ])
 
             self.formatter.print_table(headers, rows)
 
+        # Бюджеты текущего месяца: потраченное берется из operations_rollup
+        current_month = datetime.now().strftime("%Y-%m")
+        if self.budget_manager.get_budget_status(current_month):
+            self.budget_manager.show_budgets_table(current_month)
+
     def run(self):
         """Запуск приложения"""
         try:
@@ -636,8 +961,10 @@ class FinanceApp:
                 elif choice == 3:
                     self.handle_operation_menu()
                 elif choice == 4:
-                    self.show_reports()
+                    self.handle_budget_menu()
                 elif choice == 5:
+                    self.show_reports()
+                elif choice == 6:
                     self.formatter.print_success("Выход из приложения...")
                     break
                 else:
@@ -651,113 +978,17 @@ class FinanceApp:
 
 
 def create_tables(db_manager: DatabaseManager):
-    """Создание таблиц в базе данных"""
+    """Создание и обновление схемы базы данных через миграции"""
     db_manager.connect()
 
     try:
-        # Таблица категорий
-        db_manager.execute_query("""
-                                 CREATE TABLE IF NOT EXISTS categories
-                                 (
-                                     id
-                                     TEXT
-                                     PRIMARY
-                                     KEY,
-                                     name
-                                     TEXT
-                                     NOT
-                                     NULL,
-                                     type
-                                     TEXT
-                                     NOT
-                                     NULL
-                                     CHECK (
-                                     type
-                                     IN
-                                 (
-                                     'income',
-                                     'expense'
-                                 ))
-                                     )
-                                 """)
-
-        # Таблица подкатегорий
-        db_manager.execute_query("""
-                                 CREATE TABLE IF NOT EXISTS subcategories
-                                 (
-                                     id
-                                     TEXT
-                                     PRIMARY
-                                     KEY,
-                                     category_id
-                                     TEXT
-                                     NOT
-                                     NULL,
-                                     name
-                                     TEXT
-                                     NOT
-                                     NULL,
-                                     FOREIGN
-                                     KEY
-                                 (
-                                     category_id
-                                 ) REFERENCES categories
-                                 (
-                                     id
-                                 ) ON DELETE CASCADE
-                                     )
-                                 """)
-
-        # Таблица операций
-        db_manager.execute_query("""
-                                 CREATE TABLE IF NOT EXISTS operations
-                                 (
-                                     id
-                                     TEXT
-                                     PRIMARY
-                                     KEY,
-                                     type
-                                     TEXT
-                                     NOT
-                                     NULL
-                                     CHECK (
-                                     type
-                                     IN
-                                 (
-                                     'income',
-                                     'expense'
-                                 )),
-                                     category_id TEXT NOT NULL,
-                                     subcategory_id TEXT,
-                                     amount REAL NOT NULL,
-                                     date DATETIME NOT NULL,
-                                     description TEXT,
-                                     FOREIGN KEY
-                                 (
-                                     category_id
-                                 ) REFERENCES categories
-                                 (
-                                     id
-                                 ),
-                                     FOREIGN KEY
-                                 (
-                                     subcategory_id
-                                 ) REFERENCES subcategories
-                                 (
-                                     id
-                                 ) ON DELETE SET NULL
-                                     )
-                                 """)
-
-        # Добавляем индексы для ускорения поиска
-        db_manager.execute_query("CREATE INDEX IF NOT EXISTS idx_operations_date ON operations(date)")
-        db_manager.execute_query("CREATE INDEX IF NOT EXISTS idx_operations_type ON operations(type)")
-        db_manager.execute_query("CREATE INDEX IF NOT EXISTS idx_subcategories_category ON subcategories(category_id)")
-
-        print("✅ Таблицы успешно созданы!")
+        version = migrate(db_manager)
+        print(f"✅ Схема базы данных актуальна (версия {version})")
+        # Журнал изменений нужен только для дозагрузки аналитики - хранится ограниченный хвост
+        ChangeLog(db_manager).prune()
 
     except sqlite3.Error as e:
-        print(f"❌ Ошибка при создании таблиц: {e}")
+        print(f"❌ Ошибка при обновлении схемы: {e}")
     finally:
         db_manager.disconnect()
 
@@ -818,10 +1049,10 @@ def create_default_categories(db_manager: DatabaseManager):
 
         # Создаем все категории
         all_categories = income_categories + expense_categories
+        category_rows = []
         for name, type_ in all_categories:
             category_id = str(uuid.uuid4())
-            query = "INSERT INTO categories (id, name, type) VALUES (?, ?, ?)"
-            db_manager.execute_query(query, (category_id, name, type_))
+            category_rows.append((category_id, name, type_, name_key(name)))
             category_ids[name] = category_id
 
         # Стандартные подкатегории для некоторых категорий
@@ -858,14 +1089,23 @@ def create_default_categories(db_manager: DatabaseManager):
         }
 
         # Создаем подкатегории
-        subcategories_created = 0
+        subcategory_rows = []
         for category_name, subcat_names in default_subcategories.items():
             if category_name in category_ids:
                 for subcat_name in subcat_names:
                     subcategory_id = str(uuid.uuid4())
-                    query = "INSERT INTO subcategories (id, category_id, name) VALUES (?, ?, ?)"
-                    db_manager.execute_query(query, (subcategory_id, category_ids[category_name], subcat_name))
-                    subcategories_created += 1
+                    subcategory_rows.append((subcategory_id, category_ids[category_name], subcat_name,
+                                             name_key(subcat_name)))
+        subcategories_created = len(subcategory_rows)
+
+        # Весь справочник записывается одной транзакцией
+        with db_manager.transaction():
+            db_manager.execute_many("INSERT INTO categories (uuid, name, type, name_key) VALUES (?, ?, ?, ?)",
+                                    category_rows)
+            db_manager.execute_many("""
+                                    INSERT INTO subcategories (uuid, category_id, name, name_key)
+                                    VALUES (?, (SELECT id FROM categories WHERE uuid = ?), ?, ?)
+                                    """, subcategory_rows)
 
         print(f"✅ Создано {len(all_categories)} категорий и {subcategories_created} подкатегорий")
 
@@ -898,6 +1138,9 @@ def main():
 
     # Запускаем приложение
     app = FinanceApp()
+    app.formatter.print_info(f"Профиль соединения: {app.db.describe_profile()}")
+    # Регулярные операции, наступившие с прошлого запуска
+    app.materialize_recurring()
     app.run()
 
 
@@ -2,36 +2,47 @@ import sqlite3
 import pandas as pd
 import sys
 import os
+from datetime import datetime
 
 # Добавляем путь к текущей директории
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+import Analytics
+from DatabaseManager import DatabaseManager
+from Dataset import OperationDataset
+from Exporter import OperationExporter, EXCEL_MAX_ROWS, openpyxl_available
+from Snapshot import OperationSnapshot, pyarrow_available
 
-def get_operations_as_dataframe(db_path='finance.db'):
+# Общий пул соединений для всех функций анализа
+_databases = {}
+# Загруженные наборы операций, общие для всех пунктов меню
+_datasets = {}
+
+
+def get_database(db_path='finance.db'):
+    """Пул соединений только для чтения, открывается один раз на файл базы"""
+    if db_path not in _databases:
+        db = DatabaseManager(db_path, profile='analytics')
+        db.connect()
+        _databases[db_path] = db
+    return _databases[db_path]
+
+
+def get_dataset(db_path='finance.db', snapshot_path='finance_snapshot'):
+    """Набор операций сессии: загружается один раз, дальше дозагружаются только изменения"""
+    key = (db_path, snapshot_path)
+    if key not in _datasets:
+        _datasets[key] = OperationDataset(get_database(db_path), snapshot_path)
+    return _datasets[key]
+
+
+def get_operations_as_dataframe(db_path='finance.db', snapshot_path='finance_snapshot'):
     """Получение операций в виде DataFrame pandas"""
     try:
-        # Подключаемся к базе данных
-        conn = sqlite3.connect(db_path)
-
-        # SQL запрос для получения операций с названиями категорий и подкатегорий
-        query = """
-                SELECT o.id, \
-                       o.type, \
-                       o.amount, \
-                       o.date, \
-                       o.description, \
-                       c.name as category_name, \
-                       c.type as category_type, \
-                       s.name as subcategory_name
-                FROM operations o
-                         LEFT JOIN categories c ON o.category_id = c.id
-                         LEFT JOIN subcategories s ON o.subcategory_id = s.id
-                ORDER BY o.date DESC \
-                """
-
-        # Читаем данные в DataFrame
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        # Общий набор сессии; при установленном pyarrow первая загрузка идет из снимка Parquet
+        dataset = get_dataset(db_path, snapshot_path)
+        dataset.refresh()
+        df = dataset.df
 
         if df.empty:
             print("❌ Операции не найдены в базе данных")
@@ -66,7 +77,7 @@ def display_operations_with_pandas():
     print("-" * 80)
 
     # Форматируем вывод
-    display_df = df.copy()
+    display_df = Analytics.for_display(df)
     display_df['type'] = display_df['type'].map({'income': '📈 Доход', 'expense': '📉 Расход'})
     display_df['category_type'] = display_df['category_type'].map({'income': 'Доход', 'expense': 'Расход'})
 
@@ -94,6 +105,7 @@ def display_operations_with_pandas():
     print("\n2. ОСНОВНАЯ СТАТИСТИКА:")
     print("-" * 80)
 
+    totals = Analytics.totals(df)
     stats = pd.DataFrame({
         'Показатель': [
             'Всего операций',
@@ -104,12 +116,12 @@ def display_operations_with_pandas():
             'Общий баланс'
         ],
         'Значение': [
-            len(df),
-            len(df[df['type'] == 'income']),
-            len(df[df['type'] == 'expense']),
-            df[df['type'] == 'income']['amount'].sum(),
-            df[df['type'] == 'expense']['amount'].sum(),
-            df[df['type'] == 'income']['amount'].sum() - df[df['type'] == 'expense']['amount'].sum()
+            totals['total_count'],
+            totals['income_count'],
+            totals['expense_count'],
+            totals['income'],
+            totals['expense'],
+            totals['balance']
         ]
     })
 
@@ -119,10 +131,7 @@ def display_operations_with_pandas():
     print("\n3. СТАТИСТИКА ПО КАТЕГОРИЯМ:")
     print("-" * 80)
 
-    category_stats = df.groupby(['category_name', 'category_type']).agg(
-        operations_count=('id', 'count'),
-        total_amount=('amount', 'sum')
-    ).reset_index()
+    category_stats = Analytics.category_stats(df)
 
     category_stats['category_type'] = category_stats['category_type'].map(
         {'income': 'Доход', 'expense': 'Расход'}
@@ -141,17 +150,7 @@ def display_operations_with_pandas():
     print("\n4. ЕЖЕМЕСЯЧНАЯ СТАТИСТИКА:")
     print("-" * 80)
 
-    # Преобразуем дату в месяц
-    df['date'] = pd.to_datetime(df['date'])
-    df['month'] = df['date'].dt.strftime('%Y-%m')
-
-    monthly_stats = df.groupby('month').agg(
-        operations_count=('id', 'count'),
-        income=('amount', lambda x: x[df.loc[x.index, 'type'] == 'income'].sum()),
-        expense=('amount', lambda x: x[df.loc[x.index, 'type'] == 'expense'].sum())
-    ).reset_index()
-
-    monthly_stats['balance'] = monthly_stats['income'] - monthly_stats['expense']
+    monthly_stats = Analytics.monthly_stats(df)
     monthly_stats = monthly_stats.rename(columns={
         'month': 'Месяц',
         'operations_count': 'Операций',
@@ -166,7 +165,7 @@ def display_operations_with_pandas():
     print("\n5. ТОП-10 САМЫХ КРУПНЫХ ОПЕРАЦИЙ:")
     print("-" * 80)
 
-    top_operations = df.nlargest(10, 'amount')[['date', 'type', 'amount', 'category_name', 'description']]
+    top_operations = Analytics.top_operations(df, 10)[['date', 'type', 'amount', 'category_name', 'description']]
     top_operations['type'] = top_operations['type'].map({'income': '📈 Доход', 'expense': '📉 Расход'})
 
     top_operations = top_operations.rename(columns={
@@ -220,31 +219,19 @@ def export_operations_to_excel():
 
         with pd.ExcelWriter(filename, engine='openpyxl') as writer:
             # 1. Основной лист с операциями
-            df_export = df.copy()
+            df_export = df.drop(columns=['key', 'amount_cents', 'month'])
+            df_export['date'] = df_export['date'].dt.strftime('%Y-%m-%d')
             df_export['type'] = df_export['type'].map({'income': 'Доход', 'expense': 'Расход'})
             df_export['category_type'] = df_export['category_type'].map({'income': 'Доход', 'expense': 'Расход'})
 
             df_export.to_excel(writer, sheet_name='Операции', index=False)
 
             # 2. Лист со статистикой по категориям
-            category_stats = df.groupby(['category_name', 'category_type']).agg(
-                operations_count=('id', 'count'),
-                total_amount=('amount', 'sum')
-            ).reset_index()
-
+            category_stats = Analytics.category_stats(df)
             category_stats.to_excel(writer, sheet_name='Статистика по категориям', index=False)
 
             # 3. Лист с ежемесячной статистикой
-            df['date'] = pd.to_datetime(df['date'])
-            df['month'] = df['date'].dt.strftime('%Y-%m')
-
-            monthly_stats = df.groupby('month').agg(
-                operations_count=('id', 'count'),
-                income=('amount', lambda x: x[df.loc[x.index, 'type'] == 'income'].sum()),
-                expense=('amount', lambda x: x[df.loc[x.index, 'type'] == 'expense'].sum())
-            ).reset_index()
-
-            monthly_stats['balance'] = monthly_stats['income'] - monthly_stats['expense']
+            monthly_stats = Analytics.monthly_stats(df)
             monthly_stats.to_excel(writer, sheet_name='Ежемесячная статистика', index=False)
 
         print(f"✅ Данные успешно экспортированы в файл: {filename}")
@@ -257,6 +244,71 @@ def export_operations_to_excel():
         print(f"❌ Ошибка при экспорте в Excel: {e}")
 
 
+def export_operations_to_excel_streaming(db_path='finance.db'):
+    """Потоковый экспорт в Excel: операции читаются порциями, сводки считаются в SQL"""
+    print("\n📦 ПОТОКОВЫЙ ЭКСПОРТ В EXCEL")
+    print("-" * 80)
+
+    if not openpyxl_available():
+        print("❌ openpyxl не установлен. Установите его командой:")
+        print("   pip install openpyxl")
+        return
+
+    filename = f'operations_export_{pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+    try:
+        stats = OperationExporter(get_database(db_path)).export(filename)
+        print(f"✅ Выгружено {stats['rows']} операций за {stats['seconds']:.2f} с в файл: {filename}")
+        print(f"📁 Листов с операциями: {stats['sheets']} (не больше {EXCEL_MAX_ROWS - 1} строк на лист), "
+              f"плюс статистика по категориям и по месяцам")
+    except (sqlite3.Error, OSError) as e:
+        print(f"❌ Ошибка при экспорте в Excel: {e}")
+
+
+def export_operations_snapshot(db_path='finance.db', snapshot_path='finance_snapshot'):
+    """Полная выгрузка операций в Parquet с разделами по году и месяцу"""
+    print("\n🗂️ ВЫГРУЗКА СНИМКА В PARQUET")
+    print("-" * 80)
+
+    if not pyarrow_available():
+        print("❌ pyarrow не установлен. Установите его командой:")
+        print("   pip install pyarrow")
+        return
+
+    try:
+        stats = OperationSnapshot(get_database(db_path), snapshot_path).refresh(full=True)
+        print(f"✅ Выгружено {stats['rows']} операций за {stats['seconds']:.2f} с")
+        print(f"📁 Каталог: {snapshot_path} (месяцев: {stats['partitions']}, разделы year=ГГГГ/month=ММ)")
+        print("   Далее анализ дозагружает в снимок только последний и новые месяцы")
+    except (sqlite3.Error, OSError) as e:
+        print(f"❌ Ошибка при выгрузке снимка: {e}")
+
+
+def is_valid_period(value, format_):
+    """Проверка месяца, года или даты по формату strptime"""
+    try:
+        datetime.strptime(value, format_)
+        return True
+    except ValueError:
+        return False
+
+
+def show_period_operations(period_df, title, label):
+    """Операции за период и статистика доходов/расходов"""
+    if period_df.empty:
+        print(f"❌ Операций {title.lower()} не найдено")
+        return
+
+    print(f"\n📅 ОПЕРАЦИИ {title} ({len(period_df)}):")
+    print(period_df[['date', 'type', 'amount', 'category_name', 'description']].to_string())
+
+    # Статистика за период
+    totals = Analytics.totals(period_df)
+    print(f"\nСтатистика {label}:")
+    print(f"Доходы: {totals['income']:,.2f}")
+    print(f"Расходы: {totals['expense']:,.2f}")
+    print(f"Баланс: {totals['balance']:,.2f}")
+
+
 def interactive_pandas_analysis():
     """Интерактивный анализ с pandas"""
     print("🔍 ИНТЕРАКТИВНЫЙ АНАЛИЗ ОПЕРАЦИЙ С PANDAS")
@@ -274,12 +326,14 @@ def interactive_pandas_analysis():
         print("2. Показать только доходы")
         print("3. Показать только расходы")
         print("4. Показать операции за конкретный месяц")
-        print("5. Показать операции по категории")
-        print("6. Поиск операций по описанию")
-        print("7. Экспорт в Excel")
-        print("8. Выйти")
+        print("5. Показать операции за год")
+        print("6. Показать операции за период")
+        print("7. Показать операции по категории")
+        print("8. Поиск операций по описанию")
+        print("9. Экспорт в Excel")
+        print("10. Выйти")
 
-        choice = input("\nВыберите действие (1-8): ").strip()
+        choice = input("\nВыберите действие (1-10): ").strip()
 
         if choice == '1':
             # Все операции
@@ -291,35 +345,44 @@ def interactive_pandas_analysis():
             income_df = df[df['type'] == 'income']
             print(f"\n📈 ДОХОДЫ ({len(income_df)} операций):")
             print(income_df[['date', 'amount', 'category_name', 'description']].head(20).to_string())
-            print(f"\nОбщая сумма доходов: {income_df['amount'].sum():,.2f}")
+            print(f"\nОбщая сумма доходов: {income_df['amount_cents'].sum() / 100:,.2f}")
 
         elif choice == '3':
             # Только расходы
             expense_df = df[df['type'] == 'expense']
             print(f"\n📉 РАСХОДЫ ({len(expense_df)} операций):")
             print(expense_df[['date', 'amount', 'category_name', 'description']].head(20).to_string())
-            print(f"\nОбщая сумма расходов: {expense_df['amount'].sum():,.2f}")
+            print(f"\nОбщая сумма расходов: {expense_df['amount_cents'].sum() / 100:,.2f}")
 
         elif choice == '4':
-            # По месяцу
+            # По месяцу - запрос к базе по индексу колонки month
             month = input("Введите месяц в формате ГГГГ-ММ (например, 2024-01): ").strip()
             if month:
-                month_df = df[df['date'].str.startswith(month)]
-                if not month_df.empty:
-                    print(f"\n📅 ОПЕРАЦИИ ЗА {month}:")
-                    print(month_df[['date', 'type', 'amount', 'category_name', 'description']].to_string())
-
-                    # Статистика за месяц
-                    month_income = month_df[month_df['type'] == 'income']['amount'].sum()
-                    month_expense = month_df[month_df['type'] == 'expense']['amount'].sum()
-                    print(f"\nСтатистика за месяц:")
-                    print(f"Доходы: {month_income:,.2f}")
-                    print(f"Расходы: {month_expense:,.2f}")
-                    print(f"Баланс: {month_income - month_expense:,.2f}")
-                else:
-                    print(f"❌ Операций за {month} не найдено")
+                if not is_valid_period(month, "%Y-%m"):
+                    print("❌ Неверный формат месяца")
+                    continue
+                show_period_operations(get_dataset().read_period(month=month), f"ЗА {month}", "за месяц")
 
         elif choice == '5':
+            # По году - диапазон дат по индексу idx_operations_date
+            year = input("Введите год в формате ГГГГ (например, 2024): ").strip()
+            if year:
+                if not is_valid_period(year, "%Y"):
+                    print("❌ Неверный формат года")
+                    continue
+                show_period_operations(get_dataset().read_period(year=year), f"ЗА {year} ГОД", "за год")
+
+        elif choice == '6':
+            # За период
+            start_date = input("Дата начала ГГГГ-ММ-ДД (Enter - без ограничения): ").strip() or None
+            end_date = input("Дата окончания ГГГГ-ММ-ДД (Enter - без ограничения): ").strip() or None
+            if any(value and not is_valid_period(value, "%Y-%m-%d") for value in (start_date, end_date)):
+                print("❌ Неверный формат даты")
+                continue
+            period_df = get_dataset().read_period(start_date=start_date, end_date=end_date)
+            show_period_operations(period_df, f"С {start_date or '...'} ПО {end_date or '...'}", "за период")
+
+        elif choice == '7':
             # По категории
             categories = df['category_name'].unique()
             print("\nДоступные категории:")
@@ -344,8 +407,8 @@ def interactive_pandas_analysis():
                     print(f"\n📁 ОПЕРАЦИИ ПО КАТЕГОРИИ '{selected_category}':")
                     print(category_df[['date', 'type', 'amount', 'description']].to_string())
 
-                    cat_income = category_df[category_df['type'] == 'income']['amount'].sum()
-                    cat_expense = category_df[category_df['type'] == 'expense']['amount'].sum()
+                    cat_income = category_df[category_df['type'] == 'income']['amount_cents'].sum() / 100
+                    cat_expense = category_df[category_df['type'] == 'expense']['amount_cents'].sum() / 100
                     print(f"\nСтатистика по категории:")
                     print(f"Операций: {len(category_df)}")
                     print(f"Доходы: {cat_income:,.2f}")
@@ -356,7 +419,7 @@ def interactive_pandas_analysis():
             except Exception as e:
                 print(f"❌ Ошибка: {e}")
 
-        elif choice == '6':
+        elif choice == '8':
             # Поиск по описанию
             search_term = input("Введите текст для поиска в описании: ").strip().lower()
             if search_term:
@@ -367,11 +430,11 @@ def interactive_pandas_analysis():
                 else:
                     print(f"❌ Операций с текстом '{search_term}' не найдено")
 
-        elif choice == '7':
+        elif choice == '9':
             # Экспорт в Excel
             export_operations_to_excel()
 
-        elif choice == '8':
+        elif choice == '10':
             print("\n👋 Выход из анализа")
             break
 
@@ -401,9 +464,11 @@ def main():
         print("2. 🔍 Интерактивный анализ")
         print("3. 💾 Экспорт в Excel")
         print("4. 📋 Показать информацию о данных")
-        print("5. 🚪 Выход")
+        print("5. 🗂️ Полная выгрузка снимка в Parquet")
+        print("6. 📦 Потоковый экспорт в Excel (большие объемы)")
+        print("7. 🚪 Выход")
 
-        choice = input("\nВыберите действие (1-5): ").strip()
+        choice = input("\nВыберите действие (1-7): ").strip()
 
         if choice == '1':
             display_operations_with_pandas()
@@ -414,6 +479,10 @@ def main():
         elif choice == '4':
             show_data_info()
         elif choice == '5':
+            export_operations_snapshot()
+        elif choice == '6':
+            export_operations_to_excel_streaming()
+        elif choice == '7':
             print("\n👋 До свидания!")
             break
         else:
@@ -434,7 +503,7 @@ def show_data_info():
     print("📊 ОСНОВНАЯ ИНФОРМАЦИЯ:")
     print(f"Количество операций: {len(df)}")
     print(f"Количество столбцов: {len(df.columns)}")
-    print(f"Период данных: с {df['date'].min()} по {df['date'].max()}")
+    print(f"Период данных: с {df['date'].min():%Y-%m-%d} по {df['date'].max():%Y-%m-%d}")
 
     print("\n📈 СТАТИСТИКА ПО ТИПАМ:")
     type_counts = df['type'].value_counts()
@@ -450,7 +519,6 @@ def show_data_info():
         print(f"  {category}: {count} операций")
 
     print("\n📅 РАСПРЕДЕЛЕНИЕ ПО МЕСЯЦАМ:")
-    df['month'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m')
     month_counts = df['month'].value_counts().sort_index()
     for month, count in month_counts.items():
         print(f"  {month}: {count} операций")
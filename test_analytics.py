@@ -0,0 +1,144 @@
+"""Analytics.py против прежних вычислений test.py (groupby с lambda, to_datetime + strftime)"""
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+import Analytics
+
+
+def make_operations() -> "pd.DataFrame":
+    """Небольшой фиксированный набор: несколько месяцев, оба типа, операции без подкатегории"""
+    rows = [
+        # id, type, date, category_name, category_type, subcategory_name, amount_cents, description
+        ('op-01', 'income', '2024-01-05', 'Зарплата', 'income', None, 15000000, 'аванс'),
+        ('op-02', 'expense', '2024-01-07', 'Продукты', 'expense', 'Супермаркет', 350050, None),
+        ('op-03', 'expense', '2024-01-20', 'Продукты', 'expense', 'Рынок', 120000, 'овощи'),
+        ('op-04', 'expense', '2024-01-31', 'Транспорт', 'expense', None, 6500, 'метро'),
+        ('op-05', 'income', '2024-02-05', 'Зарплата', 'income', None, 15000000, 'аванс'),
+        ('op-06', 'expense', '2024-02-14', 'Развлечения', 'expense', 'Кино', 90000, None),
+        ('op-07', 'expense', '2024-02-29', 'Продукты', 'expense', 'Супермаркет', 410099, None),
+        ('op-08', 'income', '2024-03-01', 'Подработка', 'income', 'Фриланс', 2500000, 'проект'),
+        ('op-09', 'expense', '2024-03-15', 'Транспорт', 'expense', 'Такси', 75000, None),
+        ('op-10', 'expense', '2024-03-15', 'Продукты', 'expense', 'Рынок', 120000, 'фрукты'),
+        ('op-11', 'expense', '2024-12-31', 'Развлечения', 'expense', None, 500000, 'праздник'),
+    ]
+    df = pd.DataFrame(rows, columns=['id', 'type', 'date', 'category_name', 'category_type',
+                                     'subcategory_name', 'amount_cents', 'description'])
+    df['amount'] = df['amount_cents'] / 100
+    return df
+
+
+@pytest.fixture(params=['raw', 'prepared'])
+def operations(request):
+    """Набор как из SQL (строки) и как после загрузчика (datetime, категории)"""
+    df = make_operations()
+    if request.param == 'prepared':
+        df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
+        df = Analytics.prepare_operations(df)
+    return df
+
+
+def legacy_monthly_stats(df):
+    """Прежний расчет из test.py"""
+    df = df.copy()
+    df['date'] = pd.to_datetime(df['date'])
+    df['month'] = df['date'].dt.strftime('%Y-%m')
+    stats = df.groupby('month').agg(
+        operations_count=('id', 'count'),
+        income=('amount_cents', lambda x: x[df.loc[x.index, 'type'] == 'income'].sum() / 100),
+        expense=('amount_cents', lambda x: x[df.loc[x.index, 'type'] == 'expense'].sum() / 100)
+    ).reset_index()
+    stats['balance'] = stats['income'] - stats['expense']
+    return stats
+
+
+def legacy_category_stats(df):
+    """Прежний расчет из test.py"""
+    stats = df.groupby(['category_name', 'category_type'], observed=True).agg(
+        operations_count=('id', 'count'),
+        total_amount=('amount_cents', 'sum')
+    ).reset_index()
+    stats['total_amount'] = stats['total_amount'] / 100
+    return stats
+
+
+def legacy_subcategory_stats(df):
+    """Тот же прием с lambda по подкатегориям"""
+    df = df.dropna(subset=['subcategory_name'])
+    return df.groupby(['category_name', 'subcategory_name'], observed=True).agg(
+        operations_count=('id', 'count'),
+        income=('amount_cents', lambda x: x[df.loc[x.index, 'type'] == 'income'].sum() / 100),
+        expense=('amount_cents', lambda x: x[df.loc[x.index, 'type'] == 'expense'].sum() / 100)
+    ).reset_index()
+
+
+def as_plain(df):
+    """Категории и строки pandas - обычные object, чтобы сравнивать значения, а не типы"""
+    return df.astype({name: object for name in df.columns if not pd.api.types.is_numeric_dtype(df[name])})
+
+
+def assert_same(actual, expected):
+    pd.testing.assert_frame_equal(as_plain(actual).reset_index(drop=True),
+                                  as_plain(expected).reset_index(drop=True), check_dtype=False)
+
+
+def test_monthly_stats(operations):
+    assert_same(Analytics.monthly_stats(operations), legacy_monthly_stats(make_operations()))
+
+
+def test_category_stats(operations):
+    assert_same(Analytics.category_stats(operations), legacy_category_stats(make_operations()))
+
+
+def test_subcategory_stats(operations):
+    assert_same(Analytics.subcategory_stats(operations), legacy_subcategory_stats(make_operations()))
+
+
+def test_top_operations(operations):
+    legacy = make_operations().nlargest(5, 'amount')
+    assert Analytics.top_operations(operations, 5)['id'].tolist() == legacy['id'].tolist()
+
+    legacy = make_operations()
+    legacy = legacy[legacy['type'] == 'expense'].nlargest(3, 'amount')
+    assert Analytics.top_operations(operations, 3, 'expense')['id'].tolist() == legacy['id'].tolist()
+
+
+def test_top_categories(operations):
+    legacy = make_operations()
+    legacy = legacy_category_stats(legacy[legacy['type'] == 'expense'])
+    legacy = legacy.nlargest(2, 'total_amount')
+    assert_same(Analytics.top_categories(operations, 2), legacy)
+
+
+def test_totals(operations):
+    df = make_operations()
+    income = df[df['type'] == 'income']['amount_cents'].sum()
+    expense = df[df['type'] == 'expense']['amount_cents'].sum()
+    assert Analytics.totals(operations) == {
+        'total_count': len(df),
+        'income_count': len(df[df['type'] == 'income']),
+        'expense_count': len(df[df['type'] == 'expense']),
+        'income': income / 100,
+        'expense': expense / 100,
+        'balance': (income - expense) / 100
+    }
+
+
+def test_statistics_do_not_modify_frame(operations):
+    columns = list(operations.columns)
+    dtypes = operations.dtypes.copy()
+    Analytics.monthly_stats(operations)
+    Analytics.category_stats(operations)
+    Analytics.subcategory_stats(operations)
+    Analytics.top_categories(operations)
+    assert list(operations.columns) == columns
+    pd.testing.assert_series_equal(operations.dtypes, dtypes)
+
+
+def test_for_display_keeps_none_for_missing_subcategory():
+    df = Analytics.prepare_operations(make_operations())
+    display = Analytics.for_display(df)
+    assert display.loc[0, 'subcategory_name'] is None
+    assert display.loc[1, 'subcategory_name'] == 'Супермаркет'
+    # Исходный набор остается категориальным
+    assert isinstance(df['subcategory_name'].dtype, pd.CategoricalDtype)
@@ -0,0 +1,46 @@
+"""Поиск категорий и подкатегорий по имени через кэш справочника"""
+from Category import Category
+from Operation import Operation
+from Subcategory import Subcategory
+
+
+def test_name_lookup_is_case_insensitive(db):
+    categories = Category(db)
+    category = categories.get_category_by_name("  продукты ")
+    assert category['name'] == "Продукты"
+
+    subcategory_id = Subcategory(db).create_subcategory(category['id'], "Рынок")
+    assert Subcategory(db).find_subcategory(category['id'], "РЫНОК")['id'] == subcategory_id
+    assert Subcategory(db).get_subcategory_by_name("рынок")['id'] == subcategory_id
+    assert Subcategory(db).get_subcategory_by_name("рынок", "ПРОДУКТЫ")['id'] == subcategory_id
+    assert Subcategory(db).get_subcategory_by_name("рынок", "Транспорт") is None
+
+
+def test_duplicate_names_resolve_to_earliest(db):
+    first = Category(db).get_category_by_name("Продукты")['id']
+    Category(db).create_category("продукты", "expense")
+    assert Category(db).get_category_by_name("ПРОДУКТЫ")['id'] == first
+
+
+def test_rename_invalidates_name_lookup(db):
+    categories = Category(db)
+    category_id = categories.get_category_by_name("Продукты")['id']
+    assert categories.update_category(category_id, "Еда")
+    assert categories.get_category_by_name("Продукты") is None
+    assert categories.get_category_by_name("еда")['id'] == category_id
+
+
+def test_delete_category_with_operations_is_refused(db):
+    categories = Category(db)
+    category_id = categories.get_category_by_name("Продукты")['id']
+    Operation(db).create_operation("expense", category_id, None, 10, "2024-01-05", None)
+
+    assert categories.delete_category(category_id) is False
+    assert categories.get_category_by_id(category_id) is not None
+
+
+def test_delete_empty_category(db):
+    categories = Category(db)
+    category_id = categories.create_category("Транспорт", "expense")
+    assert categories.delete_category(category_id) is True
+    assert categories.get_category_by_id(category_id) is None
@@ -0,0 +1,23 @@
+"""Пул соединений: читатели открывают ту же базу только для чтения"""
+import sqlite3
+
+import pytest
+
+from ConnectionPool import ConnectionPool
+
+
+@pytest.mark.parametrize("name", ["finance.db", "отчет?v=1#2 100%.db"])
+def test_readers_open_path_with_uri_characters(tmp_path, name):
+    path = str(tmp_path / name)
+    pool = ConnectionPool(path, [], readers=1)
+    try:
+        with pool.write_connection() as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+            conn.execute("INSERT INTO t VALUES (1)")
+        with pool.read_connection() as conn:
+            assert [tuple(row) for row in conn.execute("SELECT x FROM t")] == [(1,)]
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute("INSERT INTO t VALUES (2)")
+    finally:
+        pool.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == [name]
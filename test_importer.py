@@ -0,0 +1,33 @@
+"""Импорт операций: неверные строки пропускаются, остальные вставляются"""
+from Category import Category
+from Importer import OperationImporter
+from Operation import Operation
+
+
+def test_validate_date_matches_trigger():
+    assert Operation.validate_date("2024-01-06")
+    assert not Operation.validate_date("2024-1-6")
+    assert not Operation.validate_date("20240106")
+    assert not Operation.validate_date("2024-02-30")
+    assert not Operation.validate_date("")
+
+
+def test_import_skips_bad_date_row(db, tmp_path):
+    path = tmp_path / "operations.csv"
+    path.write_text("category,amount,date,description\n"
+                    "Продукты,100.50,2024-01-05,хлеб\n"
+                    "Продукты,200,2024-1-6,неполная дата\n"
+                    "Продукты,300,2024-01-07,молоко\n", encoding="utf-8")
+
+    stats = OperationImporter(db).import_file(str(path))
+
+    assert stats['imported'] == 2
+    assert stats['skipped'] == 1
+    rows = db.fetch_all("SELECT date, amount_cents, description FROM operations ORDER BY date")
+    assert [tuple(row) for row in rows] == [("2024-01-05", 10050, "хлеб"), ("2024-01-07", 30000, "молоко")]
+
+
+def test_create_operation_rejects_unpadded_date(db):
+    category = Category(db).get_category_by_name("Продукты")
+    assert Operation(db).create_operation("expense", category['id'], None, 10, "2024-5-3", None) is None
+    assert db.fetch_one("SELECT COUNT(*) FROM operations")[0] == 0
@@ -0,0 +1,63 @@
+"""Ссылки операции на категорию и подкатегорию проверяются до записи"""
+import pytest
+
+from Category import Category
+from Operation import Operation
+from Subcategory import Subcategory
+
+
+@pytest.fixture
+def refs(db):
+    """Категория расходов с подкатегорией и чужая подкатегория другой категории"""
+    category_id = Category(db).get_category_by_name("Продукты")['id']
+    other_id = Category(db).create_category("Транспорт", "expense")
+    subcategory_id = Subcategory(db).create_subcategory(category_id, "Рынок")
+    foreign_id = Subcategory(db).create_subcategory(other_id, "Такси")
+    return category_id, subcategory_id, foreign_id
+
+
+def stored(db, op_id):
+    return db.fetch_one("""
+                        SELECT c.uuid AS category_id, s.uuid AS subcategory_id
+                        FROM operations o
+                                 JOIN categories c ON o.category_id = c.id
+                                 LEFT JOIN subcategories s ON o.subcategory_id = s.id
+                        WHERE o.uuid = ?
+                        """, (op_id,))
+
+
+def test_create_with_short_ids(db, refs):
+    category_id, subcategory_id, _ = refs
+    op_id = Operation(db).create_operation("expense", category_id[:8] + "...", subcategory_id[:8], 10,
+                                           "2024-01-05", None)
+    assert tuple(stored(db, op_id)) == (category_id, subcategory_id)
+
+
+@pytest.mark.parametrize("category, subcategory", [
+    ("bogus-category", None),
+    (None, "bogus-sub"),
+    (None, "foreign"),
+])
+def test_create_rejects_bad_references(db, refs, category, subcategory):
+    category_id, _, foreign_id = refs
+    category = category or category_id
+    subcategory = foreign_id if subcategory == "foreign" else subcategory
+    assert Operation(db).create_operation("expense", category, subcategory, 10, "2024-01-05", None) is None
+    assert db.fetch_one("SELECT COUNT(*) FROM operations")[0] == 0
+
+
+def test_create_rejects_category_of_other_type(db, refs):
+    income_id = Category(db).create_category("Зарплата", "income")
+    assert Operation(db).create_operation("expense", income_id, None, 10, "2024-01-05", None) is None
+
+
+def test_update_keeps_operation_on_unknown_subcategory(db, refs, monkeypatch):
+    category_id, subcategory_id, _ = refs
+    operations = Operation(db)
+    op_id = operations.create_operation("expense", category_id, subcategory_id, 10, "2024-01-05", None)
+
+    # Сумма, дата, описание, категория - по умолчанию; подкатегория - неизвестная
+    answers = iter(["", "", "", "", "bogus-sub"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+    assert operations.update_operation(op_id) is False
+    assert tuple(stored(db, op_id)) == (category_id, subcategory_id)
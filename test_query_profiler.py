@@ -0,0 +1,53 @@
+"""Профилировщик: полный просмотр таблицы и просмотр по индексу"""
+import pytest
+
+from DatabaseManager import DatabaseManager
+from Migrations import migrate
+from Operation import Operation
+from QueryProfiler import QueryProfiler
+
+
+def test_index_scan_under_limit_is_not_full_scan():
+    plan = ["SCAN o USING INDEX idx_operations_date", "SEARCH c USING INTEGER PRIMARY KEY (rowid=?)"]
+    query = "SELECT o.id FROM operations o JOIN categories c ON o.category_id = c.id ORDER BY o.date DESC LIMIT ?"
+    assert QueryProfiler.classify_scans(query, plan) == ([], ['operations'])
+
+
+def test_index_scan_without_limit_is_full_scan():
+    plan = ["SCAN o USING INDEX idx_operations_date"]
+    query = "SELECT o.id FROM operations o WHERE o.type = ? ORDER BY o.date DESC"
+    assert QueryProfiler.classify_scans(query, plan) == (['operations'], [])
+
+
+def test_virtual_table_scan_is_ignored():
+    plan = ["SCAN operations_fts VIRTUAL TABLE INDEX 0:M1"]
+    assert QueryProfiler.classify_scans("SELECT rowid FROM operations_fts WHERE operations_fts MATCH ?",
+                                        plan) == ([], [])
+
+
+@pytest.fixture
+def profiled(db):
+    """База с операциями обоих типов и профилировщиком, снимающим план каждого запроса"""
+    category_id = db.fetch_one("SELECT uuid FROM categories WHERE type = 'expense'")['uuid']
+    operations = Operation(db)
+    for day in range(1, 29):
+        operations.create_operation('expense', category_id, None, day, f"2024-02-{day:02d}", None)
+    profiler = QueryProfiler(threshold_ms=0)
+    manager = DatabaseManager(db.db_name, profiler=profiler)
+    manager.connect()
+    yield manager, profiler
+    manager.disconnect()
+
+
+def test_unbounded_index_walk_is_reported(profiled):
+    db, profiler = profiled
+    # Статистика как у наполненной базы: без нее на нескольких строках планировщик выбирает другой план
+    db.execute_query("ANALYZE")
+    assert len(Operation(db).get_all_operations(type_='expense')) == 28
+    Operation(db).get_operations_page(page_size=5)
+
+    stats = {stat['sql']: stat for stat in profiler.summary() if 'o.uuid AS id' in stat['sql']}
+    walk = next(stat for sql, stat in stats.items() if 'LIMIT' not in sql)
+    page = next(stat for sql, stat in stats.items() if 'LIMIT' in sql)
+    assert 'operations' in walk['scans']
+    assert 'operations' not in page['scans']
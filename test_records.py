@@ -0,0 +1,29 @@
+"""Записи: доступ по имени поля как у словаря"""
+import pytest
+
+from Records import CategoryRecord, OperationRecord
+
+
+def test_field_access_by_name_and_index():
+    record = CategoryRecord('c-1', 'Продукты', 'expense')
+    assert record['name'] == record.name == record[1] == 'Продукты'
+    assert 'type' in record
+    assert record.to_dict() == {'id': 'c-1', 'name': 'Продукты', 'type': 'expense'}
+
+
+@pytest.mark.parametrize("key", ['count', 'index', '_fields', '_asdict', 'missing'])
+def test_non_field_names_are_not_keys(key):
+    record = CategoryRecord('c-1', 'Продукты', 'expense')
+    with pytest.raises(KeyError):
+        record[key]
+    assert key not in record
+    assert record.get(key, 'default') == 'default'
+
+
+def test_operation_amount_is_a_key():
+    row = (1, 'o-1', 'expense', 'c-1', 'Продукты', None, None, 12345, '2024-01-05', None)
+    record = OperationRecord.row_factory()(None, row)
+    assert record['amount'] == record.get('amount') == record.amount
+    assert float(record['amount']) == 123.45
+    with pytest.raises(KeyError):
+        record['count']
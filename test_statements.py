@@ -0,0 +1,20 @@
+"""Реестр именованных запросов хранит текст без изменений"""
+import pytest
+
+from Statements import STATEMENTS, register_statement
+
+
+def test_registered_text_is_kept_verbatim(db):
+    name = register_statement('tests.verbatim', """
+        SELECT 'a  b' AS spaced -- комментарий до конца строки
+             , 1 AS one
+        """)
+    assert STATEMENTS[name].count("a  b") == 1
+    assert tuple(db.fetch_one(name)) == ("a  b", 1)
+
+
+def test_redefinition_with_other_text_is_rejected():
+    register_statement('tests.redefined', "SELECT 1")
+    assert register_statement('tests.redefined', "SELECT 1") == 'tests.redefined'
+    with pytest.raises(ValueError):
+        register_statement('tests.redefined', "SELECT 2")